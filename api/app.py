@@ -5,10 +5,13 @@ This is the entry point that Vercel looks for
 
 import sys
 import os
+import asyncio
 import logging
+from typing import Optional
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse, FileResponse
 
 # --- FIX START: Register Project Root ---
 # This must be at the top to ensure 'lib' and 'api' can be imported correctly
@@ -22,8 +25,16 @@ except Exception as e:
 # --- FIX END ---
 
 # Now we can import internal modules safely
-from api.config import config
+from api.config import config, FAST_STARTUP, METRICS_ENABLED
 from api.database import supabase_db
+from api.jobs import job_queue
+from api.responses import FastJSONResponse
+from api.caching import StaleDataMiddleware
+from api.circuit import db_breaker
+from api.deadlines import DeadlineMiddleware
+from api.telemetry import TimingMiddleware, metrics_registry
+from api.executors import render_prometheus as executor_metrics
+from api.profiling import ProfilingMiddleware, profile_store, profiling_enabled, authorized
 # Import the router explicitly
 from api.v1.routes import router as v1_router
 
@@ -35,21 +46,33 @@ logger = logging.getLogger(__name__)
 # LIFECYCLE EVENTS
 # ============================================================================
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Manage app lifecycle"""
-    logger.info("✅ FastAPI app starting up...")
-    # Startup
+async def startup_check():
+    """Supabase connectivity check (first use also builds the client)"""
     try:
         health = await supabase_db.health_check()
         if not health:
             logger.warning("⚠️ Supabase connection check failed at startup")
     except Exception as e:
         logger.error(f"⚠️ Supabase check error: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Manage app lifecycle"""
+    logger.info("✅ FastAPI app starting up...")
+    # Startup: in fast-startup mode the check runs off the critical path
+    check = None
+    if FAST_STARTUP:
+        check = asyncio.create_task(startup_check())
+    else:
+        await startup_check()
     
     yield
     
     # Shutdown
+    if check is not None and not check.done():
+        check.cancel()
+    await job_queue.stop()
     logger.info("🛑 FastAPI app shutting down...")
 
 
@@ -61,7 +84,8 @@ app = FastAPI(
     title="Incrolink API v2",
     description="Financial analytics API - Vercel + Supabase",
     version="2.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse
 )
 
 # ============================================================================
@@ -76,6 +100,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request deadline (REQUEST_BUDGET) that database call timeouts are derived from
+app.add_middleware(DeadlineMiddleware)
+
+# Staleness headers on responses served from snapshots while the database is down
+app.add_middleware(StaleDataMiddleware)
+
+# Per-stage timing (Server-Timing + /metrics); not installed at all when disabled
+if METRICS_ENABLED:
+    app.add_middleware(TimingMiddleware)
+
+# On-demand profiling (X-Profile header or PROFILE_SAMPLE_RATE); outermost so
+# the profile covers the whole request
+if profiling_enabled():
+    app.add_middleware(ProfilingMiddleware)
+
 # ============================================================================
 # INCLUDE ROUTES
 # ============================================================================
@@ -103,10 +142,11 @@ async def root():
 async def health():
     """Health check endpoint for Vercel"""
     try:
-        db_health = await supabase_db.health_check()
+        db_health = await supabase_db.health_check()  # cached for a few seconds
         return {
             "status": "healthy" if db_health else "degraded",
             "database": "connected" if db_health else "disconnected",
+            "circuit": db_breaker.stats(),
             "environment": getattr(config, 'vercel_env', 'development'),
             "version": "2.0.0"
         }
@@ -115,6 +155,45 @@ async def health():
         raise HTTPException(status_code=503, detail="Service unavailable")
 
 
+@app.get("/metrics")
+async def metrics():
+    """Latency histograms per route and stage plus database executor load, Prometheus text format"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Metrics disabled (set METRICS_ENABLED=1)")
+    return PlainTextResponse(
+        metrics_registry.render_prometheus() + executor_metrics(),
+        media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+# ============================================================================
+# PROFILES (download with the same X-Profile token)
+# ============================================================================
+
+@app.get("/debug/profiles")
+async def list_profiles(x_profile: Optional[str] = Header(None)):
+    """Stored request profiles, newest first"""
+    if not authorized(x_profile):
+        raise HTTPException(status_code=404, detail="Not found")
+    return {"status": "success", "profiles": profile_store.list()}
+
+
+@app.get("/debug/profiles/{profile_id}")
+async def download_profile(profile_id: str, x_profile: Optional[str] = Header(None)):
+    """pstats file (cprofile mode) or folded stacks (sample mode) for one request"""
+    if not authorized(x_profile):
+        raise HTTPException(status_code=404, detail="Not found")
+    entry = profile_store.get(profile_id)
+    path = profile_store.path(profile_id)
+    if entry is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return FileResponse(
+        path,
+        media_type="application/octet-stream" if entry["mode"] == "cprofile" else "text/plain",
+        filename=os.path.basename(path)
+    )
+
+
 # ============================================================================
 # ERROR HANDLERS
 # ============================================================================
@@ -123,10 +202,14 @@ async def health():
 async def http_exception_handler(request, exc):
     """Custom HTTP exception handler"""
     logger.error(f"HTTP Exception: {exc.detail}")
-    return {
-        "error": exc.detail,
-        "status_code": exc.status_code
-    }
+    return JSONResponse(
+        status_code=exc.status_code,
+        content={
+            "error": exc.detail,
+            "status_code": exc.status_code
+        },
+        headers=getattr(exc, "headers", None)
+    )
 
 
 @app.exception_handler(Exception)
@@ -134,7 +217,6 @@ async def general_exception_handler(request, exc):
     """Catch-all exception handler"""
     logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
     # Return JSON response instead of default HTML error
-    from fastapi.responses import JSONResponse
     return JSONResponse(
         status_code=500,
         content={
@@ -0,0 +1,122 @@
+# api/caching.py
+"""
+HTTP caching for the data endpoints
+ETag / Last-Modified / Cache-Control from the table cache versions,
+304 Not Modified answered before anything is serialized
+"""
+
+import hashlib
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional
+
+from fastapi import Request
+from fastapi.responses import Response
+from starlette.datastructures import MutableHeaders
+
+# Tables served from an expired snapshot during the current request
+# ({table_key: age in seconds}); one shared dict, so tasks spawned by the
+# request (asyncio.gather) report into it too
+_stale_tables: ContextVar[Optional[Dict[str, float]]] = ContextVar("stale_tables", default=None)
+
+
+def cache_validators(versions: Dict[str, Optional[Dict]], fmt: str) -> Dict[str, str]:
+    """
+    Response headers for one or more cached tables.
+
+    versions maps table key -> TableCache.version() (None for a table that
+    failed to load). The ETag also covers the output format, since each
+    format is a different representation of the same data. A response
+    missing a table must not be cached, so it gets no-store.
+    """
+    digest = hashlib.sha1(fmt.encode())
+    for table_key in sorted(versions):
+        version = versions[table_key]
+        digest.update(f"{table_key}:{version['hash'] if version else 'missing'};".encode())
+
+    loaded = [v for v in versions.values() if v]
+    last_modified = max((v["last_modified"] for v in loaded), default=datetime.now(timezone.utc))
+    if loaded and len(loaded) == len(versions):
+        cache_control = f"public, max-age={min(v['max_age'] for v in loaded)}"
+    else:
+        cache_control = "no-store"
+
+    return {
+        "ETag": f'"{digest.hexdigest()[:24]}"',
+        "Last-Modified": format_datetime(last_modified.astimezone(timezone.utc), usegmt=True),
+        "Cache-Control": cache_control,
+        "Vary": "Accept",
+    }
+
+
+def not_modified(request: Request, headers: Dict[str, str]) -> Optional[Response]:
+    """
+    304 response if the client's copy is current, else None.
+    If-None-Match takes precedence over If-Modified-Since (RFC 9110).
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        etag = headers["ETag"]
+        tags = {tag.strip() for tag in if_none_match.split(",")}
+        if "*" in tags or etag in tags or f"W/{etag}" in tags:
+            return Response(status_code=304, headers=headers)
+        return None
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            last_modified = parsedate_to_datetime(headers["Last-Modified"])
+        except (TypeError, ValueError):
+            return None
+        if last_modified <= since:
+            return Response(status_code=304, headers=headers)
+
+    return None
+
+
+# ============================================================================
+# STALE SNAPSHOTS (database unavailable)
+# ============================================================================
+
+def mark_stale(table_key: str, age: float):
+    """Record that the current response uses a snapshot of table_key that is age seconds old"""
+    tables = _stale_tables.get()
+    if tables is not None:
+        tables[table_key] = max(age, tables.get(table_key, 0.0))
+
+
+def staleness_headers(tables: Dict[str, float]) -> Dict[str, str]:
+    return {
+        "X-Data-Stale": ",".join(sorted(tables)),
+        "X-Data-Age": str(int(max(tables.values()))),
+        "Warning": '110 - "Response is Stale"',
+    }
+
+
+class StaleDataMiddleware:
+    """Adds X-Data-Stale / X-Data-Age / Warning to responses built from stale snapshots"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        tables: Dict[str, float] = {}
+        token = _stale_tables.set(tables)
+
+        async def send_with_staleness(message):
+            if message["type"] == "http.response.start" and tables:
+                headers = MutableHeaders(scope=message)
+                for name, value in staleness_headers(tables).items():
+                    headers[name] = value
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_staleness)
+        finally:
+            _stale_tables.reset(token)
@@ -0,0 +1,101 @@
+# api/circuit.py
+"""
+Circuit breaker around the Supabase data layer
+After BREAKER_FAILURES consecutive failed calls (timeouts, connection
+errors, failed health probes) the circuit opens: calls fail fast with 503
+and read paths fall back to the last good table snapshots. After
+BREAKER_RESET seconds one trial call (or health probe) is let through;
+its success closes the circuit, its failure opens it again.
+"""
+
+import logging
+import math
+import time
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+
+from .config import BREAKER_FAILURES, BREAKER_RESET
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class CircuitOpen(HTTPException):
+    """503 raised instead of calling Supabase while the circuit is open"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail="Database temporarily unavailable",
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class CircuitBreaker:
+    """Consecutive-failure breaker; state changes happen on the event-loop thread"""
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES, reset_timeout: float = BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.times_opened = 0
+        self._trial_running = False
+
+    def retry_after(self) -> int:
+        if self.opened_at is None:
+            return 1
+        return max(1, math.ceil(self.reset_timeout - (time.monotonic() - self.opened_at)))
+
+    def allow(self) -> bool:
+        """Whether a call may go out now (claims the trial slot when half-open)"""
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self.state = HALF_OPEN
+            self._trial_running = False
+        if self.state == CLOSED:
+            return True
+        if self.state == HALF_OPEN and not self._trial_running:
+            self._trial_running = True
+            return True
+        return False
+
+    def check(self) -> bool:
+        """Raise CircuitOpen unless a call may go out; True when it is the half-open trial"""
+        if not self.allow():
+            raise CircuitOpen(self.retry_after())
+        return self.state == HALF_OPEN
+
+    def release(self):
+        """Give back the trial slot when the trial ended without a verdict (e.g. rejected before sending)"""
+        self._trial_running = False
+
+    def record_success(self):
+        if self.state != CLOSED:
+            logger.info("✅ Database circuit closed")
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def record_failure(self):
+        self.failures += 1
+        self._trial_running = False
+        if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+            self.times_opened += 1
+            logger.warning(f"⚠️ Database circuit opened after {self.failures} consecutive failures")
+
+    def stats(self) -> Dict:
+        return {
+            "state": self.state,
+            "consecutive_failures": self.failures,
+            "times_opened": self.times_opened,
+            "retry_after": self.retry_after() if self.state != CLOSED else 0,
+        }
+
+
+db_breaker = CircuitBreaker()
@@ -72,12 +72,76 @@ TABLES = {
 VERCEL_ENV = os.getenv("VERCEL_ENV", "production")  # development, preview, production
 MAX_REQUEST_DURATION = 25  # Vercel free tier max: 26 seconds
 
+# Fast startup: the startup Supabase check runs in the background instead of
+# blocking the first request ("0" restores the blocking check)
+FAST_STARTUP = os.getenv("FAST_STARTUP", "1") != "0"
+
+# Per-stage timing: Server-Timing headers and the Prometheus /metrics endpoint
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0") == "1"
+
+# On-demand profiling: requests with X-Profile: <PROFILE_TOKEN>, or a random
+# PROFILE_SAMPLE_RATE fraction of requests, are profiled into PROFILE_DIR
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "/tmp/incrolink-profiles")  # /tmp is the writable path on Vercel
+PROFILE_MAX_STORED = 50
+
+# Supabase calls per workload class: (worker threads, calls allowed to wait);
+# calls beyond that are rejected with 503 + Retry-After (see api/executors.py)
+DB_EXECUTORS = {
+    "bulk": (int(os.getenv("DB_BULK_WORKERS", "4")), int(os.getenv("DB_BULK_QUEUE", "8"))),
+    "point": (int(os.getenv("DB_POINT_WORKERS", "16")), int(os.getenv("DB_POINT_QUEUE", "64"))),
+    "write": (int(os.getenv("DB_WRITE_WORKERS", "4")), int(os.getenv("DB_WRITE_QUEUE", "32"))),
+}
+
+# Deadlines: each request must be answered within REQUEST_BUDGET seconds;
+# a Supabase call gets its class timeout or what is left of that, if less
+REQUEST_BUDGET = MAX_REQUEST_DURATION - 1  # leave time to send the error
+DB_CALL_TIMEOUTS = {
+    "bulk": float(os.getenv("DB_BULK_TIMEOUT", "15")),
+    "point": float(os.getenv("DB_POINT_TIMEOUT", "5")),
+    "write": float(os.getenv("DB_WRITE_TIMEOUT", "10")),
+}
+DB_RETRIES = int(os.getenv("DB_RETRIES", "2"))  # extra attempts for reads that timed out / lost the connection
+DB_RETRY_BACKOFF = 0.1      # seconds before the first retry, doubled each time (full jitter)
+DB_RETRY_BACKOFF_MAX = 2.0
+# Point lookups still running after this many seconds get a second, hedged
+# request; the first answer wins ("0" disables hedging)
+DB_HEDGE_DELAY = float(os.getenv("DB_HEDGE_DELAY", "0.25"))
+
+# Circuit breaker: open after this many consecutive failed calls, try again
+# after BREAKER_RESET seconds; while open, cached tables are served stale
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", "5"))
+BREAKER_RESET = float(os.getenv("BREAKER_RESET", "30"))
+HEALTH_CACHE_TTL = 5  # seconds a health probe result is reused
+
+# Batch analysis: fan out to a process pool only for very large batches
+BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", os.cpu_count() or 1))
+BATCH_PROCESS_THRESHOLD = 50_000  # companies
+
+# Async batch jobs: companies per chunk (each chunk must fit in one request)
+JOB_CHUNK_SIZE = 5_000
+# ... and the backoff before a job stalled by an outage is retried (seconds, doubling)
+JOB_RETRY_DELAY = 1.0
+JOB_RETRY_MAX_DELAY = 60.0
+JOB_REFRESH_INTERVAL = 1.0  # seconds an unfinished job's state is served before re-reading analysis_cache
+
+# CSV imports (api/import_csv.py): insert batches in flight at once, and the
+# bounds batch sizes adapt within (payload bytes, rows, seconds per batch)
+IMPORT_CONCURRENCY = int(os.getenv("IMPORT_CONCURRENCY", "8"))
+IMPORT_BATCH_BYTES = 1_000_000
+IMPORT_BATCH_MAX_ROWS = 5_000
+IMPORT_BATCH_LATENCY = 2.0  # seconds; slower batches shrink the next ones
+IMPORT_RETRIES = 4  # extra attempts for batches that failed on timeouts / unavailability
+IMPORT_RETRY_BACKOFF = 0.5
+
 # ============================================================================
 # API SETTINGS
 # ============================================================================
 
 API_PREFIX = "/api/v1"
 CACHE_TTL = 3600  # Cache responses for 1 hour
+PAGE_SIZE = 1000  # Rows per PostgREST page (Supabase caps a single select at 1000)
 
 
 class Config:
@@ -4,14 +4,41 @@ Supabase database connection and query helper functions
 Replaces Dropbox file streaming with SQL queries
 """
 
+from __future__ import annotations
+
 import asyncio
-from typing import List, Dict, Optional
-import pandas as pd
-from supabase import create_client, Client
-from postgrest.exceptions import APIError
+import functools
+import hashlib
+import random
+import threading
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, List, Dict, Optional, AsyncIterator
 import logging
 
-from .config import SUPABASE_URL, SUPABASE_API_KEY, TABLES
+from lib.lazy import lazy_import
+from fastapi import HTTPException
+
+from .config import (
+    SUPABASE_URL, SUPABASE_API_KEY, TABLES, PAGE_SIZE, CACHE_TTL,
+    DB_CALL_TIMEOUTS, DB_RETRIES, DB_RETRY_BACKOFF, DB_RETRY_BACKOFF_MAX, DB_HEDGE_DELAY,
+    HEALTH_CACHE_TTL
+)
+from .caching import mark_stale
+from .circuit import CircuitOpen, db_breaker
+from .deadlines import DeadlineExceeded, MIN_CALL_TIMEOUT, call_timeout, remaining
+from .executors import BoundedExecutor, db_executors
+from .telemetry import stage
+
+if TYPE_CHECKING:
+    from supabase import Client
+
+# pandas, supabase, postgrest and httpx are imported on first use, not on cold start
+pd = lazy_import("pandas")
+supabase = lazy_import("supabase")
+postgrest = lazy_import("postgrest")
+httpx = lazy_import("httpx")
 
 logger = logging.getLogger(__name__)
 
@@ -20,41 +47,60 @@ logger = logging.getLogger(__name__)
 # ============================================================================
 
 class SupabaseDB:
-    """Singleton Supabase database connection"""
+    """Singleton Supabase database connection, created on first use"""
     
     _instance = None
     _client: Optional[Client] = None
+    _client_lock = threading.Lock()
+    _health: Optional[bool] = None
+    _health_checked_at = 0.0
+    _health_lock = asyncio.Lock()
     
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(SupabaseDB, cls).__new__(cls)
         return cls._instance
     
-    def __init__(self):
-        if self._client is None:
-            try:
-                self._client = create_client(SUPABASE_URL, SUPABASE_API_KEY)
-                logger.info("✅ Supabase client initialized")
-            except Exception as e:
-                logger.error(f"❌ Failed to initialize Supabase: {str(e)}")
-                raise
-    
     @property
     def client(self) -> Client:
         if self._client is None:
-            raise RuntimeError("Supabase client not initialized")
+            # queries run in worker threads: only one of them builds the client
+            with self._client_lock:
+                if self._client is None:
+                    try:
+                        self._client = supabase.create_client(SUPABASE_URL, SUPABASE_API_KEY)
+                        self._client.postgrest.session.event_hooks["request"].append(_apply_call_timeout)
+                        logger.info("✅ Supabase client initialized")
+                    except Exception as e:
+                        logger.error(f"❌ Failed to initialize Supabase: {str(e)}")
+                        raise
         return self._client
     
+    def _health_is_fresh(self) -> bool:
+        return self._health is not None and time.monotonic() - self._health_checked_at < HEALTH_CACHE_TTL
+
     async def health_check(self) -> bool:
-        """Test connection to Supabase"""
-        try:
-            response = await asyncio.to_thread(
-                lambda: self.client.table(TABLES["dataset"]).select("count", count="exact").limit(1).execute()
-            )
-            return True
-        except Exception as e:
-            logger.error(f"Health check failed: {str(e)}")
-            return False
+        """
+        Test connection to Supabase with a one-row read of the small sector
+        table. The result is reused for HEALTH_CACHE_TTL seconds (concurrent
+        callers share one probe) and feeds the circuit breaker.
+        """
+        if self._health_is_fresh():
+            return self._health
+        async with self._health_lock:
+            if self._health_is_fresh():
+                return self._health
+            try:
+                await _run(
+                    lambda: self.client.table(TABLES["wacc"]).select("category_code").limit(1).execute(),
+                    probe=True
+                )
+                healthy = True
+            except Exception as e:
+                logger.error(f"Health check failed: {str(e)}")
+                healthy = False
+            SupabaseDB._health, SupabaseDB._health_checked_at = healthy, time.monotonic()
+            return healthy
 
 
 # Initialize singleton
@@ -62,50 +108,310 @@ supabase_db = SupabaseDB()
 
 
 # ============================================================================
-# DATA LOADING FUNCTIONS (Supabase replaces Dropbox streaming)
+# CALL EXECUTION (admission, timeouts, retries, hedging)
 # ============================================================================
 
-async def load_dataset() -> Optional[pd.DataFrame]:
-    """Load companies dataset from Supabase"""
+# Timeout of the PostgREST request made by the current worker thread
+_call_timeout: ContextVar[Optional[float]] = ContextVar("db_call_timeout", default=None)
+
+
+def _apply_call_timeout(request):
+    """httpx request hook: replace the client-wide timeout with the call's own"""
+    timeout = _call_timeout.get()
+    if timeout is not None:
+        request.extensions["timeout"] = {"connect": timeout, "read": timeout, "write": timeout, "pool": timeout}
+
+
+def _attempt(query, timeout: float):
+    _call_timeout.set(timeout)  # worker threads run in a copy of the caller's context
+    return query()
+
+
+# Postgres / PostgREST error codes that mean the database is down or
+# overloaded rather than rejecting the query: connection exceptions,
+# insufficient resources, operator intervention (incl. statement timeouts)
+# and PostgREST's own PGRST0xx connection errors
+UNAVAILABLE_CODE_PREFIXES = ("08", "53", "57", "PGRST0")
+
+
+def database_unavailable(error: postgrest.APIError) -> bool:
+    """Whether an error response came from an unavailable database (counts against the circuit breaker)"""
+    code = str(error.code or "")
+    if len(code) == 3 and code.isdigit():  # HTTP status of a non-JSON (gateway) error response
+        return code == "429" or code.startswith("5")
+    return code.startswith(UNAVAILABLE_CODE_PREFIXES)
+
+
+async def _hedged(executor: BoundedExecutor, call, force: bool):
+    """
+    Start a second request if the first has not answered after
+    DB_HEDGE_DELAY (only when a worker thread is free); first success wins
+    """
+    first = asyncio.ensure_future(executor.run(call, force))
+    pending = {first}
     try:
-        response = await asyncio.to_thread(
-            lambda: supabase_db.client.table(TABLES["dataset"]).select("*").execute()
+        done, pending = await asyncio.wait(pending, timeout=DB_HEDGE_DELAY)
+        if done or executor.in_flight >= executor.max_workers:
+            return await first
+        executor.events["hedge"] += 1
+        second = asyncio.ensure_future(executor.run(call, force=True))
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    if task is second:
+                        executor.events["hedge_win"] += 1
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()  # the losing thread finishes on its own; its result is dropped
+
+
+async def _run(query, workload: str = "point", force: bool = False, hedge: bool = False, probe: bool = False):
+    """
+    Run a blocking PostgREST call on its workload class executor (timed as
+    the "db" stage), within the current request's deadline.
+
+    Each attempt times out after DB_CALL_TIMEOUTS[workload] or the remaining
+    budget. Reads are retried on timeouts and connection errors with jittered
+    exponential backoff; writes are not (an insert may have gone through).
+    hedge=True sends a backup request for slow point lookups.
+    Every attempt feeds the circuit breaker: timeouts, connection errors and
+    error responses of an unavailable database (database_unavailable) count
+    as failures, other error responses as a live database. Health probes
+    (probe=True) go out even while it is open, are never retried, and count
+    any error as a failure.
+    Raises Overloaded / CircuitOpen (503) and DeadlineExceeded (504).
+    """
+    executor = db_executors[workload]
+    attempts = 1 if workload == "write" or probe else 1 + DB_RETRIES
+    with stage("db"):
+        for attempt in range(attempts):
+            try:
+                timeout = call_timeout(DB_CALL_TIMEOUTS[workload])
+            except DeadlineExceeded:
+                executor.events["deadline_exceeded"] += 1
+                raise
+            trial = False if probe else db_breaker.check()
+            call = functools.partial(_attempt, query, timeout)
+            try:
+                if hedge and DB_HEDGE_DELAY > 0:
+                    result = await _hedged(executor, call, force)
+                else:
+                    result = await executor.run(call, force)
+            except postgrest.APIError as e:
+                if probe or database_unavailable(e):
+                    db_breaker.record_failure()
+                else:
+                    db_breaker.record_success()  # the database answered and rejected the query
+                raise
+            except httpx.TransportError as e:
+                db_breaker.record_failure()
+                timed_out = isinstance(e, httpx.TimeoutException)
+                if timed_out:
+                    executor.events["timeout"] += 1
+                delay = random.uniform(0, min(DB_RETRY_BACKOFF_MAX, DB_RETRY_BACKOFF * 2 ** attempt))
+                left = remaining()
+                if attempt + 1 >= attempts or (left is not None and left < delay + MIN_CALL_TIMEOUT):
+                    if timed_out:
+                        raise DeadlineExceeded(f"Database call timed out after {timeout:.2f}s") from e
+                    raise
+                executor.events["retry"] += 1
+                logger.warning(f"⚠️ {workload} database call failed ({type(e).__name__}), retrying in {delay:.2f}s")
+                await asyncio.sleep(delay)
+            except Exception as e:
+                if probe and not isinstance(e, HTTPException):
+                    db_breaker.record_failure()  # no usable answer to a health probe
+                elif trial:
+                    db_breaker.release()  # rejected before an answer: no verdict
+                raise
+            except BaseException:
+                if trial:
+                    db_breaker.release()  # cancelled before an answer: no verdict
+                raise
+            else:
+                db_breaker.record_success()
+                return result
+
+
+def _to_frame(rows: List[Dict]) -> pd.DataFrame:
+    with stage("convert"):
+        return pd.DataFrame(rows)
+
+
+# ============================================================================
+# PAGINATED LOADING (bounded memory, used by the streaming endpoints)
+# ============================================================================
+
+async def iter_table_pages(table_name: str, page_size: int = PAGE_SIZE) -> AsyncIterator[List[Dict]]:
+    """
+    Yield a table page by page, ordered by primary key.
+
+    Only one page is held in memory at a time, so callers that forward
+    each page before asking for the next one stay bounded by page_size.
+    """
+    start = 0
+    while True:
+        end = start + page_size - 1
+        response = await _run(
+            lambda s=start, e=end: supabase_db.client.table(table_name)
+            .select("*")
+            .order("id")
+            .range(s, e)
+            .execute(),
+            "bulk",
+            force=start > 0  # a stream that has started is not cut off half-way
         )
-        df = pd.DataFrame(response.data)
-        logger.info(f"✅ Loaded {len(df)} companies from dataset")
+        rows = response.data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            logger.info(f"✅ Streamed {start + len(rows)} rows from {table_name}")
+            return
+        start += page_size
+
+
+# ============================================================================
+# TABLE CACHE (full tables kept in memory for CACHE_TTL seconds)
+# ============================================================================
+
+def table_version(df: pd.DataFrame) -> Dict:
+    """
+    Content version of a table: a hash of every value (catches updates and
+    deletes) plus max(updated_at) as Last-Modified when the table has it.
+    """
+    digest = hashlib.sha1("|".join(map(str, df.columns)).encode())
+    try:
+        digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    except TypeError:  # unhashable cells (e.g. JSON objects)
+        digest.update(df.to_json(orient="values").encode())
+
+    last_modified = None
+    if "updated_at" in df.columns and not df.empty:
+        newest = pd.to_datetime(df["updated_at"], errors="coerce", utc=True).max()
+        if not pd.isna(newest):
+            last_modified = newest.to_pydatetime()
+
+    return {
+        "hash": digest.hexdigest()[:20],
+        "last_modified": last_modified or datetime.now(timezone.utc),
+    }
+
+
+class TableCache:
+    """
+    In-memory cache of whole tables as DataFrames, keyed by TABLES key.
+
+    Cached frames are shared between requests: treat them as read-only.
+    Each load also records a content version (see table_version). When a
+    reload fails, the last good frame keeps being served, marked stale.
+    """
+
+    def __init__(self, ttl: int = CACHE_TTL):
+        self.ttl = ttl
+        self._frames: Dict[str, pd.DataFrame] = {}
+        self._versions: Dict[str, Dict] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def _is_fresh(self, table_key: str) -> bool:
+        loaded_at = self._loaded_at.get(table_key)
+        return loaded_at is not None and (time.monotonic() - loaded_at) < self.ttl
+
+    async def get(self, table_key: str) -> Optional[pd.DataFrame]:
+        """Return the cached frame, loading it page by page when stale"""
+        if self._is_fresh(table_key):
+            return self._frames[table_key]
+
+        lock = self._locks.setdefault(table_key, asyncio.Lock())
+        async with lock:
+            # Another request may have refreshed it while we waited
+            if self._is_fresh(table_key):
+                return self._frames[table_key]
+            try:
+                rows = []
+                async for page in iter_table_pages(TABLES[table_key]):
+                    rows.extend(page)
+            except (postgrest.APIError, httpx.TransportError, CircuitOpen, DeadlineExceeded) as e:
+                snapshot = self.snapshot(table_key)
+                if snapshot is not None:
+                    logger.warning(f"⚠️ Serving stale {table_key}, reload failed: {str(e)}")
+                    return snapshot
+                logger.error(f"❌ Failed to load {table_key}: {str(e)}")
+                if isinstance(e, postgrest.APIError):
+                    return None
+                raise
+
+            df = _to_frame(rows)
+            self._frames[table_key] = df
+            with stage("convert"):
+                self._versions[table_key] = table_version(df)
+            self._loaded_at[table_key] = time.monotonic()
+            logger.info(f"✅ Cached {len(df)} rows of {table_key}")
+            return df
+
+    def snapshot(self, table_key: str) -> Optional[pd.DataFrame]:
+        """Last loaded frame without reloading; an expired one is marked stale for the response"""
+        df = self._frames.get(table_key)
+        if df is not None and not self._is_fresh(table_key):
+            mark_stale(table_key, time.monotonic() - self._loaded_at[table_key])
         return df
-    except APIError as e:
-        logger.error(f"❌ Failed to load dataset: {str(e)}")
-        return None
+
+    def version(self, table_key: str) -> Optional[Dict]:
+        """Version of the cached table ({hash, last_modified, max_age}), None if not loaded"""
+        version = self._versions.get(table_key)
+        if version is None or table_key not in self._loaded_at:
+            return None
+        remaining = self.ttl - (time.monotonic() - self._loaded_at[table_key])
+        return {**version, "max_age": max(0, int(remaining))}
+
+    def invalidate(self, table_key: Optional[str] = None):
+        """Drop one table (or all of them) so the next get() reloads"""
+        keys = [table_key] if table_key else list(self._loaded_at)
+        for key in keys:
+            self._loaded_at.pop(key, None)
+            self._frames.pop(key, None)
+            self._versions.pop(key, None)
+
+
+table_cache = TableCache()
+
+
+# ============================================================================
+# DATA LOADING FUNCTIONS (Supabase replaces Dropbox streaming)
+# ============================================================================
+
+async def load_dataset() -> Optional[pd.DataFrame]:
+    """Load companies dataset from Supabase (cached)"""
+    df = await table_cache.get("dataset")
+    if df is not None:
+        logger.info(f"✅ Loaded {len(df)} companies from dataset")
+    return df
 
 
 async def load_wacc_map() -> Optional[pd.DataFrame]:
-    """Load WACC parameters by sector"""
-    try:
-        response = await asyncio.to_thread(
-            lambda: supabase_db.client.table(TABLES["wacc"]).select("*").execute()
-        )
-        df = pd.DataFrame(response.data)
+    """Load WACC parameters by sector (cached)"""
+    df = await table_cache.get("wacc")
+    if df is not None:
         logger.info(f"✅ Loaded WACC data for {len(df)} sectors")
-        return df
-    except APIError as e:
-        logger.error(f"❌ Failed to load WACC map: {str(e)}")
-        return None
+    return df
 
 
 async def load_portfolio(portfolio_id: Optional[str] = None) -> Optional[pd.DataFrame]:
     """Load portfolio companies. If portfolio_id provided, load specific portfolio"""
+    if not portfolio_id:
+        return await table_cache.get("portfolio")
     try:
-        query = supabase_db.client.table(TABLES["portfolio"]).select("*")
-        
-        if portfolio_id:
-            query = query.eq("portfolio_id", portfolio_id)
-        
-        response = await asyncio.to_thread(lambda: query.execute())
-        df = pd.DataFrame(response.data)
+        query = supabase_db.client.table(TABLES["portfolio"]).select("*").eq("portfolio_id", portfolio_id)
+        response = await _run(lambda: query.execute())
+        df = _to_frame(response.data)
         logger.info(f"✅ Loaded {len(df)} portfolio companies")
         return df
-    except APIError as e:
+    except postgrest.APIError as e:
         logger.error(f"❌ Failed to load portfolio: {str(e)}")
         return None
 
@@ -113,34 +419,32 @@ async def load_portfolio(portfolio_id: Optional[str] = None) -> Optional[pd.Data
 async def load_financial_statements(company_id: str) -> Optional[pd.DataFrame]:
     """Load financial statements time series for a company"""
     try:
-        response = await asyncio.to_thread(
+        response = await _run(
             lambda: supabase_db.client.table(TABLES["financial_statements"])
             .select("*")
             .eq("company_id", company_id)
             .order("fiscal_year", desc=True)
             .execute()
         )
-        df = pd.DataFrame(response.data)
+        df = _to_frame(response.data)
         logger.info(f"✅ Loaded {len(df)} financial statements for company {company_id}")
         return df
-    except APIError as e:
+    except postgrest.APIError as e:
         logger.error(f"❌ Failed to load financial statements: {str(e)}")
         return None
 
 
 async def load_contacts(company_id: Optional[str] = None) -> Optional[pd.DataFrame]:
     """Load contacts, optionally filtered by company"""
+    if not company_id:
+        return await table_cache.get("contacts")
     try:
-        query = supabase_db.client.table(TABLES["contacts"]).select("*")
-        
-        if company_id:
-            query = query.eq("company_id", company_id)
-        
-        response = await asyncio.to_thread(lambda: query.execute())
-        df = pd.DataFrame(response.data)
+        query = supabase_db.client.table(TABLES["contacts"]).select("*").eq("company_id", company_id)
+        response = await _run(lambda: query.execute())
+        df = _to_frame(response.data)
         logger.info(f"✅ Loaded {len(df)} contacts")
         return df
-    except APIError as e:
+    except postgrest.APIError as e:
         logger.error(f"❌ Failed to load contacts: {str(e)}")
         return None
 
@@ -160,6 +464,11 @@ async def load_all_data() -> Dict[str, Optional[pd.DataFrame]]:
     
     results = await asyncio.gather(*tasks, return_exceptions=True)
     
+    # Shed load / give up as a whole: a partial response would look like missing tables
+    for result in results:
+        if isinstance(result, HTTPException):
+            raise result
+    
     data_dict = {
         'dataset': results[0] if not isinstance(results[0], Exception) else None,
         'wacc': results[1] if not isinstance(results[1], Exception) else None,
@@ -172,22 +481,38 @@ async def load_all_data() -> Dict[str, Optional[pd.DataFrame]]:
 
 # ============================================================================
 # SEARCH & QUERY FUNCTIONS
+# (answered from the cached tables while the circuit is open)
 # ============================================================================
 
+def _snapshot_row(table_key: str, column: str, value: str) -> Optional[Dict]:
+    """First cached row whose column equals value; CircuitOpen again when nothing is cached"""
+    snapshot = table_cache.snapshot(table_key)
+    if snapshot is None:
+        raise CircuitOpen(db_breaker.retry_after())
+    matches = snapshot[snapshot[column].astype(str) == str(value)]
+    return matches.iloc[0].to_dict() if len(matches) else None
+
+
 async def search_companies(query: str, limit: int = 10) -> Optional[pd.DataFrame]:
     """Search companies by name using full-text search"""
     try:
-        response = await asyncio.to_thread(
+        response = await _run(
             lambda: supabase_db.client.table(TABLES["dataset"])
             .select("*")
             .ilike("company", f"%{query}%")  # Case-insensitive substring search
             .limit(limit)
             .execute()
         )
-        df = pd.DataFrame(response.data)
+        df = _to_frame(response.data)
         logger.info(f"✅ Found {len(df)} companies matching '{query}'")
         return df
-    except APIError as e:
+    except CircuitOpen:
+        snapshot = table_cache.snapshot("dataset")
+        if snapshot is None:
+            raise
+        matches = snapshot["company"].astype(str).str.contains(query, case=False, regex=False)
+        return snapshot[matches].head(limit)
+    except postgrest.APIError as e:
         logger.error(f"❌ Search failed: {str(e)}")
         return None
 
@@ -195,16 +520,19 @@ async def search_companies(query: str, limit: int = 10) -> Optional[pd.DataFrame
 async def get_company_by_id(company_id: str) -> Optional[Dict]:
     """Get specific company by ID"""
     try:
-        response = await asyncio.to_thread(
+        response = await _run(
             lambda: supabase_db.client.table(TABLES["dataset"])
             .select("*")
             .eq("id", company_id)
             .single()
-            .execute()
+            .execute(),
+            hedge=True
         )
         logger.info(f"✅ Loaded company {company_id}")
         return response.data
-    except APIError as e:
+    except CircuitOpen:
+        return _snapshot_row("dataset", "id", company_id)
+    except postgrest.APIError as e:
         logger.error(f"❌ Failed to get company: {str(e)}")
         return None
 
@@ -212,16 +540,19 @@ async def get_company_by_id(company_id: str) -> Optional[Dict]:
 async def get_sector_data(category_code: str) -> Optional[Dict]:
     """Get WACC and percentile data for a specific sector"""
     try:
-        response = await asyncio.to_thread(
+        response = await _run(
             lambda: supabase_db.client.table(TABLES["wacc"])
             .select("*")
             .eq("category_code", category_code)
             .single()
-            .execute()
+            .execute(),
+            hedge=True
         )
         logger.info(f"✅ Loaded sector data for category {category_code}")
         return response.data
-    except APIError as e:
+    except CircuitOpen:
+        return _snapshot_row("wacc", "category_code", category_code)
+    except postgrest.APIError as e:
         logger.error(f"❌ Failed to get sector data: {str(e)}")
         return None
 
@@ -233,17 +564,32 @@ async def get_sector_data(category_code: str) -> Optional[Dict]:
 async def save_analysis_result(company_id: str, analysis_type: str, result_data: Dict) -> bool:
     """Save analysis results to a cache table (optional)"""
     try:
-        response = await asyncio.to_thread(
+        response = await _run(
             lambda: supabase_db.client.table("analysis_cache")
             .insert({
                 "company_id": company_id,
                 "analysis_type": analysis_type,
                 "result": result_data,
             })
-            .execute()
+            .execute(),
+            "write"
         )
         logger.info(f"✅ Saved {analysis_type} analysis for company {company_id}")
         return True
-    except APIError as e:
+    except postgrest.APIError as e:
         logger.error(f"❌ Failed to save analysis: {str(e)}")
         return False
+
+
+async def load_analysis_results(company_id: str, analysis_type_prefix: Optional[str] = None) -> Optional[List[Dict]]:
+    """Load cached analysis rows for a key, optionally filtered by analysis_type prefix (oldest first)"""
+    try:
+        query = supabase_db.client.table("analysis_cache").select("*").eq("company_id", company_id)
+        if analysis_type_prefix:
+            query = query.like("analysis_type", f"{analysis_type_prefix}%")
+        response = await _run(lambda: query.order("id").execute())
+        logger.info(f"✅ Loaded {len(response.data)} cached analyses for {company_id}")
+        return response.data
+    except postgrest.APIError as e:
+        logger.error(f"❌ Failed to load cached analyses: {str(e)}")
+        return None
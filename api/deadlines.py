@@ -0,0 +1,74 @@
+# api/deadlines.py
+"""
+Request deadlines
+Every HTTP request gets a time budget (REQUEST_BUDGET, kept under Vercel's
+MAX_REQUEST_DURATION); Supabase calls made while serving it take their
+timeouts from what is left. Clients may ask for a tighter budget with
+X-Request-Timeout: <seconds>. Work outside a request has no deadline.
+"""
+
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from fastapi import HTTPException
+
+from .config import REQUEST_BUDGET
+
+MIN_CALL_TIMEOUT = 0.05  # seconds; less than this left is treated as already expired
+
+# time.monotonic() by which the current request must be answered
+_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(HTTPException):
+    """504 raised when the request budget (or a database call's share of it) runs out"""
+
+    def __init__(self, detail: str = "Request deadline exceeded"):
+        super().__init__(status_code=504, detail=detail)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current request's budget, None outside a request"""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def call_timeout(limit: float) -> float:
+    """Timeout for the next call: limit, shortened to the remaining budget"""
+    left = remaining()
+    if left is None:
+        return limit
+    if left < MIN_CALL_TIMEOUT:
+        raise DeadlineExceeded()
+    return min(limit, left)
+
+
+def _requested_budget(scope) -> float:
+    for name, value in scope.get("headers", []):
+        if name == b"x-request-timeout":
+            try:
+                seconds = float(value)
+            except ValueError:
+                break
+            if seconds > 0:
+                return min(seconds, REQUEST_BUDGET)
+            break
+    return REQUEST_BUDGET
+
+
+class DeadlineMiddleware:
+    """Sets the deadline of each HTTP request (pure ASGI, streams included)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _deadline.set(time.monotonic() + _requested_budget(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
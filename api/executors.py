@@ -0,0 +1,157 @@
+# api/executors.py
+"""
+Bounded executors for blocking Supabase calls, one per workload class
+  bulk  - full-table page loads (table cache refreshes, NDJSON streams)
+  point - searches and single-row / filtered lookups
+  write - inserts
+Each class has its own worker threads and a cap on calls waiting for them;
+beyond the cap a call fails fast with 503 + Retry-After instead of queueing,
+so a burst of bulk loads cannot starve point lookups.
+"""
+
+import asyncio
+import contextvars
+import functools
+import math
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, TypeVar
+
+from fastapi import HTTPException
+
+from .config import DB_EXECUTORS
+
+T = TypeVar("T")
+
+WORKLOADS = ("bulk", "point", "write")
+# Resilience paths counted per class (see database._run)
+CALL_EVENTS = ("timeout", "retry", "hedge", "hedge_win", "deadline_exceeded")
+
+
+class Overloaded(HTTPException):
+    """503 raised when a workload class is at capacity"""
+
+    def __init__(self, workload: str, retry_after: int):
+        super().__init__(
+            status_code=503,
+            detail=f"Too many concurrent {workload} database calls, retry later",
+            headers={"Retry-After": str(retry_after)}
+        )
+        self.workload = workload
+
+
+class BoundedExecutor:
+    """
+    max_workers threads plus at most max_queue calls waiting for one.
+
+    Counters are only touched on the event-loop thread (worker threads hand
+    the end of a call back to it). Work that is already admitted (e.g. the
+    next page of a running stream) can pass force=True to skip the queue
+    cap rather than fail half-way.
+    """
+
+    def __init__(self, name: str, max_workers: int, max_queue: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.in_flight = 0  # running + waiting
+        self.admitted = 0
+        self.rejected = 0
+        self.peak = 0
+        self.events: Counter = Counter()
+        self._avg_seconds = 0.05  # moving average of call duration, for Retry-After
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"db-{name}")
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained (at least 1)"""
+        waiting = max(0, self.in_flight - self.max_workers)
+        return max(1, math.ceil((waiting + 1) * self._avg_seconds / self.max_workers))
+
+    def check(self):
+        """Raise Overloaded if a new call would not be admitted"""
+        if self.in_flight >= self.capacity:
+            self.rejected += 1
+            raise Overloaded(self.name, self.retry_after())
+
+    def _timed(self, context: contextvars.Context, fn: Callable[[], T]) -> T:
+        started = time.perf_counter()
+        try:
+            return context.run(fn)
+        finally:
+            self._avg_seconds += 0.2 * (time.perf_counter() - started - self._avg_seconds)
+
+    def _release(self):
+        self.in_flight -= 1
+
+    def _finished(self, loop: asyncio.AbstractEventLoop, _future):
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:  # event loop already closed
+            pass
+
+    async def run(self, fn: Callable[[], T], force: bool = False) -> T:
+        """
+        Run fn in this class's threads (context variables carried over like asyncio.to_thread).
+        The call counts as in flight until its thread is done with it, even if the
+        caller stops waiting (cancelled hedge, client disconnect) before that.
+        """
+        if not force:
+            self.check()
+        loop = asyncio.get_running_loop()
+        future = self._pool.submit(self._timed, contextvars.copy_context(), fn)
+        self.in_flight += 1
+        self.admitted += 1
+        self.peak = max(self.peak, self.in_flight)
+        future.add_done_callback(functools.partial(self._finished, loop))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.max_workers,
+            "queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "peak": self.peak,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "avg_ms": round(self._avg_seconds * 1000, 2),
+            **{event: self.events[event] for event in CALL_EVENTS},
+        }
+
+
+db_executors: Dict[str, BoundedExecutor] = {
+    name: BoundedExecutor(name, *DB_EXECUTORS[name]) for name in WORKLOADS
+}
+
+
+def render_prometheus() -> str:
+    """Executor gauges and counters for /metrics"""
+    lines = []
+    series = (
+        ("in_flight", "gauge", "Database calls running or waiting"),
+        ("capacity", "gauge", "Worker threads plus queue slots"),
+        ("admitted_total", "counter", "Database calls admitted"),
+        ("rejected_total", "counter", "Database calls rejected with 503"),
+    )
+    for suffix, kind, help_text in series:
+        name = f"incrolink_db_executor_{suffix}"
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+        for workload, executor in db_executors.items():
+            value = {
+                "in_flight": executor.in_flight,
+                "capacity": executor.capacity,
+                "admitted_total": executor.admitted,
+                "rejected_total": executor.rejected,
+            }[suffix]
+            lines.append(f'{name}{{workload="{workload}"}} {value}')
+
+    name = "incrolink_db_call_events_total"
+    lines += [f"# HELP {name} Timeouts, retries and hedged requests of database calls", f"# TYPE {name} counter"]
+    for workload, executor in db_executors.items():
+        for event in CALL_EVENTS:
+            lines.append(f'{name}{{workload="{workload}",event="{event}"}} {executor.events[event]}')
+    return "\n".join(lines) + "\n"
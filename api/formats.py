@@ -0,0 +1,191 @@
+# api/formats.py
+"""
+Output formats for bulk data endpoints
+Row JSON (default), columnar JSON and Arrow IPC, picked by content negotiation
+"""
+
+from __future__ import annotations
+
+import io
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from lib.lazy import lazy_import
+from fastapi import HTTPException
+from fastapi.responses import Response
+
+from .responses import FastJSONResponse
+from .telemetry import stage
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# ============================================================================
+# MEDIA TYPES
+# ============================================================================
+
+JSON_MEDIA_TYPE = "application/json"
+COLUMNAR_MEDIA_TYPE = "application/vnd.incrolink.columnar+json"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+FORMATS = {
+    "json": JSON_MEDIA_TYPE,
+    "columnar": COLUMNAR_MEDIA_TYPE,
+    "arrow": ARROW_MEDIA_TYPE,
+}
+
+# Low-cardinality text columns sent as (codes, dictionary) pairs
+DICTIONARY_COLUMNS = ("category_code", "nace")
+
+
+def negotiate_format(accept: Optional[str], fmt: Optional[str] = None) -> str:
+    """
+    Pick an output format.
+
+    An explicit ?format= wins; otherwise the Accept header is matched by
+    q-value, falling back to row JSON.
+    """
+    if fmt:
+        if fmt not in FORMATS:
+            raise HTTPException(
+                status_code=406,
+                detail=f"Unsupported format: {fmt}. Must be one of: {list(FORMATS.keys())}"
+            )
+        return fmt
+
+    if not accept:
+        return "json"
+
+    by_media_type = {media_type: name for name, media_type in FORMATS.items()}
+    candidates: List[Tuple[float, int, str]] = []
+    for position, part in enumerate(accept.split(",")):
+        media_type, *params = [p.strip() for p in part.split(";")]
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if media_type in by_media_type and q > 0:
+            candidates.append((-q, position, by_media_type[media_type]))
+
+    return min(candidates)[2] if candidates else "json"
+
+
+# ============================================================================
+# COLUMNAR JSON
+# ============================================================================
+
+def _column_values(series: pd.Series):
+    """
+    Column as something FastJSONResponse can encode.
+
+    Numeric columns stay NumPy arrays (encoded natively, NaN -> null);
+    only text/object columns become Python lists.
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        if series.dtype.kind in "biu":
+            return np.ascontiguousarray(series.to_numpy())
+    if pd.api.types.is_float_dtype(series) and series.dtype.kind == "f":
+        return np.ascontiguousarray(series.to_numpy())
+    return series.astype(object).where(series.notna(), None).tolist()
+
+
+def frame_to_columnar(df: pd.DataFrame) -> Dict:
+    """
+    One array per column instead of one dict per row.
+
+    category_code / nace are dictionary-encoded: "data" holds integer
+    codes (-1 for null) and "dictionaries" holds the distinct values.
+    """
+    data = {}
+    dictionaries = {}
+    with stage("serialize"):
+        for column in df.columns:
+            series = df[column]
+            if column in DICTIONARY_COLUMNS:
+                codes, uniques = pd.factorize(series, use_na_sentinel=True)
+                data[column] = codes
+                dictionaries[column] = _column_values(pd.Series(uniques))
+            else:
+                data[column] = _column_values(series)
+
+    return {
+        "columns": [str(c) for c in df.columns],
+        "length": len(df),
+        "data": data,
+        "dictionaries": dictionaries,
+    }
+
+
+# ============================================================================
+# ARROW IPC
+# ============================================================================
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise HTTPException(status_code=406, detail="Arrow output requires pyarrow on the server")
+    return pa
+
+
+def frame_to_arrow_ipc(df: pd.DataFrame) -> bytes:
+    """Serialize a frame as an Arrow IPC stream (dictionary-encoded codes)"""
+    pa = _require_pyarrow()
+
+    with stage("serialize"):
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        for column in DICTIONARY_COLUMNS:
+            if column in table.column_names:
+                index = table.schema.get_field_index(column)
+                table = table.set_column(index, column, table.column(index).dictionary_encode())
+
+        sink = io.BytesIO()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue()
+
+
+def frames_to_arrow_multipart(frames: Dict[str, Optional[pd.DataFrame]], headers: Optional[Dict] = None) -> Response:
+    """Several tables in one response: multipart/mixed, one Arrow stream per part"""
+    boundary = f"incrolink-arrow-{uuid.uuid4().hex}"  # fresh per response, never inside an IPC stream
+    body = io.BytesIO()
+    for name, df in frames.items():
+        if df is None:
+            continue
+        body.write(f"--{boundary}\r\n".encode())
+        body.write(f"Content-Type: {ARROW_MEDIA_TYPE}\r\n".encode())
+        body.write(f'Content-Disposition: attachment; name="{name}"\r\n\r\n'.encode())
+        body.write(frame_to_arrow_ipc(df))
+        body.write(b"\r\n")
+    body.write(f"--{boundary}--\r\n".encode())
+    return Response(content=body.getvalue(), media_type=f"multipart/mixed; boundary={boundary}", headers=headers)
+
+
+# ============================================================================
+# RESPONSE HELPERS
+# ============================================================================
+
+def frame_response(df: pd.DataFrame, fmt: str, headers: Optional[Dict] = None, **extra) -> Response:
+    """Columnar / Arrow response for a single frame (row JSON is left to the route)"""
+    if fmt == "arrow":
+        return Response(content=frame_to_arrow_ipc(df), media_type=ARROW_MEDIA_TYPE, headers=headers)
+    return FastJSONResponse(
+        content={"status": "success", "format": "columnar", **extra, "data": frame_to_columnar(df)},
+        media_type=COLUMNAR_MEDIA_TYPE,
+        headers=headers
+    )
+
+
+def frames_response(frames: Dict[str, Optional[pd.DataFrame]], fmt: str, headers: Optional[Dict] = None) -> Response:
+    """Columnar / Arrow response for several named frames"""
+    if fmt == "arrow":
+        return frames_to_arrow_multipart(frames, headers)
+    data = {name: frame_to_columnar(df) if df is not None else None for name, df in frames.items()}
+    return FastJSONResponse(
+        content={"status": "success", "format": "columnar", "data": data},
+        media_type=COLUMNAR_MEDIA_TYPE,
+        headers=headers
+    )
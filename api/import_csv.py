@@ -4,14 +4,22 @@ CSV import utilities for Supabase
 Use this to populate your tables from CSV files
 """
 
+import numpy as np
 import pandas as pd
 import asyncio
-from typing import Optional, Dict
+import functools
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional, Dict, Iterator, List, Tuple
 import logging
 from pathlib import Path
 
-from .database import supabase_db
+from .database import supabase_db, iter_table_pages
 from .config import TABLES
+from .uploader import BatchUploader
 
 logger = logging.getLogger(__name__)
 
@@ -24,7 +32,7 @@ CSV_CONFIG = {
         "file": "IT.csv",
         "table": TABLES["contacts"],
         "columns": {
-            "bvd_id_number": "bvd_id_number",
+            "contact_id": "bvd_id_number",  # one IT.csv row per BvD id
             "name_native": "name_native",
             "street_no_building_etc_line_1_native_": "street_no_building_etc_line_1_native_",
             "postcode": "postcode",
@@ -42,7 +50,10 @@ CSV_CONFIG = {
             "latitude":"latitude",
             "longitude":"longitude",
             "short_bvf_id_number":"short_bvf_id_number"
-        }
+        },
+        "numeric": ["latitude", "longitude"],
+        "integer": [],
+        "key": ["contact_id"]
     },
     "financial": {
         "file": "IT_fin.csv",
@@ -56,7 +67,10 @@ CSV_CONFIG = {
             "operating_revenue": "operating_revenue",
             "cost_of_employees": "cost_of_employees",
             "ebitda": "ebitda"
-        }
+        },
+        "numeric": ["long_term_debt", "shareholders_funds", "operating_revenue", "cost_of_employees", "ebitda"],
+        "integer": ["company_id", "fiscal_year"],
+        "key": ["company_id", "fiscal_year"]
     },
     "companies": {
         "file": "IT_info.csv",
@@ -77,30 +91,176 @@ CSV_CONFIG = {
             "capital_equity": "capital_equity",
             "cash": "cash",
             "category_code": "category_code"
-        }
+        },
+        "numeric": [
+            "ebit", "revenue", "net_income", "capex", "d_and_a", "changes_in_wc",
+            "lt_debt", "st_debt", "sh_equity", "capital_equity", "cash"
+        ],
+        "integer": ["employees"],
+        "key": ["company"]
     }
 }
+# Columns not listed under "numeric"/"integer" are text (read as strings, so
+# codes such as category_code "01" keep their leading zeros). Rows are
+# upserted on "key" (unique in the table, see sql/02_import_keys.sql), so
+# importing a row again updates it instead of duplicating it.
+
+READ_CHUNK_ROWS = 50_000  # CSV rows parsed per step; bounds import memory
 
 
 # ============================================================================
 # CSV IMPORT FUNCTIONS
 # ============================================================================
 
+def _read_chunks(handle, config: Dict, read_chunk_rows: Optional[int], skip_rows: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Parse only the mapped CSV columns, all as strings, read_chunk_rows at a
+    time (None: whole file), starting after the first skip_rows data rows
+    """
+    csv_columns = list(config["columns"].values())
+    header = {}
+    if skip_rows:
+        names = list(pd.read_csv(handle, nrows=0, index_col=False).columns)
+        handle.seek(0)
+        header = {"header": None, "names": names, "skiprows": skip_rows + 1}
+    reader = pd.read_csv(
+        handle,
+        usecols=csv_columns,
+        index_col=False,
+        dtype={column: str for column in csv_columns},
+        chunksize=read_chunk_rows,
+        **header,
+    )
+    return iter(reader) if read_chunk_rows else iter([reader])
+
+
+def _map_chunk(chunk: pd.DataFrame, config: Dict) -> Tuple[pd.DataFrame, int]:
+    """
+    Map columns and convert numbers
+
+    Returns:
+        (table columns frame, count of non-empty values that were not numbers)
+    """
+    df = chunk.rename(columns={v: k for k, v in config["columns"].items()})
+    df = df[list(config["columns"].keys())]
+    
+    invalid = 0
+    for column in config["numeric"] + config["integer"]:
+        raw = df[column]
+        values = pd.to_numeric(raw, errors="coerce")
+        invalid += int((values.isna() & raw.notna()).sum())
+        if column in config["integer"] and (values.dropna() % 1 == 0).all():
+            values = values.astype("Int64")  # 12.0 -> 12 for INTEGER columns
+        df[column] = values
+    return df, invalid
+
+
+def _to_records(df: pd.DataFrame) -> List[Dict]:
+    """Rows to insert, missing values as None for PostgreSQL"""
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def _keyed_rows(df: pd.DataFrame, rows: np.ndarray, key: List[str], uploader: BatchUploader) -> Tuple[pd.DataFrame, np.ndarray]:
+    """Report rows without their natural key (a replay could not update them); return the others"""
+    keyless = df[key].isna().any(axis=1).to_numpy()
+    if keyless.any():
+        uploader.reject(_to_records(df[keyless]), rows[keyless].tolist(), f"missing natural key: {', '.join(key)}")
+    return df[~keyless], rows[~keyless]
+
+
+def _append_failed_rows(path: str, failed_rows: List[Dict]):
+    """One JSON line per row that could not be inserted: row number, error, mapped record"""
+    with open(path, "a") as f:
+        for failure in failed_rows:
+            f.write(json.dumps(failure, default=str) + "\n")
+
+
+# ============================================================================
+# CHECKPOINTS (resume interrupted imports)
+# ============================================================================
+
+def file_sha256(path: str) -> str:
+    """Content hash of a file, read 4 MB at a time"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(4 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_checkpoint(path: str) -> Optional[Dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def _save_checkpoint(path: str, checkpoint: Dict):
+    """Write via a temporary file, so a crash never leaves half a checkpoint"""
+    checkpoint["updated_at"] = datetime.now(timezone.utc).isoformat()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+async def _resume_point(checkpoint_path: str, file_path: str, table_name: str, restart: bool) -> Dict:
+    """Checkpoint to continue from: the saved one if it is for this table and file content, else a fresh one"""
+    logger.info(f"🔎 Hashing {file_path}")
+    content_hash = await asyncio.to_thread(file_sha256, file_path)
+    saved = None if restart else _load_checkpoint(checkpoint_path)
+    if saved and saved.get("sha256") == content_hash and saved.get("table") == table_name:
+        return saved
+    if saved:
+        logger.warning(f"⚠️ {file_path} changed since checkpoint {checkpoint_path}, starting over")
+    return {
+        "file": str(Path(file_path).resolve()),
+        "table": table_name,
+        "sha256": content_hash,
+        "rows_done": 0,
+        "chunks_read": 0,
+        "rows_inserted": 0,
+        "rows_failed": 0,
+        "completed": False,
+    }
+
+
 async def import_csv_to_table(
     csv_type: str,
     csv_file_path: Optional[str] = None,
-    chunk_size: int = 100
+    chunk_size: int = 500,
+    read_chunk_rows: Optional[int] = READ_CHUNK_ROWS,
+    failed_rows_path: Optional[str] = None,
+    checkpoint_path: Optional[str] = None,
+    restart: bool = False
 ) -> Dict:
     """
     Import CSV file to Supabase table
     
+    The file is streamed: read_chunk_rows rows are parsed, mapped and cleaned,
+    then handed to a BatchUploader (api/uploader.py) that upserts them on the
+    table's natural key with several batches in flight; reading waits while
+    every upload slot is busy, so memory stays bounded however large the
+    file is (read_chunk_rows=None reads it in one go).
+    
+    With checkpoint_path, progress (rows done, keyed to the file's sha256) is
+    saved after every read chunk and a rerun continues from there; a changed
+    file, or restart=True, starts over. A finished import is skipped.
+    
     Args:
         csv_type: 'contacts', 'financial', or 'companies'
         csv_file_path: Path to CSV file (optional, uses default from CSV_CONFIG)
-        chunk_size: Number of rows to insert at once
+        chunk_size: Rows in the first insert batch (later batches adapt)
+        read_chunk_rows: Number of CSV rows to parse at once
+        failed_rows_path: Where to write the rows that failed (NDJSON), if any
+        checkpoint_path: Where to keep the resume checkpoint (JSON)
+        restart: Ignore an existing checkpoint
     
     Returns:
-        Dict with import stats (rows_imported, errors, etc.)
+        Dict with import stats (rows_inserted, failed_rows, etc.)
+        failed_rows lists every row that was not inserted by its 1-based
+        position in the CSV (header excluded) and the database error.
     """
     
     if csv_type not in CSV_CONFIG:
@@ -109,65 +269,395 @@ async def import_csv_to_table(
     config = CSV_CONFIG[csv_type]
     file_path = csv_file_path or config["file"]
     table_name = config["table"]
+    key = config["key"]
     
-    # Read CSV
     try:
-        logger.info(f"📖 Reading CSV: {file_path}")
-        df = pd.read_csv(file_path)
-        logger.info(f"✅ Loaded {len(df)} rows from {file_path}")
+        handle = open(file_path, "rb")
     except FileNotFoundError:
         logger.error(f"❌ File not found: {file_path}")
         return {"status": "error", "message": f"File not found: {file_path}"}
-    except Exception as e:
-        logger.error(f"❌ Error reading CSV: {str(e)}")
-        return {"status": "error", "message": str(e)}
     
-    # Map columns
+    checkpoint = None
+    if checkpoint_path:
+        checkpoint = await _resume_point(checkpoint_path, file_path, table_name, restart)
+        if checkpoint["completed"]:
+            handle.close()
+            logger.info(f"✅ {file_path} already imported into {table_name} (checkpoint {checkpoint_path})")
+            return {"status": "skipped", "table": table_name, "message": f"Already imported (checkpoint {checkpoint_path})"}
+    skip_rows = checkpoint["rows_done"] if checkpoint else 0
+    base_inserted = checkpoint["rows_inserted"] if checkpoint else 0
+    base_failed = checkpoint["rows_failed"] if checkpoint else 0
+    if failed_rows_path and not skip_rows:
+        open(failed_rows_path, "w").close()  # fresh import: fresh report
+    
+    file_size = os.fstat(handle.fileno()).st_size
+    total_rows = 0
+    invalid_values = 0
+    failures_seen = 0
+    unreported: List[Dict] = []  # failed rows past the checkpoint, reported once it passes them
+    reported = 0
+    read_error = None
+    uploader = BatchUploader(table_name, on_conflict=",".join(key), initial_rows=chunk_size)
+    started = time.perf_counter()
+    
+    def save_progress(completed: bool = False):
+        """Report failed rows and move the checkpoint up to the last row with nothing in flight before it"""
+        nonlocal failures_seen, unreported, reported
+        unreported += uploader.failed_rows[failures_seen:]
+        failures_seen = len(uploader.failed_rows)
+        rows_done = skip_rows + total_rows if completed else max(skip_rows, uploader.done_through())
+        ready = [f for f in unreported if f["row"] <= rows_done]
+        unreported = [f for f in unreported if f["row"] > rows_done]
+        if failed_rows_path and ready:
+            _append_failed_rows(failed_rows_path, ready)
+        reported += len(ready)
+        if checkpoint is not None:
+            checkpoint.update(
+                rows_done=rows_done,
+                rows_inserted=base_inserted + uploader.rows_inserted,
+                rows_failed=base_failed + reported,
+                completed=completed,
+            )
+            _save_checkpoint(checkpoint_path, checkpoint)
+    
+    if skip_rows:
+        logger.info(f"⏩ Resuming {file_path} after row {skip_rows:,}")
+    logger.info(f"📖 Streaming CSV: {file_path} ({file_size / 1e6:,.1f} MB) into {table_name}")
+    with handle:
+        try:
+            chunks = _read_chunks(handle, config, read_chunk_rows, skip_rows)
+            for chunk in chunks:
+                df, invalid = _map_chunk(chunk, config)
+                invalid_values += invalid
+                first_row = skip_rows + total_rows + 1
+                df, rows = _keyed_rows(df, np.arange(first_row, first_row + len(df)), key, uploader)
+                await uploader.add(_to_records(df), rows.tolist())
+                if uploader.aborted:
+                    break
+                
+                total_rows += len(chunk)
+                if checkpoint is not None:
+                    checkpoint["chunks_read"] += 1
+                save_progress()
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"⏳ {table_name}: {skip_rows + total_rows:,} rows read ({handle.tell() / max(file_size, 1):.0%} of file), "
+                    f"{uploader.rows_inserted:,} inserted ({uploader.rows_inserted / elapsed:,.0f} rows/s), "
+                    f"{len(uploader.failed_rows):,} failed, batch size {uploader.batch_rows}"
+                )
+        except ValueError as e:
+            if "usecols" in str(e).lower():
+                logger.error(f"❌ Column mapping error: {str(e)}")
+                read_error = f"Column not found: {str(e)}"
+            else:
+                logger.error(f"❌ Error reading CSV: {str(e)}")
+                read_error = str(e)
+        except Exception as e:
+            logger.error(f"❌ Error reading CSV: {str(e)}")
+            read_error = str(e)
+    
+    upload = await uploader.finish()  # rows already handed over still go in
+    if uploader.aborted and read_error is None:
+        read_error = f"Upload stopped: {uploader.aborted}"
+    save_progress(completed=read_error is None)
+    failed_rows = uploader.failed_rows
+    if failed_rows and failed_rows_path:
+        logger.warning(f"⚠️ {len(failed_rows)} failed rows written to {failed_rows_path}")
+    if invalid_values:
+        logger.warning(f"⚠️ {invalid_values} non-numeric values in numeric columns were imported as NULL")
+    
+    elapsed = time.perf_counter() - started
+    if read_error or (failed_rows and not upload["rows_inserted"]):
+        status = "error"
+    else:
+        status = "success" if not failed_rows else "partial"
+    result = {
+        "status": status,
+        "table": table_name,
+        "total_rows": skip_rows + total_rows,
+        "resumed_after_row": skip_rows,
+        **upload,
+        "invalid_values": invalid_values,
+        "seconds": round(elapsed, 2),
+        "rows_per_sec": round(upload["rows_inserted"] / elapsed) if elapsed else None,
+        "failed_rows": [{"row": f["row"], "error": f["error"]} for f in failed_rows] or None,
+    }
+    if read_error:
+        result["message"] = read_error
+    
+    logger.info(
+        f"✅ Import complete: {table_name} {upload['rows_inserted']:,}/{total_rows:,} rows inserted, "
+        f"{upload['rows_failed']:,} failed, {result['rows_per_sec']} rows/s"
+    )
+    return result
+
+
+# ============================================================================
+# INCREMENTAL IMPORTS (row hash manifests)
+# ============================================================================
+# A manifest is a CSV next to the source file with one line per imported row:
+# its natural key, a 64-bit hash of the key and a 64-bit hash of the whole
+# mapped row. Comparing a new extract against it finds inserts, updates and
+# rows that disappeared without touching the database; row_hash 0 marks rows
+# whose last write failed, so the next run sends them again.
+
+MANIFEST_HASH_COLUMNS = ["key_hash", "row_hash"]
+DELETE_BATCH_KEYS = 200  # keys per DELETE ... IN (...) request
+
+
+def _row_hashes(df: pd.DataFrame, config: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """(key hashes, row hashes) of mapped rows, equal for equal values whether read from CSV or the table"""
+    numbers = config["numeric"] + config["integer"]
+    canonical = pd.DataFrame({
+        column: pd.to_numeric(df[column], errors="coerce").astype("float64") if column in numbers
+        else df[column].astype(object)
+        for column in config["columns"]
+    })
+    key_hashes = pd.util.hash_pandas_object(canonical[config["key"]], index=False).to_numpy()
+    row_hashes = pd.util.hash_pandas_object(canonical, index=False).to_numpy()
+    return key_hashes, row_hashes
+
+
+def _manifest_frame(df: pd.DataFrame, config: Dict, key_hashes: np.ndarray, row_hashes: np.ndarray) -> pd.DataFrame:
+    frame = df[config["key"]].reset_index(drop=True)
+    frame["key_hash"] = key_hashes
+    frame["row_hash"] = row_hashes
+    return frame
+
+
+def _read_manifest(path: str, config: Dict, with_keys: bool = False) -> Iterator[pd.DataFrame]:
+    columns = (config["key"] if with_keys else []) + MANIFEST_HASH_COLUMNS
+    dtype = {**{c: str for c in config["key"]}, "key_hash": "uint64", "row_hash": "uint64"}
+    return pd.read_csv(path, usecols=columns, dtype=dtype, chunksize=READ_CHUNK_ROWS)
+
+
+def _load_manifest(path: str, config: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """(key hashes sorted, their row hashes); the last entry wins for repeated keys"""
+    chunks = list(_read_manifest(path, config))
+    if not chunks:
+        return np.empty(0, dtype="uint64"), np.empty(0, dtype="uint64")
+    hashes = pd.concat(chunks, ignore_index=True)
+    hashes = hashes[~hashes["key_hash"].duplicated(keep="last")].sort_values("key_hash")
+    return hashes["key_hash"].to_numpy(), hashes["row_hash"].to_numpy()
+
+
+async def _manifest_from_table(path: str, table_name: str, config: Dict) -> int:
+    """Write a manifest of what the table holds now (first incremental run without one)"""
+    columns = list(config["columns"])
+    rows = 0
+    with open(path, "w", newline="") as f:
+        async for page in iter_table_pages(table_name):
+            df = pd.DataFrame(page).reindex(columns=columns)
+            for column in config["integer"]:
+                df[column] = pd.to_numeric(df[column], errors="coerce").astype("Int64")
+            df = df[df[config["key"]].notna().all(axis=1)]
+            key_hashes, row_hashes = _row_hashes(df, config)
+            _manifest_frame(df, config, key_hashes, row_hashes).to_csv(f, header=rows == 0, index=False)
+            rows += len(df)
+    if not rows:
+        pd.DataFrame(columns=config["key"] + MANIFEST_HASH_COLUMNS).to_csv(path, index=False)
+    return rows
+
+
+def _delete_rows(table_name: str, filters: Dict, column: str, values: List[str]):
+    query = supabase_db.client.table(table_name).delete()
+    for name, value in filters.items():
+        query = query.eq(name, value)
+    return query.in_(column, values).execute()
+
+
+async def _delete_keys(table_name: str, key: List[str], keys: pd.DataFrame) -> Tuple[int, pd.DataFrame]:
+    """
+    Delete rows by natural key, DELETE_BATCH_KEYS at a time (composite keys:
+    grouped by the leading columns, IN on the last one)
+
+    Returns:
+        (rows deleted, keys that could not be deleted)
+    """
+    deleted = 0
+    failed = []
+    *leading, last = key
+    groups = keys.groupby(leading, sort=False) if leading else [((), keys)]
+    for group_values, group in groups:
+        group_values = group_values if isinstance(group_values, tuple) else (group_values,)
+        filters = dict(zip(leading, group_values))
+        for start in range(0, len(group), DELETE_BATCH_KEYS):
+            batch = group.iloc[start:start + DELETE_BATCH_KEYS]
+            call = functools.partial(_delete_rows, table_name, filters, last, batch[last].tolist())
+            try:
+                await asyncio.to_thread(call)
+                deleted += len(batch)
+            except Exception as e:
+                logger.error(f"❌ {table_name}: deleting {len(batch)} rows failed: {str(e)}")
+                failed.append(batch)
+    return deleted, pd.concat(failed) if failed else keys.iloc[:0]
+
+
+async def import_csv_incremental(
+    csv_type: str,
+    csv_file_path: Optional[str] = None,
+    manifest_path: Optional[str] = None,
+    from_table: bool = False,
+    delete_missing: bool = False,
+    chunk_size: int = 500,
+    read_chunk_rows: Optional[int] = READ_CHUNK_ROWS,
+    failed_rows_path: Optional[str] = None
+) -> Dict:
+    """
+    Import only what changed since the last import of this CSV
+    
+    Every mapped row is hashed and compared, by natural key, with the
+    manifest (<file>.manifest.csv by default) written by the previous run:
+    new keys are inserted, changed rows updated (both upserts), unchanged
+    rows skipped. Keys that are no longer in the file are deleted when
+    delete_missing is set, otherwise kept. Without a manifest, from_table
+    builds one from the table's current rows; else every row is sent once.
+    The new manifest replaces the old one when the run ends, so a rerun
+    after a crash only sends the changed rows again.
+    
+    Returns:
+        Dict with import stats, including "churn": per-row counts of
+        inserted / updated / unchanged / deleted / missing (kept) rows
+    """
+    
+    if csv_type not in CSV_CONFIG:
+        raise ValueError(f"Invalid csv_type: {csv_type}. Must be one of: {list(CSV_CONFIG.keys())}")
+    
+    config = CSV_CONFIG[csv_type]
+    file_path = csv_file_path or config["file"]
+    table_name = config["table"]
+    key = config["key"]
+    manifest_path = manifest_path or f"{file_path}.manifest.csv"
+    new_manifest_path = f"{manifest_path}.new"
+    
     try:
-        df_mapped = df.rename(columns={v: k for k, v in config["columns"].items()})
-        # Keep only mapped columns
-        df_mapped = df_mapped[list(config["columns"].keys())]
-        logger.info(f"✅ Mapped columns for {table_name}")
-    except KeyError as e:
-        logger.error(f"❌ Column mapping error: {str(e)}")
-        return {"status": "error", "message": f"Column not found: {str(e)}"}
-    
-    # Clean data
-    df_mapped = df_mapped.fillna(None)  # Convert NaN to None for PostgreSQL
-    
-    # Insert in chunks
-    total_rows = len(df_mapped)
-    rows_inserted = 0
-    errors = []
-    
-    for i in range(0, total_rows, chunk_size):
-        chunk = df_mapped.iloc[i:i+chunk_size]
-        chunk_dict = chunk.to_dict(orient='records')
-        
+        handle = open(file_path, "rb")
+    except FileNotFoundError:
+        logger.error(f"❌ File not found: {file_path}")
+        return {"status": "error", "message": f"File not found: {file_path}"}
+    
+    started = time.perf_counter()
+    if not os.path.exists(manifest_path) and from_table:
+        logger.info(f"🔎 Building manifest of {table_name} from its current rows")
+        await _manifest_from_table(manifest_path, table_name, config)
+    if os.path.exists(manifest_path):
+        old_keys, old_hashes = _load_manifest(manifest_path, config)
+        logger.info(f"📋 Manifest {manifest_path}: {len(old_keys):,} rows")
+    else:
+        old_keys, old_hashes = np.empty(0, dtype="uint64"), np.empty(0, dtype="uint64")
+        logger.warning(f"⚠️ No manifest at {manifest_path}: every row counts as new (use --from-table to diff against {table_name})")
+    if failed_rows_path:
+        open(failed_rows_path, "w").close()
+    
+    churn = {"inserted": 0, "updated": 0, "unchanged": 0, "deleted": 0, "missing": 0}
+    total_rows = 0
+    invalid_values = 0
+    read_error = None
+    seen = []
+    uploader = BatchUploader(table_name, on_conflict=",".join(key), initial_rows=chunk_size)
+    
+    logger.info(f"📖 Diffing CSV: {file_path} against {table_name}")
+    with handle, open(new_manifest_path, "w", newline="") as manifest:
         try:
-            logger.info(f"⏳ Inserting chunk {i//chunk_size + 1}/{(total_rows + chunk_size - 1)//chunk_size}...")
-            
-            response = await asyncio.to_thread(
-                lambda: supabase_db.client.table(table_name).insert(chunk_dict).execute()
-            )
-            
-            rows_inserted += len(chunk_dict)
-            logger.info(f"✅ Inserted {len(chunk_dict)} rows")
-            
+            for chunk in _read_chunks(handle, config, read_chunk_rows):
+                df, invalid = _map_chunk(chunk, config)
+                invalid_values += invalid
+                df, rows = _keyed_rows(df, np.arange(total_rows + 1, total_rows + 1 + len(df)), key, uploader)
+                total_rows += len(chunk)
+                
+                key_hashes, row_hashes = _row_hashes(df, config)
+                position = np.minimum(np.searchsorted(old_keys, key_hashes), max(len(old_keys) - 1, 0))
+                known = old_keys[position] == key_hashes if len(old_keys) else np.zeros(len(df), dtype=bool)
+                changed = known & (old_hashes[position] != row_hashes) if len(old_keys) else known
+                churn["inserted"] += int((~known).sum())
+                churn["updated"] += int(changed.sum())
+                churn["unchanged"] += int((known & ~changed).sum())
+                
+                send = ~known | changed
+                await uploader.add(_to_records(df[send]), rows[send].tolist())
+                if uploader.aborted:
+                    break
+                _manifest_frame(df, config, key_hashes, row_hashes).to_csv(manifest, header=not seen, index=False)
+                seen.append(key_hashes)
+                
+                elapsed = time.perf_counter() - started
+                logger.info(
+                    f"⏳ {table_name}: {total_rows:,} rows read ({handle.tell() / max(os.fstat(handle.fileno()).st_size, 1):.0%} of file), "
+                    f"{churn['inserted']:,} new, {churn['updated']:,} changed, {churn['unchanged']:,} unchanged, "
+                    f"{uploader.rows_inserted:,} written ({total_rows / elapsed:,.0f} rows/s)"
+                )
+        except ValueError as e:
+            if "usecols" in str(e).lower():
+                logger.error(f"❌ Column mapping error: {str(e)}")
+                read_error = f"Column not found: {str(e)}"
+            else:
+                logger.error(f"❌ Error reading CSV: {str(e)}")
+                read_error = str(e)
         except Exception as e:
-            error_msg = f"Chunk {i//chunk_size + 1}: {str(e)}"
-            errors.append(error_msg)
-            logger.error(f"❌ {error_msg}")
+            logger.error(f"❌ Error reading CSV: {str(e)}")
+            read_error = str(e)
+        
+        upload = await uploader.finish()
+        if uploader.aborted and read_error is None:
+            read_error = f"Upload stopped: {uploader.aborted}"
+        if not seen:
+            pd.DataFrame(columns=key + MANIFEST_HASH_COLUMNS).to_csv(manifest, index=False)
+        
+        # Keys that were imported before but are not in this file
+        if not read_error and os.path.exists(manifest_path):
+            seen_keys = np.unique(np.concatenate(seen)) if seen else np.empty(0, dtype="uint64")
+            for old in _read_manifest(manifest_path, config, with_keys=True):
+                gone = old[~np.isin(old["key_hash"].to_numpy(), seen_keys)].drop_duplicates("key_hash", keep="last")
+                if gone.empty:
+                    continue
+                if delete_missing:
+                    deleted, gone = await _delete_keys(table_name, key, gone)
+                    churn["deleted"] += deleted
+                churn["missing"] += len(gone)
+                gone.to_csv(manifest, header=False, index=False, columns=key + MANIFEST_HASH_COLUMNS)
     
+    failed_rows = uploader.failed_rows
+    if read_error:
+        os.remove(new_manifest_path)  # keep the old manifest: this run did not see the whole file
+    else:
+        if failed_rows:
+            # Failed writes: the table still has the old row (or none), so make the next run resend them
+            failed_keys, _ = _row_hashes(pd.DataFrame([f["record"] for f in failed_rows]), config)
+            with open(f"{new_manifest_path}.tmp", "w", newline="") as out:
+                for i, part in enumerate(_read_manifest(new_manifest_path, config, with_keys=True)):
+                    part.loc[part["key_hash"].isin(failed_keys), "row_hash"] = 0
+                    part.to_csv(out, header=i == 0, index=False)
+            os.replace(f"{new_manifest_path}.tmp", new_manifest_path)
+        os.replace(new_manifest_path, manifest_path)
+    if failed_rows and failed_rows_path:
+        _append_failed_rows(failed_rows_path, failed_rows)
+        logger.warning(f"⚠️ {len(failed_rows)} failed rows written to {failed_rows_path}")
+    
+    elapsed = time.perf_counter() - started
+    changed_rows = churn["inserted"] + churn["updated"] + churn["deleted"]
+    churn["churn_pct"] = round(100 * changed_rows / max(total_rows + churn["deleted"], 1), 2)
+    if read_error or (failed_rows and not upload["rows_inserted"]):
+        status = "error"
+    else:
+        status = "success" if not failed_rows else "partial"
     result = {
-        "status": "success" if not errors else "partial",
+        "status": status,
         "table": table_name,
-        "rows_inserted": rows_inserted,
         "total_rows": total_rows,
-        "errors": errors if errors else None
+        "churn": churn,
+        **upload,
+        "invalid_values": invalid_values,
+        "seconds": round(elapsed, 2),
+        "failed_rows": [{"row": f["row"], "error": f["error"]} for f in failed_rows] or None,
     }
+    if read_error:
+        result["message"] = read_error
     
-    logger.info(f"✅ Import complete: {result}")
+    logger.info(
+        f"✅ Incremental import complete: {table_name} {churn['inserted']:,} inserted, {churn['updated']:,} updated, "
+        f"{churn['deleted']:,} deleted, {churn['unchanged']:,} unchanged ({churn['churn_pct']}% churn), "
+        f"{upload['rows_failed']:,} failed"
+    )
     return result
 
 
@@ -175,12 +665,49 @@ async def import_csv_to_table(
 # BATCH IMPORT ALL CSVs
 # ============================================================================
 
-async def import_all_csvs(csv_directory: str = ".") -> Dict:
+async def _import_file(
+    csv_type: str,
+    file_path: str,
+    restart: bool = False,
+    incremental: bool = False,
+    from_table: bool = False,
+    delete_missing: bool = False
+) -> Dict:
+    """Full (checkpointed) or incremental import, with reports next to the CSV"""
+    if incremental:
+        return await import_csv_incremental(
+            csv_type, file_path,
+            from_table=from_table,
+            delete_missing=delete_missing,
+            failed_rows_path=f"{file_path}.failed.ndjson"
+        )
+    return await import_csv_to_table(
+        csv_type, file_path,
+        failed_rows_path=f"{file_path}.failed.ndjson",
+        checkpoint_path=f"{file_path}.checkpoint.json",
+        restart=restart
+    )
+
+
+async def import_all_csvs(
+    csv_directory: str = ".",
+    restart: bool = False,
+    incremental: bool = False,
+    from_table: bool = False,
+    delete_missing: bool = False
+) -> Dict:
     """
     Import all CSV files at once
+    Each file keeps a <file>.checkpoint.json next to it, so rerunning after
+    a failure picks up where the previous run stopped; incremental imports
+    keep a <file>.manifest.csv instead and only send what changed
     
     Args:
         csv_directory: Directory containing CSV files
+        restart: Ignore checkpoints and import every file from the start
+        incremental: Diff against the manifest (see import_csv_incremental)
+        from_table: Incremental, no manifest yet: diff against the table
+        delete_missing: Incremental: delete rows no longer in the file
     
     Returns:
         Dict with results for each import
@@ -200,7 +727,7 @@ async def import_all_csvs(csv_directory: str = ".") -> Dict:
         logger.info(f"📥 Importing {csv_type} from {file_path}")
         logger.info(f"{'='*60}")
         
-        result = await import_csv_to_table(csv_type, str(file_path))
+        result = await _import_file(csv_type, str(file_path), restart, incremental, from_table, delete_missing)
         results[csv_type] = result
     
     return results
@@ -263,36 +790,54 @@ async def clear_table(table_name: str) -> bool:
 # CLI INTERFACE
 # ============================================================================
 
+def _summary(result: Dict) -> Dict:
+    """Import result without the per-row failure list (that goes to the .failed.ndjson file)"""
+    return {k: v for k, v in result.items() if k != "failed_rows"}
+
+
 async def main():
     """Run import from command line"""
     import sys
     
-    if len(sys.argv) > 1:
-        if sys.argv[1] == "all":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")  # progress lines
+    flags = {
+        "restart": "--restart" in sys.argv,
+        "incremental": "--incremental" in sys.argv,
+        "from_table": "--from-table" in sys.argv,
+        "delete_missing": "--delete-missing" in sys.argv,
+    }
+    args = [arg for arg in sys.argv if not arg.startswith("--")]
+    
+    if len(args) > 1:
+        if args[1] == "all":
             print("\n📥 Importing all CSV files...")
-            results = await import_all_csvs()
+            results = await import_all_csvs(**flags)
             print("\n📊 Import Results:")
             for csv_type, result in results.items():
-                print(f"  {csv_type}: {result}")
-        elif sys.argv[1] == "verify":
+                print(f"  {csv_type}: {_summary(result)}")
+        elif args[1] == "verify":
             print("\n✅ Verifying imports...")
             verification = await verify_imports()
             print("\n📊 Verification Results:")
             for table, result in verification.items():
                 print(f"  {table}: {result}")
-        elif sys.argv[1] == "clear":
-            if len(sys.argv) > 2:
-                table = sys.argv[2]
+        elif args[1] == "clear":
+            if len(args) > 2:
+                table = args[2]
                 await clear_table(table)
             else:
                 print("Usage: python -m api.import_csv clear <table_name>")
         else:
-            csv_type = sys.argv[1]
+            csv_type = args[1]
             print(f"\n📥 Importing {csv_type}...")
-            result = await import_csv_to_table(csv_type)
-            print(f"Result: {result}")
+            file_name = CSV_CONFIG.get(csv_type, {}).get("file", csv_type)
+            result = await _import_file(csv_type, file_name, **flags)
+            print(f"Result: {_summary(result)}")
     else:
-        print("Usage: python -m api.import_csv [all|verify|contacts|financial|companies|clear <table>]")
+        print(
+            "Usage: python -m api.import_csv [all|verify|contacts|financial|companies|clear <table>]\n"
+            "         [--restart] | [--incremental [--from-table] [--delete-missing]]"
+        )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,462 @@
+# api/jobs.py
+"""
+Asynchronous batch jobs for portfolios that don't fit in one request
+Jobs run in chunks sized to MAX_REQUEST_DURATION; state, input and partial
+results are persisted in analysis_cache so any instance can resume them.
+Outages (shed load, open circuit, deadline, missing WACC map) leave a job
+pending to be retried; only errors a retry cannot fix mark it failed.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import logging
+import time
+import uuid
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+from lib.lazy import lazy_import
+
+from .config import (
+    MAX_REQUEST_DURATION, JOB_CHUNK_SIZE, JOB_RETRY_DELAY, JOB_RETRY_MAX_DELAY, JOB_REFRESH_INTERVAL
+)
+from .circuit import CircuitOpen
+from .database import load_wacc_map, save_analysis_result, load_analysis_results, database_unavailable
+from .deadlines import DeadlineExceeded
+from .executors import Overloaded
+from .responses import dumps
+from lib.batch import analyze_chunk
+
+pd = lazy_import("pandas")
+postgrest = lazy_import("postgrest")
+httpx = lazy_import("httpx")
+
+logger = logging.getLogger(__name__)
+
+# analysis_cache rows use company_id = job id and these analysis_type values
+STATE_TYPE = "job:state"
+INPUT_TYPE = "job:input:"
+CHUNK_TYPE = "job:chunk:"
+
+BUDGET_MARGIN = 5  # seconds kept free for loading, persisting and responding
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+def _json_safe(obj):
+    """Round-trip through the API encoder so NaN/NumPy values become plain JSON"""
+    return json.loads(dumps(obj))
+
+
+def is_transient(error: Exception) -> bool:
+    """Whether a later attempt can succeed: load was shed, the circuit is open, time ran out or the database is unavailable"""
+    if isinstance(error, (Overloaded, CircuitOpen, DeadlineExceeded, httpx.TransportError)):
+        return True
+    if isinstance(error, postgrest.APIError):
+        return database_unavailable(error)
+    return False
+
+
+def retry_delay(retries: int) -> float:
+    """Backoff before the next attempt at a job stalled `retries` times in a row"""
+    return min(JOB_RETRY_DELAY * 2 ** max(retries - 1, 0), JOB_RETRY_MAX_DELAY)
+
+
+# ============================================================================
+# JOB STATE
+# ============================================================================
+
+class BatchJob:
+    """
+    Progress of one batch job (what gets polled and persisted).
+    While the job is not finished, error is the outage it is waiting out
+    and retries counts the attempts stalled by it in a row.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        total: int,
+        chunk_size: int,
+        status: str = "queued",
+        completed_chunks: Optional[List[int]] = None,
+        error_count: int = 0,
+        created_at: Optional[float] = None,
+        error: Optional[str] = None,
+        retries: int = 0
+    ):
+        self.job_id = job_id
+        self.total = total
+        self.chunk_size = chunk_size
+        self.status = status
+        self.completed_chunks = set(completed_chunks or [])
+        self.error_count = error_count
+        self.created_at = created_at or time.time()
+        self.updated_at = self.created_at
+        self.error = error
+        self.retries = retries
+
+    @property
+    def n_chunks(self) -> int:
+        return max(1, -(-self.total // self.chunk_size))
+
+    @property
+    def pending_chunks(self) -> List[int]:
+        return [i for i in range(self.n_chunks) if i not in self.completed_chunks]
+
+    @property
+    def processed(self) -> int:
+        return sum(min(self.chunk_size, self.total - i * self.chunk_size) for i in self.completed_chunks)
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "progress": round(self.processed / self.total, 4) if self.total else 1.0,
+            "chunk_size": self.chunk_size,
+            "completed_chunks": sorted(self.completed_chunks),
+            "n_chunks": self.n_chunks,
+            "error_count": self.error_count,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "error": self.error,
+            "retries": self.retries,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "BatchJob":
+        job = cls(
+            job_id=data["job_id"],
+            total=data["total"],
+            chunk_size=data["chunk_size"],
+            status=data.get("status", "queued"),
+            completed_chunks=data.get("completed_chunks"),
+            error_count=data.get("error_count", 0),
+            created_at=data.get("created_at"),
+            error=data.get("error"),
+            retries=data.get("retries", 0),
+        )
+        job.updated_at = data.get("updated_at", job.created_at)
+        return job
+
+
+# ============================================================================
+# JOB MANAGER (chunked, resumable processing)
+# ============================================================================
+
+class JobManager:
+    """Submit, advance and read batch jobs; memory first, analysis_cache as the durable copy"""
+
+    def __init__(self, chunk_size: int = JOB_CHUNK_SIZE, budget: float = MAX_REQUEST_DURATION - BUDGET_MARGIN):
+        self.chunk_size = chunk_size
+        self.budget = budget
+        self._jobs: Dict[str, BatchJob] = {}
+        self._inputs: Dict[str, Dict[int, List[Dict]]] = {}
+        self._chunks: Dict[str, Dict[int, Dict]] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._chunk_seconds: Dict[str, float] = {}
+        self._refreshed: Dict[str, float] = {}
+
+    async def _persist(self, job_id: str, analysis_type: str, payload: Dict):
+        try:
+            saved = await save_analysis_result(job_id, analysis_type, payload)
+        except Exception as e:
+            saved = False
+            logger.error(f"❌ Failed to persist {analysis_type} for job {job_id}: {str(e)}")
+        if not saved:
+            logger.warning(f"⚠️ Job {job_id}: {analysis_type} kept in memory only")
+
+    async def _persist_state(self, job: BatchJob):
+        job.updated_at = time.time()
+        await self._persist(job.job_id, STATE_TYPE, job.to_dict())
+
+    async def submit(self, companies_data: List[Dict]) -> BatchJob:
+        """Register a job and persist its input chunk by chunk"""
+        job = BatchJob(uuid.uuid4().hex, len(companies_data), self.chunk_size)
+        inputs = {
+            i: companies_data[i * self.chunk_size:(i + 1) * self.chunk_size]
+            for i in range(job.n_chunks)
+        }
+        self._jobs[job.job_id] = job
+        self._inputs[job.job_id] = inputs
+        self._chunks[job.job_id] = {}
+        self._refreshed[job.job_id] = time.monotonic()
+
+        for i, rows in inputs.items():
+            await self._persist(job.job_id, f"{INPUT_TYPE}{i}", {"rows": _json_safe(rows)})
+        await self._persist_state(job)
+        logger.info(f"✅ Job {job.job_id} submitted: {job.total} companies in {job.n_chunks} chunks")
+        return job
+
+    async def _restore(self, job_id: str) -> Optional[BatchJob]:
+        """Rebuild a job from analysis_cache (e.g. submitted on another instance)"""
+        rows = await load_analysis_results(job_id, "job:")
+        if not rows:
+            return None
+
+        state = None
+        inputs: Dict[int, List[Dict]] = {}
+        chunks: Dict[int, Dict] = {}
+        for row in rows:
+            analysis_type = row["analysis_type"]
+            if analysis_type == STATE_TYPE:
+                state = row["result"]  # rows are oldest first: last one wins
+            elif analysis_type.startswith(INPUT_TYPE):
+                inputs[int(analysis_type[len(INPUT_TYPE):])] = row["result"]["rows"]
+            elif analysis_type.startswith(CHUNK_TYPE):
+                chunks[int(analysis_type[len(CHUNK_TYPE):])] = row["result"]
+        if state is None:
+            return None
+
+        job = BatchJob.from_dict(state)
+        job.completed_chunks = set(chunks)
+        self._jobs[job_id] = job
+        self._inputs[job_id] = inputs
+        self._chunks[job_id] = chunks
+        self._refreshed[job_id] = time.monotonic()
+        logger.info(f"✅ Job {job_id} restored: {len(chunks)}/{job.n_chunks} chunks done")
+        return job
+
+    async def _refresh(self, job: BatchJob, all_chunks: bool = False):
+        """
+        Merge in what other instances persisted since: their job state if newer,
+        and their finished chunks (all of them, or only those the state lists).
+        Unreadable cache keeps the memory copy.
+        """
+        job_id = job.job_id
+        chunks = self._chunks.setdefault(job_id, {})
+        try:
+            states = await load_analysis_results(job_id, STATE_TYPE) or []
+            persisted = BatchJob.from_dict(states[-1]["result"]) if states else None
+            if all_chunks or (persisted and persisted.completed_chunks - chunks.keys()):
+                for row in await load_analysis_results(job_id, CHUNK_TYPE) or []:
+                    chunks.setdefault(int(row["analysis_type"][len(CHUNK_TYPE):]), row["result"])
+        except Exception as e:
+            logger.warning(f"⚠️ Job {job_id}: state not reloaded ({str(e)})")
+            return
+        finally:
+            self._refreshed[job_id] = time.monotonic()
+
+        if persisted and persisted.updated_at > job.updated_at:
+            job.status, job.error, job.retries = persisted.status, persisted.error, persisted.retries
+            job.updated_at = persisted.updated_at
+        job.completed_chunks = set(chunks)
+        job.error_count = sum(len(chunk["errors"]) for chunk in chunks.values())
+
+    async def get(self, job_id: str) -> Optional[BatchJob]:
+        """
+        The job, restored from analysis_cache if unknown here. Unfinished jobs
+        are re-read every JOB_REFRESH_INTERVAL, unless this instance is advancing them.
+        """
+        job = self._jobs.get(job_id)
+        if job is None:
+            return await self._restore(job_id)
+        lock = self._locks.get(job_id)
+        if (
+            job.status not in TERMINAL_STATUSES
+            and not (lock and lock.locked())
+            and time.monotonic() - self._refreshed.get(job_id, 0.0) >= JOB_REFRESH_INTERVAL
+        ):
+            await self._refresh(job)
+        return job
+
+    async def advance(self, job_id: str, budget: Optional[float] = None) -> Optional[BatchJob]:
+        """
+        Process pending chunks until the time budget would be exceeded.
+        At least one chunk is processed per call; calling again resumes.
+        An outage stops the call early and leaves the job pending (see retries).
+        """
+        job = await self.get(job_id)
+        if job is None or job.status in TERMINAL_STATUSES:
+            return job
+
+        deadline = time.monotonic() + (budget if budget is not None else self.budget)
+        lock = self._locks.setdefault(job_id, asyncio.Lock())
+        async with lock:
+            await self._refresh(job, all_chunks=True)  # chunks another instance finished are not redone
+            if job.status in TERMINAL_STATUSES:
+                return job
+            try:
+                await self._process(job, deadline)
+            except Exception as e:
+                if not is_transient(e):
+                    logger.error(f"❌ Job {job_id} failed: {str(e)}")
+                    job.status = "failed"
+                    job.error = str(e)
+                else:
+                    self._stalled(job, str(getattr(e, "detail", e)))
+            await self._persist_state(job)
+        return job
+
+    async def _process(self, job: BatchJob, deadline: float):
+        job_id = job.job_id
+        waccmap = await load_wacc_map()
+        if waccmap is None:
+            self._stalled(job, "WACC data not available")
+            return
+
+        job.status = "running"
+        processed_any = False
+        for i in job.pending_chunks:
+            estimate = self._chunk_seconds.get(job_id, 0.0)
+            if processed_any and time.monotonic() + estimate > deadline:
+                break
+
+            started = time.monotonic()
+            rows = self._inputs[job_id].get(i)
+            if rows is None:
+                job.status = "failed"
+                job.error = f"Input for chunk {i} is missing"
+                return
+            results, errors = await asyncio.to_thread(
+                analyze_chunk, pd.DataFrame(rows), waccmap, i * job.chunk_size
+            )
+            payload = _json_safe({"data": results, "errors": errors})
+            self._chunks[job_id][i] = payload
+            job.completed_chunks.add(i)
+            job.error_count += len(errors)
+            job.error = None
+            job.retries = 0
+            await self._persist(job_id, f"{CHUNK_TYPE}{i}", payload)
+
+            elapsed = time.monotonic() - started
+            previous = self._chunk_seconds.get(job_id)
+            self._chunk_seconds[job_id] = elapsed if previous is None else 0.7 * previous + 0.3 * elapsed
+            processed_any = True
+
+        if not job.pending_chunks:
+            job.status = "completed"
+            logger.info(f"✅ Job {job_id} completed ({job.error_count} errors)")
+
+    @staticmethod
+    def _stalled(job: BatchJob, reason: str):
+        """An outage stopped this attempt: keep the job pending and record why"""
+        job.error = reason
+        job.retries += 1
+        logger.warning(f"⚠️ Job {job.job_id} waiting to retry ({job.retries}x): {reason}")
+
+    async def fail(self, job_id: str, error: str):
+        """Mark a job failed and persist it, so other instances stop seeing it running"""
+        job = await self.get(job_id)
+        if job is None:
+            return
+        job.status = "failed"
+        job.error = error
+        await self._persist_state(job)
+
+    async def results(self, job_id: str) -> Tuple[List[Dict], List[Dict]]:
+        """Results and error records of all completed chunks, in input order"""
+        chunks = self._chunks.get(job_id, {})
+        data = [row for i in sorted(chunks) for row in chunks[i]["data"]]
+        errors = [error for i in sorted(chunks) for error in chunks[i]["errors"]]
+        return data, errors
+
+
+# ============================================================================
+# LOCAL QUEUE (in-process worker, no external broker)
+# ============================================================================
+
+class LocalJobQueue:
+    """
+    Background asyncio worker that keeps advancing queued jobs.
+
+    Jobs are re-queued after every budget slice so concurrent jobs
+    interleave instead of one large job starving the others.
+    """
+
+    def __init__(self, manager: JobManager, workers: int = 1):
+        self.manager = manager
+        self.workers = workers
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+            # Fresh context: workers outlive the request that started them (and its deadline)
+            self._tasks = [
+                asyncio.create_task(self._worker(), context=contextvars.Context()) for _ in range(self.workers)
+            ]
+
+    async def enqueue(self, job_id: str):
+        self._ensure_started()
+        await self._queue.put(job_id)
+
+    def _requeue(self, job_id: str, retries: int):
+        """Back of the queue, after a backoff if the job is waiting out an outage"""
+        if retries:
+            asyncio.get_running_loop().call_later(retry_delay(retries), self._queue.put_nowait, job_id)
+        else:
+            self._queue.put_nowait(job_id)
+
+    async def _worker(self):
+        attempts: Dict[str, int] = {}  # in a row that could not even load the job
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await self.manager.advance(job_id)
+                attempts.pop(job_id, None)
+                if job is not None and job.status not in TERMINAL_STATUSES:
+                    self._requeue(job_id, job.retries)
+            except Exception as e:
+                if is_transient(e):
+                    attempts[job_id] = attempts.get(job_id, 0) + 1
+                    logger.warning(f"⚠️ Job {job_id} not loaded, retrying: {str(e)}")
+                    self._requeue(job_id, attempts[job_id])
+                else:
+                    attempts.pop(job_id, None)
+                    logger.error(f"❌ Job {job_id} failed: {str(e)}")
+                    try:
+                        await self.manager.fail(job_id, str(e))
+                    except Exception as fail_error:
+                        logger.error(f"❌ Job {job_id} could not be marked failed: {str(fail_error)}")
+            finally:
+                self._queue.task_done()
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []
+        self._queue = None
+
+
+# ============================================================================
+# SERVER-SENT EVENTS
+# ============================================================================
+
+async def job_events(
+    manager: JobManager,
+    job_id: str,
+    poll_interval: float = 1.0,
+    max_duration: float = MAX_REQUEST_DURATION - BUDGET_MARGIN
+) -> AsyncIterator[str]:
+    """
+    SSE stream of job progress. Ends on completion/failure, or with a
+    "timeout" event before the request budget runs out (clients reconnect).
+    """
+    deadline = time.monotonic() + max_duration
+    last_sent = None
+    while True:
+        job = await manager.get(job_id)
+        if job is None:
+            yield f"event: error\ndata: {json.dumps({'job_id': job_id, 'detail': 'Job not found'})}\n\n"
+            return
+
+        state = job.to_dict()
+        if state != last_sent:
+            yield f"event: progress\ndata: {json.dumps(state)}\n\n"
+            last_sent = state
+        if job.status in TERMINAL_STATUSES:
+            yield f"event: {job.status}\ndata: {json.dumps(state)}\n\n"
+            return
+        if time.monotonic() >= deadline:
+            yield f"event: timeout\ndata: {json.dumps(state)}\n\n"
+            return
+        await asyncio.sleep(poll_interval)
+
+
+job_manager = JobManager()
+job_queue = LocalJobQueue(job_manager)
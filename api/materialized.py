@@ -0,0 +1,339 @@
+# api/materialized.py
+"""
+Materialized views over the cached tables
+Valuation results for the whole dataset (and indexes built on them) are
+computed once per (dataset, WACC) version instead of on every request
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from lib.lazy import lazy_import
+
+from .config import COLUMNS_PORTFOLIO
+from .database import table_cache, table_version, load_portfolio
+from .telemetry import stage
+from lib.batch import analyze_companies
+from lib.distribution import SectorDistributions
+from lib.geo import GeoGridIndex
+from lib.peers import PeerIndex
+from lib.portfolio import aggregate_portfolio
+from lib.regions import RegionCube
+from lib.screening import RankingIndex
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+logger = logging.getLogger(__name__)
+
+
+class MaterializedValuations:
+    """
+    Frame 1-3 results for every company in companies_dataset.
+
+    The results frame keeps the dataset's "id" column and is rebuilt only when
+    the dataset or WACC content version changes.
+    """
+
+    def __init__(self):
+        # (results, dataset, waccmap, version), replaced as a whole so a reader never mixes versions
+        self._state: Optional[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, str]] = None
+        self._ranking: Tuple[Optional[RankingIndex], Optional[str]] = (None, None)
+        self._peers: Tuple[PeerIndex, Optional[str]] = (PeerIndex(), None)
+        # (distributions, reports memoized per (sector, bins), version)
+        self._distributions: Tuple[Optional[SectorDistributions], Dict, Optional[str]] = (None, {}, None)
+        self._lock = asyncio.Lock()
+        self._ranking_lock = asyncio.Lock()
+        self._peers_lock = asyncio.Lock()
+        self._distributions_lock = asyncio.Lock()
+
+    async def _current_version(self) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], Optional[str]]:
+        dataset = await table_cache.get("dataset")
+        waccmap = await table_cache.get("wacc")
+        if dataset is None or waccmap is None:
+            return None, None, None
+        version = f"{table_cache.version('dataset')['hash']}.{table_cache.version('wacc')['hash']}"
+        return dataset, waccmap, version
+
+    async def _materialize(self) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, str]]:
+        """(results, dataset, waccmap, version) for the current tables, None when they are unavailable"""
+        dataset, waccmap, version = await self._current_version()
+        if version is None:
+            return None
+        if self._state is not None and self._state[3] == version:
+            return self._state
+
+        async with self._lock:
+            if self._state is None or self._state[3] != version:
+                started = time.perf_counter()
+                with stage("compute"):
+                    results, errors = await asyncio.to_thread(analyze_companies, dataset, waccmap)
+                if "id" in dataset.columns:
+                    results.insert(0, "id", dataset["id"].to_numpy()[results["index"].to_numpy()])
+                self._state = (results, dataset, waccmap, version)
+                logger.info(
+                    f"✅ Materialized {len(results)} valuations ({len(errors)} skipped) "
+                    f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+                )
+        return self._state
+
+    async def get(self) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        """(results frame, version) - None when the source tables are unavailable"""
+        state = await self._materialize()
+        if state is None:
+            return None, None
+        results, _, _, version = state
+        return results, version
+
+    async def ranking(self) -> Tuple[Optional[RankingIndex], Optional[str]]:
+        """Presorted top-k index over the current results"""
+        state = await self._materialize()
+        if state is None:
+            return None, None
+        if self._ranking[1] != state[3]:
+            async with self._ranking_lock:
+                results, _, _, version = self._state  # newest, if it moved on while waiting
+                if self._ranking[1] != version:
+                    with stage("compute"):
+                        ranking = await asyncio.to_thread(RankingIndex, results)
+                    self._ranking = (ranking, version)
+        return self._ranking
+
+    async def peers(self) -> Tuple[Optional[PeerIndex], Optional[str]]:
+        """
+        Sector peer index; on a new version only changed sectors are rebuilt,
+        into a new index that replaces the old one once it is complete
+        """
+        state = await self._materialize()
+        if state is None:
+            return None, None
+        if self._peers[1] != state[3]:
+            async with self._peers_lock:
+                results, dataset, _, version = self._state  # newest, if it moved on while waiting
+                index, built = self._peers
+                if built != version:
+                    rows = results["index"].to_numpy()
+                    frame = results[["id", "company", "category_code", "ltde", "edamargin", "fx"]].assign(
+                        revenue=dataset["revenue"].to_numpy()[rows] if "revenue" in dataset.columns else None,
+                        employees=dataset["employees"].to_numpy()[rows] if "employees" in dataset.columns else None,
+                    )
+                    with stage("compute"):
+                        index, stats = await asyncio.to_thread(index.refreshed, frame)
+                    self._peers = (index, version)
+                    logger.info(f"✅ Peer index refreshed: {stats}")
+        return self._peers
+
+    async def distribution(self, category_code: str, bins: Optional[int] = None) -> Tuple[Optional[Dict], Optional[str]]:
+        """Sector distribution report, memoized per (sector, bins) for the current version"""
+        state = await self._materialize()
+        if state is None:
+            return None, None
+        if self._distributions[2] != state[3]:
+            async with self._distributions_lock:
+                results, _, waccmap, version = self._state  # newest, if it moved on while waiting
+                if self._distributions[2] != version:
+                    with stage("compute"):
+                        distributions = await asyncio.to_thread(SectorDistributions, results, waccmap)
+                    self._distributions = (distributions, {}, version)
+
+        distributions, reports, version = self._distributions
+        key = (str(category_code), bins)
+        if key not in reports:
+            reports[key] = distributions.report(category_code, bins)
+        return reports[key], version
+
+
+def _value_portfolio(holdings: pd.DataFrame, waccmap: pd.DataFrame) -> Dict:
+    """One vectorized pass over all holdings, then the portfolio aggregates"""
+    optional = [c for c in ("id", "revenue", "nsellside", "ceo_age") if c in holdings.columns]
+    columns = [c for c in COLUMNS_PORTFOLIO if c in holdings.columns] + optional
+    results, errors = analyze_companies(holdings[columns], waccmap)
+    if "id" in holdings.columns:
+        results.insert(0, "id", holdings["id"].to_numpy()[results["index"].to_numpy()])
+    return {
+        "holdings": results,
+        "errors": errors,
+        "aggregates": aggregate_portfolio(results),
+    }
+
+
+class PortfolioValuations:
+    """
+    Valued portfolios, cached per portfolio content + WACC version so a
+    dashboard view only pays for the (filtered) portfolio fetch.
+    """
+
+    def __init__(self, max_entries: int = 128):
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[str, Tuple[str, Dict]]" = OrderedDict()
+
+    async def get(self, portfolio_id: str) -> Optional[Dict]:
+        """Valuation of one portfolio, None if it is empty or data is unavailable"""
+        holdings = await load_portfolio(portfolio_id)
+        waccmap = await table_cache.get("wacc")
+        if holdings is None or holdings.empty or waccmap is None:
+            return None
+
+        version = f"{table_version(holdings)['hash']}.{table_cache.version('wacc')['hash']}"
+        cached = self._cache.get(portfolio_id)
+        if cached is not None and cached[0] == version:
+            self._cache.move_to_end(portfolio_id)
+            return cached[1]
+
+        with stage("compute"):
+            valuation = await asyncio.to_thread(_value_portfolio, holdings, waccmap)
+        valuation = {"portfolio_id": portfolio_id, "version": version, **valuation}
+        self._cache[portfolio_id] = (version, valuation)
+        self._cache.move_to_end(portfolio_id)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        logger.info(f"✅ Valued portfolio {portfolio_id}: {len(holdings)} holdings")
+        return valuation
+
+
+# ============================================================================
+# CONTACTS (locations, regions) JOINED TO VALUATIONS
+# ============================================================================
+
+CONTACT_COLUMNS = [
+    "contact_id", "name_native", "company_name", "city_native_", "postcode",
+    "region_in_country", "nuts1", "nuts2", "nuts3", "latitude", "longitude",
+]
+VALUATION_COLUMNS = ["id", "company", "category_code", "EV_current", "EV_DCF", "growth_expected", "classification"]
+
+
+def _normalize_names(names: pd.Series) -> pd.Series:
+    return names.astype(str).str.strip().str.casefold()
+
+
+def join_contacts_to_valuations(contacts: pd.DataFrame, results: pd.DataFrame) -> pd.DataFrame:
+    """
+    One row per contact with its company's valuation columns (NaN if unmatched).
+    Matches on company_id = dataset id where present, else on the company name
+    (name_native from the IT.csv import, or company_name).
+    """
+    joined = contacts[[c for c in CONTACT_COLUMNS if c in contacts.columns]].reset_index(drop=True)
+    match = pd.Series(np.nan, index=joined.index)
+
+    if "company_id" in contacts.columns and "id" in results.columns:
+        by_id = pd.Series(np.arange(len(results)), index=results["id"].astype(str))
+        by_id = by_id[~by_id.index.duplicated()]
+        company_ids = contacts["company_id"].reset_index(drop=True)
+        match = company_ids.where(company_ids.notna()).astype(str).map(by_id).where(company_ids.notna())
+
+    for name_column in ("name_native", "company_name"):
+        if name_column in contacts.columns:
+            by_name = pd.Series(np.arange(len(results)), index=_normalize_names(results["company"]))
+            by_name = by_name[~by_name.index.duplicated()]
+            names = _normalize_names(contacts[name_column].reset_index(drop=True))
+            match = match.fillna(names.map(by_name))
+
+    matched = match.notna().to_numpy()
+    rows = match.fillna(0).to_numpy(dtype=np.int64)
+    for column in VALUATION_COLUMNS:
+        if column not in results.columns:
+            continue
+        values = results[column].to_numpy()[rows].astype(object)
+        values[~matched] = None
+        joined[f"company_{column}" if column in ("id", "company") else column] = values
+    return joined
+
+
+class JoinedContacts:
+    """Contacts joined to the materialized valuations, rebuilt per contacts/valuation version"""
+
+    def __init__(self):
+        self._version: Optional[str] = None
+        self._frame: Optional[pd.DataFrame] = None
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> Tuple[Optional[pd.DataFrame], Optional[str]]:
+        contacts = await table_cache.get("contacts")
+        results, valuation_version = await valuations.get()
+        if contacts is None or results is None:
+            return None, None
+
+        version = f"{table_cache.version('contacts')['hash']}.{valuation_version}"
+        if version != self._version:
+            async with self._lock:
+                if version != self._version:
+                    with stage("compute"):
+                        self._frame = await asyncio.to_thread(join_contacts_to_valuations, contacts, results)
+                    self._version = version
+        return self._frame, self._version
+
+
+class GeoIndex:
+    """
+    Grid index over the contacts' latitude/longitude, built lazily from the
+    joined contacts and rebuilt when contacts or valuations change.
+    """
+
+    def __init__(self):
+        # (index, points, version), swapped whole so readers never mix versions
+        self._state: Tuple[Optional[GeoGridIndex], Optional[pd.DataFrame], Optional[str]] = (None, None, None)
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> Tuple[Optional[GeoGridIndex], Optional[pd.DataFrame], Optional[str]]:
+        """(grid index, joined contact rows, version)"""
+        points, version = await joined_contacts.get()
+        if points is None or "latitude" not in points.columns or "longitude" not in points.columns:
+            return None, None, None
+
+        if version != self._state[2]:
+            async with self._lock:
+                points, version = await joined_contacts.get()  # newest, if it moved on while waiting
+                if points is not None and version != self._state[2]:
+                    started = time.perf_counter()
+                    with stage("compute"):
+                        index = await asyncio.to_thread(
+                            GeoGridIndex,
+                            pd.to_numeric(points["latitude"], errors="coerce").to_numpy(dtype=float),
+                            pd.to_numeric(points["longitude"], errors="coerce").to_numpy(dtype=float),
+                        )
+                    self._state = (index, points, version)
+                    logger.info(
+                        f"✅ Geo index built: {len(index)} located contacts "
+                        f"in {(time.perf_counter() - started) * 1000:.0f} ms"
+                    )
+        return self._state
+
+
+class RegionRollups:
+    """
+    NUTS / region aggregates over the joined contacts. On a new version only
+    regions whose companies changed are re-aggregated.
+    """
+
+    def __init__(self):
+        # (cube, version), swapped whole: a refresh builds a new cube off the old one
+        self._state: Tuple[RegionCube, Optional[str]] = (RegionCube(), None)
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> Tuple[Optional[RegionCube], Optional[str]]:
+        joined, version = await joined_contacts.get()
+        if joined is None:
+            return None, None
+
+        if version != self._state[1]:
+            async with self._lock:
+                joined, version = await joined_contacts.get()  # newest, if it moved on while waiting
+                cube, built = self._state
+                if joined is not None and version != built:
+                    with stage("compute"):
+                        cube, stats = await asyncio.to_thread(cube.refreshed, joined)
+                    self._state = (cube, version)
+                    logger.info(f"✅ Region roll-ups refreshed: {stats}")
+        return self._state
+
+
+valuations = MaterializedValuations()
+portfolio_valuations = PortfolioValuations()
+joined_contacts = JoinedContacts()
+geo_index = GeoIndex()
+region_rollups = RegionRollups()
@@ -0,0 +1,206 @@
+# api/profiling.py
+"""
+On-demand request profiling
+A request is profiled when it carries X-Profile: <PROFILE_TOKEN> or is
+picked by PROFILE_SAMPLE_RATE. Two profilers:
+  cprofile - deterministic, event-loop thread only -> .pstats (snakeviz, flameprof)
+  sample   - stack sampling of every thread (covers asyncio.to_thread work)
+             -> .collapsed folded stacks (flamegraph.pl, speedscope, inferno)
+Profiles are stored under PROFILE_DIR under a generated id; the client's
+X-Request-ID is kept as metadata only, so a client cannot choose (and
+overwrite) a stored profile.
+"""
+
+import cProfile
+import hmac
+import logging
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from starlette.datastructures import MutableHeaders
+
+from .config import PROFILE_TOKEN, PROFILE_SAMPLE_RATE, PROFILE_DIR, PROFILE_MAX_STORED
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "sample")
+SAMPLE_INTERVAL = 0.002  # seconds between stack samples (~500 Hz)
+PROFILE_FILES = {"cprofile": ".pstats", "sample": ".collapsed"}
+
+
+def profiling_enabled() -> bool:
+    return bool(PROFILE_TOKEN) or PROFILE_SAMPLE_RATE > 0
+
+
+def authorized(token: Optional[str]) -> bool:
+    """Constant-time check against PROFILE_TOKEN (never true when no token is configured)"""
+    return bool(PROFILE_TOKEN) and token is not None and hmac.compare_digest(token, PROFILE_TOKEN)
+
+
+# ============================================================================
+# STACK SAMPLER (statistical, all threads)
+# ============================================================================
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples sys._current_frames() on a background thread into folded-stack counts"""
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.counts: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if thread_id not in names:
+                    names = {t.ident: t.name for t in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(f"thread:{names.get(thread_id, thread_id)}")
+                self.counts[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """Brendan Gregg folded format: one "root;...;leaf count" line per distinct stack"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.counts.most_common())
+
+
+# ============================================================================
+# PROFILE STORE
+# ============================================================================
+
+class ProfileStore:
+    """Profiles on local disk (PROFILE_DIR), newest PROFILE_MAX_STORED kept"""
+
+    def __init__(self, directory: str = PROFILE_DIR, max_entries: int = PROFILE_MAX_STORED):
+        self.directory = directory
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict]" = OrderedDict()
+
+    def path(self, profile_id: str) -> Optional[str]:
+        entry = self._entries.get(profile_id)
+        if entry is None:
+            return None
+        return os.path.join(self.directory, profile_id + PROFILE_FILES[entry["mode"]])
+
+    def save(self, entry: Dict, profiler) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        self._entries[entry["id"]] = entry
+        path = self.path(entry["id"])
+        if entry["mode"] == "cprofile":
+            profiler.dump_stats(path)
+        else:
+            with open(path, "w") as f:
+                f.write(profiler.collapsed())
+        while len(self._entries) > self.max_entries:
+            old_id, _ = self._entries.popitem(last=False)
+            for suffix in PROFILE_FILES.values():
+                try:
+                    os.remove(os.path.join(self.directory, old_id + suffix))
+                except FileNotFoundError:
+                    pass
+        logger.info(f"✅ Stored {entry['mode']} profile {entry['id']} for {entry['method']} {entry['path']}")
+
+    def get(self, profile_id: str) -> Optional[Dict]:
+        return self._entries.get(profile_id)
+
+    def list(self) -> List[Dict]:
+        return list(reversed(self._entries.values()))
+
+
+profile_store = ProfileStore()
+
+
+# ============================================================================
+# ASGI MIDDLEWARE
+# ============================================================================
+
+class ProfilingMiddleware:
+    """
+    Profiles opted-in requests. One profile runs at a time; requests that
+    arrive while another one is being profiled are served unprofiled.
+    Adds X-Profile-Id to profiled responses.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._busy = threading.Lock()
+
+    def _requested_mode(self, scope) -> Optional[str]:
+        headers = {k.decode("latin-1").lower(): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        if authorized(headers.get("x-profile")):
+            mode = headers.get("x-profile-mode", "cprofile")
+            return mode if mode in PROFILE_MODES else "cprofile"
+        if PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE:
+            return "sample"  # low overhead for unattended sampling
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        mode = self._requested_mode(scope)
+        if mode is None or not self._busy.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = dict(scope.get("headers", [])).get(b"x-request-id", b"").decode("latin-1")
+        entry = {
+            "id": uuid.uuid4().hex,
+            "request_id": request_id[:64] or None,
+            "mode": mode,
+            "method": scope.get("method"),
+            "path": scope.get("path"),
+            "started_at": time.time(),
+            "status": None,
+        }
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                entry["status"] = message["status"]
+                MutableHeaders(scope=message).append("X-Profile-Id", entry["id"])
+            await send(message)
+
+        profiler = cProfile.Profile() if mode == "cprofile" else StackSampler()
+        started = time.perf_counter()
+        try:
+            if mode == "cprofile":
+                profiler.enable()
+            else:
+                profiler.start()
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if mode == "cprofile":
+                profiler.disable()
+            else:
+                profiler.stop()
+            entry["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+            try:
+                profile_store.save(entry, profiler)
+            except OSError as e:
+                logger.error(f"❌ Failed to store profile {entry['id']}: {str(e)}")
+            finally:
+                self._busy.release()
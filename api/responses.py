@@ -0,0 +1,96 @@
+# api/responses.py
+"""
+Fast, NaN-safe JSON response class for the API
+orjson serializes NumPy scalars/arrays natively and writes NaN as null
+"""
+
+from __future__ import annotations
+
+import datetime
+import decimal
+import json
+import math
+from typing import Any
+
+from lib.lazy import lazy_import
+from fastapi.responses import JSONResponse
+
+from .telemetry import stage
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, same output, slower
+    orjson = None
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+
+# ============================================================================
+# TYPE CONVERSIONS (only called for types the encoder doesn't know)
+# ============================================================================
+
+def _default(obj: Any) -> Any:
+    """Convert pandas / NumPy / misc objects into JSON-native values"""
+    if isinstance(obj, pd.DataFrame):
+        return obj.to_dict(orient="records")
+    if isinstance(obj, pd.Series):
+        return obj.to_dict()
+    if isinstance(obj, pd.Index):
+        return obj.tolist()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    if isinstance(obj, (pd.Timestamp, datetime.datetime, datetime.date)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _sanitize(obj: Any) -> Any:
+    """Stdlib fallback: walk the payload, mapping NaN/inf to None"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {str(k): _sanitize(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_sanitize(v) for v in obj]
+    if isinstance(obj, (str, int, bool)) or obj is None:
+        return obj
+    return _sanitize(_default(obj))
+
+
+def dumps(content: Any) -> bytes:
+    """Serialize any API payload to JSON bytes (NaN -> null)"""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(_sanitize(content), ensure_ascii=False, separators=(",", ":"), allow_nan=False).encode("utf-8")
+
+
+# ============================================================================
+# RESPONSE CLASS
+# ============================================================================
+
+class FastJSONResponse(JSONResponse):
+    """
+    Drop-in JSONResponse that accepts NumPy values and pandas objects.
+
+    Return it directly from a route (rather than a bare dict) so FastAPI
+    skips jsonable_encoder and the payload is encoded in a single pass.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        with stage("serialize"):
+            return dumps(content)
@@ -0,0 +1,207 @@
+# api/schemas.py
+"""
+Request models for the analysis routes
+Frame 1-3 bodies are validated by pydantic (422 on bad input). Batch bodies
+skip per-company models: orjson decodes the payload and each field goes
+straight into one NumPy column, from either of two shapes
+
+    rows:     [{"company": "A", "ebit": 1.0, ...}, {"company": "B", ...}]
+    columns:  {"company": ["A", "B"], "ebit": [1.0, 2.0], ...}
+
+Values that are not numbers are left for lib.batch to report per company.
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, ConfigDict, field_validator
+
+from lib.lazy import lazy_import
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, same result, slower
+    orjson = None
+    import json
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+TEXT_FIELDS = ("company", "nace", "category_code")
+NUMERIC_FIELDS = (
+    "ebit", "employees", "revenue", "net_income", "capex", "d_and_a", "changes_in_wc",
+    "lt_debt", "st_debt", "sh_equity", "capital_equity", "cash", "nsellside", "ceo_age",
+)
+BATCH_FIELDS = TEXT_FIELDS + NUMERIC_FIELDS
+
+
+# ============================================================================
+# FRAME 1-3 MODELS
+# ============================================================================
+
+class CompanyInput(BaseModel):
+    """One company as stored in companies_dataset (frame 1); other keys are kept"""
+
+    model_config = ConfigDict(extra="allow", coerce_numbers_to_str=True)
+
+    company: Optional[str] = None
+    nace: Optional[str] = None
+    category_code: str
+
+    ebit: Optional[float] = None
+    employees: Optional[float] = None
+    revenue: Optional[float] = None
+    net_income: Optional[float] = None
+    capex: Optional[float] = None
+    d_and_a: Optional[float] = None
+    changes_in_wc: Optional[float] = None
+    lt_debt: Optional[float] = None
+    st_debt: Optional[float] = None
+    sh_equity: Optional[float] = None
+    capital_equity: Optional[float] = None
+    cash: Optional[float] = None
+    nsellside: Optional[float] = None
+    ceo_age: Optional[float] = None
+
+    def to_series(self) -> pd.Series:
+        """Company row for the lib functions (missing numbers as NaN)"""
+        row = self.model_dump()
+        for field in NUMERIC_FIELDS:
+            if row[field] is None:
+                row[field] = np.nan
+        return pd.Series(row)
+
+
+class ValuationInput(CompanyInput):
+    """Frame 2 company: the DCF inputs are required"""
+
+    net_income: float
+    capex: float
+    d_and_a: float
+    changes_in_wc: float
+    lt_debt: float
+    st_debt: float
+    sh_equity: float
+    capital_equity: float
+    cash: float
+
+
+class PredictabilityInput(BaseModel):
+    """Frame 3 decision tree inputs; missing values are NaN (ceo_age None)"""
+
+    model_config = ConfigDict(extra="allow", coerce_numbers_to_str=True)
+
+    company_name: Optional[str] = None
+    ev_growth: float = 0.0
+    nsellside: float = math.nan
+    nsellside_p50: float = math.nan
+    ceo_age: Optional[float] = None
+    revenue: float = math.nan
+    edamargin: float = math.nan
+    edamargin_p75: float = math.nan
+
+    @field_validator("nsellside", "nsellside_p50", "revenue", "edamargin", "edamargin_p75", mode="before")
+    @classmethod
+    def _null_as_nan(cls, value):
+        return math.nan if value is None else value
+
+
+# ============================================================================
+# BATCH DECODING
+# ============================================================================
+
+class BatchDecodeError(ValueError):
+    """Batch body that is not a list of companies or a set of equal-length columns"""
+
+
+def _loads(body: bytes):
+    try:
+        return orjson.loads(body) if orjson is not None else json.loads(body)
+    except ValueError as e:
+        raise BatchDecodeError(f"invalid JSON: {e}") from None
+
+
+def _columns_from_rows(rows: List) -> Dict[str, List]:
+    if not all(isinstance(row, dict) for row in rows):
+        raise BatchDecodeError("batch rows must be JSON objects")
+    present = set().union(*rows) if rows else set()
+    return {field: [row.get(field) for row in rows] for field in BATCH_FIELDS if field in present}
+
+
+def _columns_from_arrays(body: Dict) -> Dict[str, List]:
+    columns = {field: body[field] for field in BATCH_FIELDS if field in body}
+    if not all(isinstance(values, list) for values in columns.values()):
+        raise BatchDecodeError("columnar batch fields must be arrays")
+    lengths = {len(values) for values in columns.values()}
+    if len(lengths) > 1:
+        raise BatchDecodeError(f"columnar batch fields differ in length: {sorted(lengths)}")
+    return columns
+
+
+def _numeric(values: List) -> np.ndarray:
+    try:
+        column = np.array(values, dtype=float)  # null -> NaN
+        if column.ndim == 1:  # equal-length lists in every row would give a 2-D array
+            return column
+    except (TypeError, ValueError):
+        pass
+    # bad values are reported per company by lib.batch
+    return np.array([str(v) if isinstance(v, (list, dict)) else v for v in values], dtype=object)
+
+
+def _text(values: List) -> np.ndarray:
+    return np.array([None if v is None else str(v) for v in values], dtype=object)
+
+
+def decode_batch(body: bytes) -> pd.DataFrame:
+    """Batch request body (rows or columns) -> companies frame for lib.batch.run_batch"""
+    payload = _loads(body)
+    if isinstance(payload, list):
+        columns = _columns_from_rows(payload)
+    elif isinstance(payload, dict):
+        columns = _columns_from_arrays(payload)
+    else:
+        raise BatchDecodeError("batch body must be a JSON array or object")
+
+    arrays = {
+        field: _numeric(values) if field in NUMERIC_FIELDS else _text(values)
+        for field, values in columns.items()
+    }
+    if not arrays and isinstance(payload, list):
+        return pd.DataFrame(index=range(len(payload)))
+    return pd.DataFrame(arrays, copy=False)
+
+
+# OpenAPI description of the batch body (the route reads raw bytes)
+_COMPANY_PROPERTIES = {
+    **{field: {"type": "string", "nullable": True} for field in TEXT_FIELDS},
+    **{field: {"type": "number", "nullable": True} for field in NUMERIC_FIELDS},
+}
+BATCH_OPENAPI = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {
+                    "oneOf": [
+                        {
+                            "title": "Rows",
+                            "type": "array",
+                            "items": {"type": "object", "properties": _COMPANY_PROPERTIES},
+                        },
+                        {
+                            "title": "Columns",
+                            "type": "object",
+                            "properties": {
+                                field: {"type": "array", "items": schema}
+                                for field, schema in _COMPANY_PROPERTIES.items()
+                            },
+                        },
+                    ]
+                }
+            }
+        },
+    }
+}
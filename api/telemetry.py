@@ -0,0 +1,204 @@
+# api/telemetry.py
+"""
+Per-stage request timing
+Stages recorded while serving a request (db, convert, compute, serialize)
+are sent back as a Server-Timing header and aggregated into latency
+histograms per route, exported in Prometheus text format on /metrics.
+Disabled unless METRICS_ENABLED=1: stage() is then a shared no-op context.
+"""
+
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+
+from .config import METRICS_ENABLED
+
+STAGES = ("db", "convert", "compute", "serialize")
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Histogram upper bounds in seconds (Prometheus "le"), +Inf implied
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0)
+
+# (stage, seconds) pairs of the current request; None outside a timed request.
+# asyncio.to_thread copies the context, so worker threads append to the same list.
+_request_stages: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_stages", default=None)
+
+_NULL_STAGE = nullcontext()
+
+
+# ============================================================================
+# STAGE TIMERS
+# ============================================================================
+
+class _Stage:
+    __slots__ = ("name", "started")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        stages = _request_stages.get()
+        if stages is not None:
+            stages.append((self.name, time.perf_counter() - self.started))
+        return False
+
+
+def stage(name: str):
+    """Context manager timing one stage of the current request (sync or async code)"""
+    if not METRICS_ENABLED:
+        return _NULL_STAGE
+    return _Stage(name)
+
+
+# ============================================================================
+# HISTOGRAMS
+# ============================================================================
+
+class LatencyHistogram:
+    """Fixed-bucket histogram; quantiles interpolated within a bucket like histogram_quantile()"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        if not self.count:
+            return float("nan")
+        rank = q * self.count
+        cumulative = 0
+        for i, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if i == len(BUCKETS):  # +Inf bucket: best we can say is "above the last bound"
+                    return BUCKETS[-1]
+                lower = BUCKETS[i - 1] if i else 0.0
+                return lower + (BUCKETS[i] - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return BUCKETS[-1]
+
+
+class MetricsRegistry:
+    """Histograms keyed by (method, route template, stage); "total" is the whole request"""
+
+    def __init__(self):
+        self._histograms: Dict[Tuple[str, str, str], LatencyHistogram] = {}
+
+    def record(self, method: str, route: str, stages: List[Tuple[str, float]], total: float):
+        for name, seconds in summarize(stages, total).items():
+            key = (method, route, name)
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition (version 0.0.4)"""
+        name = "incrolink_request_stage_seconds"
+        lines = [
+            f"# HELP {name} Request time per route and stage",
+            f"# TYPE {name} histogram",
+        ]
+        quantile_lines = [
+            f"# HELP {name}_quantile Estimated p50/p95/p99 per route and stage",
+            f"# TYPE {name}_quantile gauge",
+        ]
+        for (method, route, stage_name), histogram in sorted(self._histograms.items()):
+            labels = f'method="{method}",route="{_escape(route)}",stage="{stage_name}"'
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS + (float("inf"),), histogram.counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{name}_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"{name}_sum{{{labels}}} {histogram.total!r}")
+            lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+            for q in QUANTILES:
+                quantile_lines.append(f'{name}_quantile{{{labels},quantile="{q}"}} {histogram.quantile(q)!r}')
+        return "\n".join(lines + quantile_lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def summarize(stages: List[Tuple[str, float]], total: float) -> Dict[str, float]:
+    """Seconds per stage name (repeated stages summed) plus "total" """
+    summary: Dict[str, float] = {}
+    for name, seconds in stages:
+        summary[name] = summary.get(name, 0.0) + seconds
+    summary["total"] = total
+    return summary
+
+
+def route_template(scope) -> str:
+    """
+    Path template of the matched route (e.g. /api/v1/company/{company_id}).
+    Newer FastAPI versions put the route without its router prefix in the
+    scope, so the prefix is recovered from the request path.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if template is None:
+        return "unmatched"
+    regex = getattr(route, "path_regex", None)
+    path = scope.get("path", "")
+    if regex is not None:
+        for start, char in enumerate(path):
+            if char == "/" and regex.match(path[start:]):
+                return path[:start] + template
+    return template
+
+
+def server_timing_header(stages: List[Tuple[str, float]], total: float) -> str:
+    return ", ".join(f"{name};dur={seconds * 1000:.2f}" for name, seconds in summarize(stages, total).items())
+
+
+metrics_registry = MetricsRegistry()
+
+
+# ============================================================================
+# ASGI MIDDLEWARE
+# ============================================================================
+
+class TimingMiddleware:
+    """
+    Collects stage timings per HTTP request, adds Server-Timing to the response
+    and records the request in metrics_registry (only installed when enabled).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stages: List[Tuple[str, float]] = []
+        token = _request_stages.set(stages)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", server_timing_header(stages, time.perf_counter() - started))
+                headers.append("Timing-Allow-Origin", "*")  # let the browser frontend read it
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_stages.reset(token)
+            metrics_registry.record(scope.get("method", ""), route_template(scope), stages, time.perf_counter() - started)
@@ -0,0 +1,280 @@
+# api/uploader.py
+"""
+Concurrent batch inserts for CSV imports
+Rows go out in batches, up to IMPORT_CONCURRENCY batches in flight. Batch
+sizes adapt: capped by payload bytes, grown while batches come back fast,
+shrunk when they are slow or time out. Batches that fail on timeouts or
+unavailability are retried with backoff; batches Postgres rejects because
+of a row (constraint violations, bad values) are split in halves down to the
+offending rows, so the report names every row that did not make it in.
+Errors no row can cause on its own (unknown column, missing ON CONFLICT
+target, permissions) stop the upload instead: every batch would fail alike.
+With on_conflict set, rows are upserted on that key, so sending a row twice
+(a retry, a resumed import) leaves one copy.
+"""
+
+import asyncio
+import functools
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from lib.lazy import lazy_import
+
+from .config import (
+    DB_CALL_TIMEOUTS, IMPORT_CONCURRENCY, IMPORT_BATCH_BYTES, IMPORT_BATCH_MAX_ROWS,
+    IMPORT_BATCH_LATENCY, IMPORT_RETRIES, IMPORT_RETRY_BACKOFF
+)
+from .database import supabase_db, database_unavailable, _attempt
+
+try:
+    import orjson
+except ImportError:  # stdlib fallback, only used to estimate payload sizes
+    orjson = None
+    import json
+
+postgrest = lazy_import("postgrest")
+httpx = lazy_import("httpx")
+
+logger = logging.getLogger(__name__)
+
+def is_transient(error: Exception) -> bool:
+    """
+    Whether the same batch may succeed if sent again: the database was
+    unavailable, or the transaction hit a serialization failure / deadlock (40xxx)
+    """
+    if isinstance(error, httpx.TransportError):
+        return True
+    if isinstance(error, postgrest.APIError):
+        return database_unavailable(error) or str(error.code or "").startswith("40")
+    return False
+
+
+# SQLSTATE classes a single row can cause: cardinality violation (the same key
+# twice in one upsert), data exceptions, integrity constraint violations
+ROW_ERROR_CODE_PREFIXES = ("21", "22", "23")
+
+
+def is_row_error(error: Exception) -> bool:
+    """Whether splitting the batch can isolate the rows behind the error"""
+    if isinstance(error, postgrest.APIError):
+        return str(error.code or "").startswith(ROW_ERROR_CODE_PREFIXES)
+    return True  # e.g. a value the client cannot encode
+
+
+def _error_message(error: Exception) -> str:
+    if isinstance(error, postgrest.APIError):
+        details = f" ({error.details})" if error.details else ""
+        return f"{error.code}: {error.message}{details}"
+    return f"{type(error).__name__}: {error}"
+
+
+def _span(rows: List[int]) -> str:
+    if len(rows) == 1:
+        return f"row {rows[0]}"
+    if rows[-1] - rows[0] + 1 == len(rows):
+        return f"rows {rows[0]}-{rows[-1]}"
+    return f"{len(rows)} rows between {rows[0]} and {rows[-1]}"
+
+
+def _payload_bytes(records: List[Dict]) -> int:
+    return len(orjson.dumps(records)) if orjson is not None else len(json.dumps(records, default=str))
+
+
+def _write_rows(table_name: str, records: List[Dict], on_conflict: Optional[str]):
+    table = supabase_db.client.table(table_name)
+    if on_conflict:
+        return table.upsert(records, on_conflict=on_conflict, returning="minimal").execute()
+    return table.insert(records, returning="minimal").execute()
+
+
+class BatchUploader:
+    """
+    Inserts rows into one table. add() hands over rows as they are read and
+    waits while every slot is busy (so reading never runs far ahead of the
+    uploads); finish() waits for the last batches and returns the stats.
+
+    Row numbers given to add() are carried into failed_rows, so failures can
+    be traced back to their line in the CSV; done_through() is the row up to
+    which everything has been written or reported (for checkpoints).
+
+    After an error that would fail every batch, aborted holds its message,
+    add() stops sending and done_through() stays below the first batch it hit.
+    """
+
+    def __init__(
+        self,
+        table_name: str,
+        on_conflict: Optional[str] = None,
+        initial_rows: int = 500,
+        concurrency: int = IMPORT_CONCURRENCY,
+        max_bytes: int = IMPORT_BATCH_BYTES,
+        max_rows: int = IMPORT_BATCH_MAX_ROWS,
+        target_latency: float = IMPORT_BATCH_LATENCY,
+        retries: int = IMPORT_RETRIES,
+        backoff: float = IMPORT_RETRY_BACKOFF
+    ):
+        self.table_name = table_name
+        self.on_conflict = on_conflict
+        self.batch_rows = initial_rows
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.target_latency = target_latency
+        self.retries = retries
+        self.backoff = backoff
+        self.rows_inserted = 0
+        self.batches = 0
+        self.retried = 0
+        self.bisections = 0
+        self.failed_rows: List[Dict] = []
+        self.aborted: Optional[str] = None
+        self._aborted_from: Optional[int] = None
+        self._row_bytes: Optional[float] = None
+        self._slots = asyncio.Semaphore(concurrency)
+        self._tasks: Dict[asyncio.Task, int] = {}  # batch -> its first row
+        self._added_through = 0
+        self._pool = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"import-{table_name}")
+
+    # ------------------------------------------------------------------------
+    # BATCH SIZING
+    # ------------------------------------------------------------------------
+
+    def _size_cap(self) -> int:
+        """Most rows that fit in max_bytes (and max_rows)"""
+        if not self._row_bytes:
+            return self.max_rows
+        return max(1, min(self.max_rows, int(self.max_bytes / self._row_bytes)))
+
+    def _measure(self, records: List[Dict]):
+        sample = records[:100]
+        size = _payload_bytes(sample) / len(sample)
+        self._row_bytes = size if self._row_bytes is None else 0.8 * self._row_bytes + 0.2 * size
+
+    def _adapt(self, rows: int, latency: float):
+        """Grow full-size batches that came back well within target_latency, shrink slow ones"""
+        if latency > self.target_latency:
+            self.batch_rows = max(1, int(rows * self.target_latency / latency))
+        elif latency < self.target_latency / 2 and rows >= self.batch_rows:
+            self.batch_rows = min(self._size_cap(), int(self.batch_rows * 1.5) + 1)
+
+    # ------------------------------------------------------------------------
+    # UPLOAD
+    # ------------------------------------------------------------------------
+
+    async def add(self, records: List[Dict], rows: List[int]):
+        """Queue records for upload; rows are their (increasing) row numbers"""
+        if not records:
+            return
+        self._measure(records)
+        start = 0
+        while start < len(records):
+            await self._slots.acquire()
+            if self.aborted:
+                self._slots.release()
+                return
+            size = min(self.batch_rows, self._size_cap())
+            batch_rows = rows[start:start + size]
+            task = asyncio.create_task(self._run_batch(records[start:start + size], batch_rows))
+            self._tasks[task] = batch_rows[0]
+            task.add_done_callback(self._done)
+            start += size
+        self._added_through = max(self._added_through, rows[-1])
+
+    def reject(self, records: List[Dict], rows: List[int], message: str):
+        """Report rows that are not worth sending"""
+        if records:
+            self._fail(records, rows, message)
+            self._added_through = max(self._added_through, rows[-1])
+
+    def done_through(self) -> int:
+        """Highest row number such that it and every row before it are finished"""
+        done = min(self._tasks.values()) - 1 if self._tasks else self._added_through
+        if self._aborted_from is not None:
+            done = min(done, self._aborted_from - 1)
+        return done
+
+    def _done(self, task: asyncio.Task):
+        self._tasks.pop(task, None)
+
+    async def finish(self) -> Dict:
+        """Wait for the batches still in flight"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        self._pool.shutdown(wait=False)
+        return self.stats()
+
+    async def _run_batch(self, batch: List[Dict], rows: List[int]):
+        try:
+            await self._upload(batch, rows)
+        except Exception as e:  # never lose a batch silently
+            self._fail(batch, rows, _error_message(e))
+        finally:
+            self._slots.release()
+
+    async def _send(self, batch: List[Dict]) -> float:
+        call = functools.partial(
+            _attempt, functools.partial(_write_rows, self.table_name, batch, self.on_conflict),
+            DB_CALL_TIMEOUTS["write"]
+        )
+        started = time.perf_counter()
+        await asyncio.get_running_loop().run_in_executor(self._pool, call)
+        return time.perf_counter() - started
+
+    async def _upload(self, batch: List[Dict], rows: List[int]):
+        """Write one batch: retry transient failures, bisect rejected batches down to the bad rows"""
+        for attempt in range(1 + self.retries):
+            try:
+                latency = await self._send(batch)
+            except Exception as e:
+                error = e
+                if not is_transient(e):
+                    break
+                self.batch_rows = max(1, self.batch_rows // 2)
+                if attempt < self.retries:
+                    self.retried += 1
+                    delay = random.uniform(0, self.backoff * 2 ** attempt)
+                    logger.warning(
+                        f"⚠️ {self.table_name}: {_span(rows)} failed "
+                        f"({_error_message(e)}), retrying in {delay:.2f}s"
+                    )
+                    await asyncio.sleep(delay)
+            else:
+                self.rows_inserted += len(batch)
+                self.batches += 1
+                self._adapt(len(batch), latency)
+                return
+
+        if not is_transient(error) and not is_row_error(error):
+            self._abort(rows, error)
+        elif len(batch) > 1 and not is_transient(error):
+            self.bisections += 1
+            middle = len(batch) // 2
+            await self._upload(batch[:middle], rows[:middle])  # in order: the later duplicate wins
+            await self._upload(batch[middle:], rows[middle:])
+        else:
+            self._fail(batch, rows, _error_message(error))
+
+    def _abort(self, rows: List[int], error: Exception):
+        """Stop sending: the error is not about these rows, so every other batch would fail the same way"""
+        if self.aborted is None:
+            self.aborted = _error_message(error)
+            logger.error(f"❌ {self.table_name}: {self.aborted} - affects every batch, stopping the upload")
+        self._aborted_from = rows[0] if self._aborted_from is None else min(self._aborted_from, rows[0])
+
+    def _fail(self, batch: List[Dict], rows: List[int], message: str):
+        self.failed_rows += [
+            {"row": row, "error": message, "record": record} for row, record in zip(rows, batch)
+        ]
+        logger.error(f"❌ {self.table_name}: {_span(rows)} failed: {message}")
+
+    def stats(self) -> Dict:
+        return {
+            "rows_inserted": self.rows_inserted,
+            "rows_failed": len(self.failed_rows),
+            "batches": self.batches,
+            "retries": self.retried,
+            "bisections": self.bisections,
+            "batch_rows": self.batch_rows,
+        }
@@ -4,10 +4,12 @@ import sys
 import os
 from pathlib import Path
 from typing import Optional, Dict, List
+import asyncio
+import json
 import logging
-import pandas as pd
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
 
 # --- PATH SETUP ---
 # Ensure project root is in sys.path to allow imports from 'lib'
@@ -19,15 +21,30 @@ if str(project_root) not in sys.path:
     sys.path.insert(0, str(project_root))
 
 # --- IMPORTS ---
-from api.config import config
+from api.config import config, TABLES, PAGE_SIZE, BATCH_WORKERS, BATCH_PROCESS_THRESHOLD
 from api.database import (
     load_dataset, load_wacc_map, load_portfolio, load_contacts,
-    search_companies, get_company_by_id, get_sector_data, load_all_data
+    search_companies, get_company_by_id, get_sector_data, load_all_data,
+    iter_table_pages, table_cache
 )
+from api.caching import cache_validators, not_modified
+from api.executors import db_executors
+from api.formats import negotiate_format, frame_response, frames_response
+from api.responses import FastJSONResponse
+from api.schemas import CompanyInput, ValuationInput, PredictabilityInput, BatchDecodeError, decode_batch, BATCH_OPENAPI
+from api.telemetry import stage
+from api.jobs import job_manager, job_queue, job_events
+from api.materialized import valuations, portfolio_valuations, geo_index, region_rollups
+from lib.regions import REGION_LEVELS
 
 from lib.valuation import DCF_automated, classify_by_growth
 from lib.metrics import calculate_metrics_from_dataset, get_sector_percentiles, get_percentile_position
 from lib.predictability import predictability_decision_tree
+from lib.batch import run_batch
+from lib.screening import RANK_FIELDS
+from lib.lazy import lazy_import
+
+pd = lazy_import("pandas")
 
 logger = logging.getLogger(__name__)
 
@@ -49,50 +66,141 @@ async def health_check():
 # ============================================================================
 
 @router.get("/data/all")
-async def get_all_data():
+async def get_all_data(request: Request, fmt: Optional[str] = Query(None, alias="format")):
     """Load all data (dataset, wacc, portfolio, contacts)"""
+    output_format = negotiate_format(request.headers.get("accept"), fmt)
     try:
         data = await load_all_data()
         
-        # Convert DataFrames to JSON-serializable dicts
-        response = {
-            "dataset": data["dataset"].to_dict(orient="records") if data["dataset"] is not None else None,
-            "wacc": data["wacc"].to_dict(orient="records") if data["wacc"] is not None else None,
-            "portfolio": data["portfolio"].to_dict(orient="records") if data["portfolio"] is not None else None,
-            "contacts": data["contacts"].to_dict(orient="records") if data["contacts"] is not None else None,
-        }
+        headers = cache_validators({key: table_cache.version(key) for key in data}, output_format)
+        cached = not_modified(request, headers)
+        if cached is not None:
+            return cached
         
-        return {"status": "success", "data": response}
+        if output_format != "json":
+            return frames_response(data, output_format, headers=headers)
+        
+        # DataFrames are encoded as row records by FastJSONResponse
+        return FastJSONResponse({"status": "success", "data": data}, headers=headers)
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error loading data: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to load data: {str(e)}")
 
 
 @router.get("/data/dataset")
-async def get_dataset():
+async def get_dataset(request: Request, fmt: Optional[str] = Query(None, alias="format")):
     """Load companies dataset"""
+    output_format = negotiate_format(request.headers.get("accept"), fmt)
     try:
         df = await load_dataset()
         if df is None:
             raise HTTPException(status_code=404, detail="Dataset not found")
-        return {"status": "success", "data": df.to_dict(orient="records")}
+        headers = cache_validators({"dataset": table_cache.version("dataset")}, output_format)
+        cached = not_modified(request, headers)
+        if cached is not None:
+            return cached
+        if output_format != "json":
+            return frame_response(df, output_format, headers=headers)
+        return FastJSONResponse({"status": "success", "data": df}, headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.get("/data/wacc")
-async def get_wacc():
+async def get_wacc(request: Request, fmt: Optional[str] = Query(None, alias="format")):
     """Load WACC map"""
+    output_format = negotiate_format(request.headers.get("accept"), fmt)
     try:
         df = await load_wacc_map()
         if df is None:
             raise HTTPException(status_code=404, detail="WACC data not found")
-        return {"status": "success", "data": df.to_dict(orient="records")}
+        headers = cache_validators({"wacc": table_cache.version("wacc")}, output_format)
+        cached = not_modified(request, headers)
+        if cached is not None:
+            return cached
+        if output_format != "json":
+            return frame_response(df, output_format, headers=headers)
+        return FastJSONResponse({"status": "success", "data": df}, headers=headers)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# ============================================================================
+# STREAMING DATA ENDPOINTS (NDJSON, one page in memory at a time)
+# ============================================================================
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_TABLES = ["dataset", "wacc", "portfolio", "contacts"]
+
+
+def _ndjson_line(obj) -> bytes:
+    return (json.dumps(obj, separators=(",", ":"), default=str) + "\n").encode()
+
+
+STREAM_CONTROL_KEY = "__stream__"  # marks trailer/error lines apart from row objects
+
+
+async def _stream_table_rows(table_key: str, page_size: int):
+    """
+    One JSON object per row, straight from the paginated loader.
+    The last line is always a control record: {"__stream__": "done", "count": n}
+    or {"__stream__": "error", "count": n, "detail": ...}; a stream without one was cut off.
+    """
+    count = 0
+    try:
+        async for page in iter_table_pages(TABLES[table_key], page_size):
+            count += len(page)
+            yield b"".join(_ndjson_line(row) for row in page)
+    except Exception as e:
+        logger.error(f"Streaming {table_key} failed: {str(e)}")
+        yield _ndjson_line({STREAM_CONTROL_KEY: "error", "table": table_key, "count": count, "detail": str(e)})
+        return
+    yield _ndjson_line({STREAM_CONTROL_KEY: "done", "table": table_key, "count": count})
+
+
+async def _stream_all_tables(page_size: int):
+    """
+    Table by table, page by page:
+    table_start -> rows (one line per page) -> table_end, then done
+    """
+    for table_key in STREAM_TABLES:
+        yield _ndjson_line({"event": "table_start", "table": table_key})
+        count = 0
+        page_index = 0
+        try:
+            async for page in iter_table_pages(TABLES[table_key], page_size):
+                count += len(page)
+                yield _ndjson_line({"event": "rows", "table": table_key, "page": page_index, "data": page})
+                page_index += 1
+        except Exception as e:
+            logger.error(f"Streaming {table_key} failed: {str(e)}")
+            yield _ndjson_line({"event": "error", "table": table_key, "detail": str(e)})
+            continue
+        yield _ndjson_line({"event": "table_end", "table": table_key, "count": count})
+    yield _ndjson_line({"event": "done"})
+
+
+@router.get("/data/all/stream")
+async def stream_all_data(page_size: int = Query(PAGE_SIZE, ge=1, le=PAGE_SIZE)):
+    """Stream all tables as NDJSON events (bounded memory)"""
+    db_executors["bulk"].check()  # shed load with a 503 before the 200 goes out
+    return StreamingResponse(_stream_all_tables(page_size), media_type=NDJSON_MEDIA_TYPE)
+
+
+@router.get("/data/dataset/stream")
+async def stream_dataset(page_size: int = Query(PAGE_SIZE, ge=1, le=PAGE_SIZE)):
+    """Stream companies dataset as NDJSON, one company per line"""
+    db_executors["bulk"].check()
+    return StreamingResponse(_stream_table_rows("dataset", page_size), media_type=NDJSON_MEDIA_TYPE)
+
+
 # ============================================================================
 # SEARCH ENDPOINTS
 # ============================================================================
@@ -107,7 +215,9 @@ async def search_companies_endpoint(
         df = await search_companies(query, limit)
         if df is None or df.empty:
             return {"status": "success", "data": [], "count": 0}
-        return {"status": "success", "data": df.to_dict(orient="records"), "count": len(df)}
+        return FastJSONResponse({"status": "success", "data": df, "count": len(df)})
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -119,7 +229,7 @@ async def get_company_endpoint(company_id: str):
         company = await get_company_by_id(company_id)
         if company is None:
             raise HTTPException(status_code=404, detail="Company not found")
-        return {"status": "success", "data": company}
+        return FastJSONResponse({"status": "success", "data": company})
     except HTTPException:
         raise
     except Exception as e:
@@ -131,10 +241,10 @@ async def get_company_endpoint(company_id: str):
 # ============================================================================
 
 @router.post("/analysis/frame1")
-async def frame1_analysis_endpoint(company_data: Dict):
+async def frame1_analysis_endpoint(company: CompanyInput):
     """
     Frame 1: Financial Metrics Analysis
-    Input: company_data with company info
+    Input: company with company info
     Output: Metrics, sector comparison, percentiles
     """
     try:
@@ -145,18 +255,19 @@ async def frame1_analysis_endpoint(company_data: Dict):
         if dataset is None or waccmap is None:
             raise HTTPException(status_code=500, detail="Required data not available")
         
-        company_row = pd.Series(company_data)
+        company_row = company.to_series()
         
-        # Calculate metrics
-        company_metrics = calculate_metrics_from_dataset(company_row)
-        
-        # Get sector percentiles
-        category_code = str(company_data.get('category_code'))
-        sector_percentiles = get_sector_percentiles(category_code, waccmap)
+        with stage("compute"):
+            # Calculate metrics
+            company_metrics = calculate_metrics_from_dataset(company_row)
+            
+            # Get sector percentiles
+            category_code = company.category_code
+            sector_percentiles = get_sector_percentiles(category_code, waccmap)
         
         # Build response
         response = {
-            "company_name": company_data.get('company'),
+            "company_name": company.company,
             "category_code": category_code,
             "metrics": company_metrics,
             "sector_percentiles": sector_percentiles,
@@ -164,30 +275,33 @@ async def frame1_analysis_endpoint(company_data: Dict):
         }
         
         # Calculate positions for each metric
-        for metric in ['ltde', 'edamargin', 'fx']:
-            if metric in company_metrics:
-                position, rank, range_str = get_percentile_position(
-                    company_metrics[metric],
-                    sector_percentiles.get(metric, {})
-                )
-                response["positions"][metric] = {
-                    "position": position,
-                    "rank": rank,
-                    "range": range_str
-                }
+        with stage("compute"):
+            for metric in ['ltde', 'edamargin', 'fx']:
+                if metric in company_metrics:
+                    position, rank, range_str = get_percentile_position(
+                        company_metrics[metric],
+                        sector_percentiles.get(metric, {})
+                    )
+                    response["positions"][metric] = {
+                        "position": position,
+                        "rank": rank,
+                        "range": range_str
+                    }
         
-        return {"status": "success", "data": response}
+        return FastJSONResponse({"status": "success", "data": response})
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Frame 1 error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/analysis/frame2")
-async def frame2_valuation_endpoint(company_data: Dict):
+async def frame2_valuation_endpoint(company: ValuationInput):
     """
     Frame 2: DCF Valuation Analysis
-    Input: company_data with financial information
+    Input: company with financial information
     Output: DCF valuation, growth rates, parameters
     """
     try:
@@ -196,67 +310,64 @@ async def frame2_valuation_endpoint(company_data: Dict):
         if waccmap is None:
             raise HTTPException(status_code=500, detail="WACC data not available")
         
-        company_row = pd.Series(company_data)
-        
-        # Run DCF
-        dcf_result = DCF_automated(company_row, waccmap)
+        company_row = company.to_series()
         
-        # Classify by growth
-        classification = classify_by_growth(dcf_result['growth_expected'])
+        with stage("compute"):
+            # Run DCF
+            dcf_result = DCF_automated(company_row, waccmap)
+            
+            # Classify by growth
+            classification = classify_by_growth(dcf_result['growth_expected'])
         
+        # NumPy scalars and NaN are handled by FastJSONResponse (NaN -> null)
         response = {
-            "company_name": company_data.get('company'),
-            "EV_current": float(dcf_result['EV_current']),
-            "EV_DCF": float(dcf_result['EV_DCF']),
-            "growth_expected": float(dcf_result['growth_expected']),
+            "company_name": company.company,
+            "EV_current": dcf_result['EV_current'],
+            "EV_DCF": dcf_result['EV_DCF'],
+            "growth_expected": dcf_result['growth_expected'],
             "classification": classification,
             "parameters": {
-                "Re": float(dcf_result['params']['re']) if not pd.isna(dcf_result['params']['re']) else None,
-                "Rd": float(dcf_result['params']['rd']) if not pd.isna(dcf_result['params']['rd']) else None,
-                "WACC": float(dcf_result['params']['wacc']) if not pd.isna(dcf_result['params']['wacc']) else None,
-                "g": float(dcf_result['params']['g']) if not pd.isna(dcf_result['params']['g']) else None,
+                "Re": dcf_result['params']['re'],
+                "Rd": dcf_result['params']['rd'],
+                "WACC": dcf_result['params']['wacc'],
+                "g": dcf_result['params']['g'],
             },
-            "FCF0": float(dcf_result['FCF0']),
-            "Terminal_Value": float(dcf_result['TV'])
+            "FCF0": dcf_result['FCF0'],
+            "Terminal_Value": dcf_result['TV']
         }
         
-        return {"status": "success", "data": response}
+        return FastJSONResponse({"status": "success", "data": response})
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Frame 2 error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @router.post("/analysis/frame3")
-async def frame3_predictability_endpoint(analysis_data: Dict):
+async def frame3_predictability_endpoint(inputs: PredictabilityInput):
     """
     Frame 3: Predictability Classification
     Input: ev_growth, nsellside, ceo_age, revenue, edamargin, etc.
     Output: Decision tree classification
     """
     try:
-        # Extract parameters
-        ev_growth = analysis_data.get('ev_growth', 0)
-        nsellside = analysis_data.get('nsellside', float('nan'))
-        nsellside_p50 = analysis_data.get('nsellside_p50', float('nan'))
-        ceo_age = analysis_data.get('ceo_age')
-        revenue = analysis_data.get('revenue', float('nan'))
-        edamargin = analysis_data.get('edamargin', float('nan'))
-        edamargin_p75 = analysis_data.get('edamargin_p75', float('nan'))
-        
         # Run decision tree
-        leaf_value, category, path = predictability_decision_tree(
-            ev_growth, nsellside, nsellside_p50, ceo_age, revenue, edamargin, edamargin_p75
-        )
+        with stage("compute"):
+            leaf_value, category, path = predictability_decision_tree(
+                inputs.ev_growth, inputs.nsellside, inputs.nsellside_p50, inputs.ceo_age,
+                inputs.revenue, inputs.edamargin, inputs.edamargin_p75
+            )
         
         response = {
-            "company_name": analysis_data.get('company_name'),
+            "company_name": inputs.company_name,
             "leaf_value": leaf_value,
             "category": category,
             "decision_path": path
         }
         
-        return {"status": "success", "data": response}
+        return FastJSONResponse({"status": "success", "data": response})
     
     except Exception as e:
         logger.error(f"Frame 3 error: {str(e)}")
@@ -267,39 +378,315 @@ async def frame3_predictability_endpoint(analysis_data: Dict):
 # BATCH ANALYSIS ENDPOINT
 # ============================================================================
 
-@router.post("/analysis/batch")
-async def batch_analysis(companies_data: List[Dict]):
+@router.post("/analysis/batch", openapi_extra=BATCH_OPENAPI)
+async def batch_analysis(
+    request: Request,
+    fmt: Optional[str] = Query(None, alias="format")
+):
     """
     Run Frame 1-3 analysis on multiple companies
-    Returns DCF valuations, growth classifications, predictability
+    Body: a list of companies, or one array per field ({"company": [...], "ebit": [...]})
+    Returns metrics, percentile positions, DCF valuations, growth classifications
+    and predictability; companies that cannot be analyzed come back in "errors"
     """
+    output_format = negotiate_format(request.headers.get("accept"), fmt)
     try:
+        body = await request.body()
+        with stage("convert"):
+            try:
+                companies = decode_batch(body)
+            except BatchDecodeError as e:
+                raise HTTPException(status_code=422, detail=str(e))
+        
         waccmap = await load_wacc_map()
         if waccmap is None:
             raise HTTPException(status_code=500, detail="WACC data not available")
         
-        results = []
+        # Vectorized kernels off the event loop (process pool for very large batches)
+        with stage("compute"):
+            results, errors = await asyncio.to_thread(
+                run_batch, companies, waccmap, BATCH_WORKERS, BATCH_PROCESS_THRESHOLD
+            )
+        if errors:
+            logger.warning(f"Batch analysis: {len(errors)} of {len(companies)} companies failed")
         
-        for company_data in companies_data:
-            try:
-                company_row = pd.Series(company_data)
-                
-                # Frame 2: DCF
-                dcf_result = DCF_automated(company_row, waccmap)
-                classification = classify_by_growth(dcf_result['growth_expected'])
-                
-                results.append({
-                    "company": company_data.get('company'),
-                    "EV_DCF": float(dcf_result['EV_DCF']),
-                    "growth_expected": float(dcf_result['growth_expected']),
-                    "classification": classification
-                })
-            except Exception as e:
-                logger.warning(f"Failed to analyze {company_data.get('company')}: {str(e)}")
-                continue
+        if output_format != "json":
+            return frame_response(results, output_format, count=len(results), errors=errors)
         
-        return {"status": "success", "count": len(results), "data": results}
+        return FastJSONResponse({"status": "success", "count": len(results), "data": results, "errors": errors})
     
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Batch analysis error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============================================================================
+# SCREENING ENDPOINTS (precomputed valuations)
+# ============================================================================
+
+@router.get("/screening/top")
+async def top_companies_endpoint(
+    by: str = Query("growth_expected"),
+    k: int = Query(20, ge=1, le=1000),
+    category_code: Optional[str] = Query(None),
+    classification: Optional[str] = Query(None),
+    order: str = Query("desc", pattern="^(asc|desc)$")
+):
+    """
+    Top-k companies by growth_expected, EV_DCF, EV_current, ltde or edamargin
+    Optional filters: category_code (sector) and classification (e.g. "Top Pick")
+    """
+    if by not in RANK_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid field: {by}. Must be one of: {list(RANK_FIELDS)}")
+    try:
+        ranking, version = await valuations.ranking()
+        if ranking is None:
+            raise HTTPException(status_code=503, detail="Valuation data not available")
+        
+        top = ranking.top_k_frame(
+            by, k,
+            category_code=category_code,
+            classification=classification,
+            ascending=(order == "asc")
+        )
+        return FastJSONResponse({"status": "success", "count": len(top), "version": version, "data": top})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Screening error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/peers/{company_id}")
+async def company_peers_endpoint(company_id: str, k: int = Query(20, ge=1, le=200)):
+    """
+    The k companies most similar to company_id within its category_code
+    (LTDE, EDAMARGIN, FX, revenue, employees; robust-scaled per sector)
+    """
+    try:
+        index, version = await valuations.peers()
+        if index is None:
+            raise HTTPException(status_code=503, detail="Valuation data not available")
+        
+        key = int(company_id) if company_id.isdigit() else company_id
+        found = index.query(key, k)
+        if found is None:
+            raise HTTPException(status_code=404, detail="Company not found")
+        target, peers = found
+        return FastJSONResponse({
+            "status": "success",
+            "version": version,
+            "company": target,
+            "category_code": index.sector_of(key),
+            "count": len(peers),
+            "data": peers,
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Peer search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============================================================================
+# SECTOR DISTRIBUTION ENDPOINTS
+# ============================================================================
+
+@router.get("/sectors/{category_code}/distribution")
+async def sector_distribution_endpoint(
+    category_code: str,
+    bins: Optional[int] = Query(None, ge=1, le=100, description="Equal-width bins over p10-p90 instead of the percentile cuts")
+):
+    """Histograms and summary stats of LTDE, EDAMARGIN, FX, growth_expected and predictability leaves"""
+    try:
+        report, version = await valuations.distribution(category_code, bins)
+        if version is None:
+            raise HTTPException(status_code=503, detail="Dataset or WACC data not available")
+        if report is None:
+            raise HTTPException(status_code=404, detail=f"No companies in sector {category_code}")
+
+        return FastJSONResponse({"status": "success", "version": version, **report})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Sector distribution error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============================================================================
+# GEOSPATIAL ENDPOINTS (contacts latitude/longitude)
+# ============================================================================
+
+@router.get("/geo/radius")
+async def geo_radius_endpoint(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(..., gt=0, le=2000),
+    limit: int = Query(100, ge=1, le=5000)
+):
+    """Companies within radius_km of a point, nearest first, joined to valuations"""
+    try:
+        index, points, version = await geo_index.get()
+        if index is None:
+            raise HTTPException(status_code=503, detail="Location data not available")
+        positions, distances = index.radius(lat, lon, radius_km)
+        data = points.iloc[positions[:limit]].assign(distance_km=distances[:limit])
+        return FastJSONResponse({
+            "status": "success", "version": version, "total": len(positions), "count": len(data), "data": data
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Radius search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/geo/bbox")
+async def geo_bbox_endpoint(
+    min_lat: float = Query(..., ge=-90, le=90),
+    max_lat: float = Query(..., ge=-90, le=90),
+    min_lon: float = Query(..., ge=-180, le=180),
+    max_lon: float = Query(..., ge=-180, le=180),
+    limit: int = Query(1000, ge=1, le=50000)
+):
+    """Companies inside a bounding box, joined to valuations"""
+    try:
+        index, points, version = await geo_index.get()
+        if index is None:
+            raise HTTPException(status_code=503, detail="Location data not available")
+        positions = index.bbox(min_lat, max_lat, min_lon, max_lon)
+        data = points.iloc[positions[:limit]]
+        return FastJSONResponse({
+            "status": "success", "version": version, "total": len(positions), "count": len(data), "data": data
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Bounding box search error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============================================================================
+# REGIONAL ROLL-UP ENDPOINTS
+# ============================================================================
+
+@router.get("/regions/{level}")
+async def regions_rollup_endpoint(
+    level: str,
+    parent: Optional[str] = Query(None, description="Drill down into a NUTS parent code, e.g. ITC")
+):
+    """Company counts, EV sums, median growth and classification counts per region"""
+    try:
+        if level not in REGION_LEVELS:
+            raise HTTPException(status_code=400, detail=f"Invalid level: {level}. Must be one of: {list(REGION_LEVELS)}")
+
+        cube, version = await region_rollups.get()
+        if cube is None:
+            raise HTTPException(status_code=503, detail="Contacts or valuation data not available")
+
+        try:
+            data = cube.rollup(level, parent)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if data is None:
+            raise HTTPException(status_code=404, detail=f"No {level} data in contacts")
+
+        return FastJSONResponse({
+            "status": "success", "level": level, "parent": parent, "version": version, "count": len(data), "data": data
+        })
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Region roll-up error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============================================================================
+# PORTFOLIO ENDPOINTS
+# ============================================================================
+
+@router.get("/portfolio/{portfolio_id}")
+async def portfolio_valuation_endpoint(portfolio_id: str):
+    """
+    Value every holding of a portfolio (Frame 1-3) and aggregate:
+    total EV_current vs EV_DCF, classification mix, sector exposure,
+    percentile distribution
+    """
+    try:
+        valuation = await portfolio_valuations.get(portfolio_id)
+        if valuation is None:
+            raise HTTPException(status_code=404, detail="Portfolio not found")
+        return FastJSONResponse({"status": "success", "data": valuation})
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Portfolio valuation error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# ============================================================================
+# BATCH JOB ENDPOINTS (batches larger than one request budget)
+# ============================================================================
+
+@router.post("/jobs/batch", status_code=202)
+async def submit_batch_job(companies_data: List[Dict]):
+    """
+    Submit a batch for asynchronous Frame 1-3 analysis
+    Returns a job id; poll /jobs/{job_id} or stream /jobs/{job_id}/events
+    """
+    try:
+        job = await job_manager.submit(companies_data)
+        await job_queue.enqueue(job.job_id)
+        return FastJSONResponse({"status": "success", "data": job.to_dict()}, status_code=202)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Job submit error: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/jobs/{job_id}")
+async def get_batch_job(job_id: str):
+    """Job progress"""
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return FastJSONResponse({"status": "success", "data": job.to_dict()})
+
+
+@router.post("/jobs/{job_id}/advance")
+async def advance_batch_job(job_id: str):
+    """
+    Process as many chunks as fit in this request's time budget
+    (for serverless deployments where the background worker is frozen)
+    """
+    job = await job_manager.advance(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return FastJSONResponse({"status": "success", "data": job.to_dict()})
+
+
+@router.get("/jobs/{job_id}/results")
+async def get_batch_job_results(job_id: str, partial: bool = Query(False)):
+    """Job results; partial=true returns the chunks finished so far"""
+    job = await job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.status != "completed" and not partial:
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}; pass partial=true for finished chunks")
+    data, errors = await job_manager.results(job_id)
+    return FastJSONResponse({
+        "status": "success",
+        "job": job.to_dict(),
+        "count": len(data),
+        "data": data,
+        "errors": errors,
+    })
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_batch_job_events(job_id: str):
+    """Job progress as Server-Sent Events"""
+    return StreamingResponse(job_events(job_manager, job_id), media_type="text/event-stream")
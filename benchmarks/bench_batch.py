@@ -0,0 +1,79 @@
+# benchmarks/bench_batch.py
+"""
+Batch Frame 1-3 throughput at 1k / 10k / 100k companies
+In-process vectorized pipeline vs. process pool fan-out
+
+Usage: python -m benchmarks.bench_batch [workers]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.batch import analyze_companies, run_batch
+
+
+def make_companies(n: int, n_sectors: int = 200, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "company": [f"Company {i}" for i in range(n)],
+        "ebit": rng.normal(5e5, 3e5, n),
+        "revenue": rng.lognormal(15, 1.2, n),
+        "net_income": rng.normal(3e5, 2e5, n),
+        "capex": rng.uniform(0, 2e5, n),
+        "d_and_a": rng.uniform(0, 1e5, n),
+        "changes_in_wc": rng.normal(0, 5e4, n),
+        "lt_debt": rng.uniform(0, 1e6, n),
+        "st_debt": rng.uniform(0, 5e5, n),
+        "sh_equity": rng.uniform(1e4, 2e6, n),
+        "capital_equity": rng.uniform(1e4, 1e5, n),
+        "cash": rng.uniform(0, 3e5, n),
+        "category_code": rng.integers(0, n_sectors, n).astype(str),
+    })
+
+
+def make_waccmap(n_sectors: int = 200, seed: int = 42) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    wacc = pd.DataFrame({
+        "category_code": np.arange(n_sectors).astype(str),
+        "re": rng.uniform(0.08, 0.14, n_sectors),
+        "rd": rng.uniform(0.03, 0.06, n_sectors),
+        "wacc": rng.uniform(0.06, 0.11, n_sectors),
+        "g": rng.uniform(0.0, 0.03, n_sectors),
+        "nsellside": rng.integers(1, 10, n_sectors),
+        "nsellside50th": rng.integers(1, 10, n_sectors),
+    })
+    for prefix, scale in (("ltde", 1.0), ("edamarg", 0.1), ("fx", 0.3)):
+        base = rng.uniform(0.1, 0.3, n_sectors) * scale
+        for step, suffix in enumerate(("10th", "25th", "50th", "75th", "90th")):
+            wacc[prefix + suffix] = base * (1 + step)
+    return wacc
+
+
+def best_of(fn, repeat: int = 3) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    waccmap = make_waccmap()
+    print(f"{'companies':>10}  {'in-process':>12}  {f'{workers}-proc pool':>14}  {'rows/s (in-process)':>20}")
+    for n in (1_000, 10_000, 100_000):
+        companies = make_companies(n)
+        single = best_of(lambda: analyze_companies(companies, waccmap))
+        pooled = best_of(lambda: run_batch(companies, waccmap, workers=workers, process_threshold=0, chunk_size=max(n // workers, 1)))
+        print(f"{n:>10,}  {single * 1000:>10.1f}ms  {pooled * 1000:>12.1f}ms  {n / single:>20,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+# benchmarks/bench_batch_decode.py
+"""
+Batch request decoding at 1k / 10k / 50k companies
+Previous path (json -> list of dicts -> pd.DataFrame) vs. api.schemas.decode_batch
+on the row payload and on the columnar payload
+
+Usage: python -m benchmarks.bench_batch_decode
+"""
+
+import json
+import os
+import sys
+
+import orjson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_batch import make_companies, best_of
+from api.schemas import decode_batch
+
+
+def main():
+    import pandas as pd
+
+    print(f"{'companies':>10}  {'dicts->DataFrame':>17}  {'decode rows':>12}  {'decode columns':>15}")
+    for n in (1_000, 10_000, 50_000):
+        companies = make_companies(n)
+        rows = orjson.dumps(companies.to_dict(orient="records"))
+        columns = orjson.dumps({c: companies[c].tolist() for c in companies.columns})
+        previous = best_of(lambda: pd.DataFrame(json.loads(rows)))
+        decoded_rows = best_of(lambda: decode_batch(rows))
+        decoded_columns = best_of(lambda: decode_batch(columns))
+        print(f"{n:>10,}  {previous * 1000:>15.1f}ms  {decoded_rows * 1000:>10.1f}ms  {decoded_columns * 1000:>13.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/bench_geo.py
+"""
+Geo radius / bounding-box latency on synthetic Italy-scale contacts
+Grid index vs. a full haversine scan
+
+Usage: python -m benchmarks.bench_geo [n_points]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lib.geo import GeoGridIndex, haversine_km
+
+CITIES = [(45.46, 9.19), (41.90, 12.50), (40.85, 14.27), (45.07, 7.69), (44.49, 11.34), (38.12, 13.36)]
+
+
+def make_points(n: int, seed: int = 42):
+    """Half clustered around large cities, half uniform over the Italy bounding box"""
+    rng = np.random.default_rng(seed)
+    clustered = n // 2
+    centres = np.array(CITIES)[rng.integers(0, len(CITIES), clustered)]
+    lats = np.concatenate([centres[:, 0] + rng.normal(0, 0.3, clustered), rng.uniform(36, 47, n - clustered)])
+    lons = np.concatenate([centres[:, 1] + rng.normal(0, 0.3, clustered), rng.uniform(6, 19, n - clustered)])
+    return lats, lons
+
+
+def median_ms(fn, repeat: int = 50) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)) * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    lats, lons = make_points(n)
+
+    start = time.perf_counter()
+    index = GeoGridIndex(lats, lons)
+    print(f"{n:,} points, index built in {(time.perf_counter() - start) * 1000:.0f} ms")
+
+    lat, lon = CITIES[0]
+    scan = median_ms(lambda: np.flatnonzero(haversine_km(lat, lon, lats, lons) <= 10), repeat=5)
+    print(f"{'query':>24}  {'hits':>8}  {'grid':>10}  {'full scan':>10}")
+    for radius_km in (1, 10, 50):
+        hits = len(index.radius(lat, lon, radius_km)[0])
+        grid = median_ms(lambda: index.radius(lat, lon, radius_km))
+        print(f"{f'radius {radius_km} km':>24}  {hits:>8,}  {grid:>8.2f}ms  {scan:>8.1f}ms")
+    for half in (0.1, 0.5):
+        box = (lat - half, lat + half, lon - half, lon + half)
+        hits = len(index.bbox(*box))
+        grid = median_ms(lambda: index.bbox(*box))
+        print(f"{f'bbox ±{half} deg':>24}  {hits:>8,}  {grid:>8.2f}ms  {'':>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# benchmarks/bench_lib.py
+"""
+lib/ hot-path microbenchmarks with JSON baselines and regression check
+Per-call cost of the scalar Frame 1-3 functions (what /analysis/frame1-3
+run per request) plus the vectorized batch pipeline, on generated data at
+1k / 10k / 100k companies and 50 / 500 sectors
+
+Usage:
+    python -m benchmarks.bench_lib                      run and print
+    python -m benchmarks.bench_lib --save               write benchmarks/baselines/lib.json
+    python -m benchmarks.bench_lib --compare            exit 1 on a regression vs. the baseline
+    python -m benchmarks.bench_lib --quick --compare    1k / 10k only
+
+Baselines are machine-specific: refresh them with --save on the machine
+(or CI runner class) that runs --compare.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import SIZES, SECTOR_COUNTS, make_dataset
+from lib.batch import analyze_companies
+from lib.metrics import calculate_metrics_from_dataset, get_percentile_position, get_sector_percentiles
+from lib.predictability import predictability_decision_tree
+from lib.valuation import DCF_automated
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines", "lib.json")
+CALLS_PER_ROUND = 500   # scalar calls timed per round (rows sampled from the dataset)
+ROUNDS = 7
+THRESHOLD = 0.25        # fail when the best round is more than 25% above baseline ...
+NOISE_FLOOR_US = 1.0    # ... and by more than this in absolute terms
+
+
+def _rounds(fn, args_list, rounds: int = ROUNDS):
+    """Median / min per-call microseconds over `rounds` passes through args_list"""
+    per_call = []
+    for _ in range(rounds):
+        start = time.perf_counter_ns()
+        for args in args_list:
+            fn(*args)
+        per_call.append((time.perf_counter_ns() - start) / len(args_list) / 1000)
+    return {"median_us": statistics.median(per_call), "min_us": min(per_call), "calls": len(args_list)}
+
+
+def run_case(n_companies: int, n_sectors: int, seed: int = 42) -> dict:
+    companies, waccmap = make_dataset(n_companies, n_sectors, seed=seed)
+    rng = np.random.default_rng(seed)
+    rows = [companies.iloc[i] for i in rng.choice(n_companies, size=min(CALLS_PER_ROUND, n_companies), replace=False)]
+
+    metrics = [calculate_metrics_from_dataset(row) for row in rows]
+    percentiles = {code: get_sector_percentiles(code, waccmap) for code in {str(r["category_code"]) for r in rows}}
+    tree_args = [
+        (rng.normal(0.2, 0.3), row["nsellside"], 5.0, row["ceo_age"], row["revenue"], m["edamargin"], 0.15)
+        for row, m in zip(rows, metrics)
+    ]
+
+    results = {
+        "DCF_automated": _rounds(DCF_automated, [(row, waccmap) for row in rows]),
+        "calculate_metrics_from_dataset": _rounds(calculate_metrics_from_dataset, [(row,) for row in rows]),
+        "get_sector_percentiles": _rounds(get_sector_percentiles, [(str(row["category_code"]), waccmap) for row in rows]),
+        "get_percentile_position": _rounds(
+            get_percentile_position,
+            [(m["ltde"], percentiles[str(row["category_code"])].get("ltde", {})) for row, m in zip(rows, metrics)]
+        ),
+        "predictability_decision_tree": _rounds(predictability_decision_tree, tree_args),
+    }
+
+    # Whole-dataset vectorized pipeline, reported per company
+    batch_rounds = 3 if n_companies <= 10_000 else 1
+    timings = []
+    for _ in range(batch_rounds):
+        start = time.perf_counter_ns()
+        analyze_companies(companies, waccmap)
+        timings.append((time.perf_counter_ns() - start) / n_companies / 1000)
+    results["batch.analyze_companies"] = {
+        "median_us": statistics.median(timings), "min_us": min(timings), "calls": n_companies
+    }
+    return results
+
+
+def run_cases(cases) -> dict:
+    """{"<function>[<n>k/<sectors>]": result} for (n_companies, n_sectors) cases"""
+    benchmarks = {}
+    for n, n_sectors in cases:
+        case = f"{n // 1000}k/{n_sectors}"
+        for name, result in run_case(n, n_sectors).items():
+            benchmarks[f"{name}[{case}]"] = result
+            print(f"  {name + f'[{case}]':<48} {result['median_us']:>10.2f} us/call")
+    return benchmarks
+
+
+def _case_of(name: str):
+    n, n_sectors = name[name.index("[") + 1:-1].split("k/")
+    return int(n) * 1000, int(n_sectors)
+
+
+def run_suite(quick: bool = False) -> dict:
+    sizes = [s for s in SIZES if not quick or s <= 10_000]
+    benchmarks = run_cases([(n, n_sectors) for n in sizes for n_sectors in SECTOR_COUNTS])
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "benchmarks": benchmarks,
+    }
+
+
+def compare(current: dict, baseline: dict, threshold: float = THRESHOLD) -> list:
+    """
+    Names of benchmarks slower than baseline by > threshold (and > NOISE_FLOOR_US).
+    Compares the fastest round, which is far less sensitive to scheduler noise than the median.
+    """
+    regressions = []
+    print(f"\n  {'benchmark':<48} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name, result in current["benchmarks"].items():
+        reference = baseline["benchmarks"].get(name)
+        if reference is None:
+            continue
+        before, after = reference["min_us"], result["min_us"]
+        change = after / before - 1 if before else 0.0
+        regressed = change > threshold and after - before > NOISE_FLOOR_US
+        flag = "  ❌" if regressed else ""
+        print(f"  {name:<48} {before:>10.2f} {after:>10.2f} {change:>+7.0%}{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--save", nargs="?", const=BASELINE_PATH, help="write results as the baseline")
+    parser.add_argument("--compare", nargs="?", const=BASELINE_PATH, help="compare against a baseline")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--quick", action="store_true", help="skip the 100k-company cases")
+    args = parser.parse_args()
+
+    current = run_suite(quick=args.quick)
+
+    if args.save:
+        os.makedirs(os.path.dirname(args.save), exist_ok=True)
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2, sort_keys=True)
+        print(f"✅ Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            # Confirm before failing: re-run the affected cases and keep the better round
+            print(f"⚠️ Re-running {len(regressions)} suspected regression(s)")
+            cases = sorted({_case_of(name) for name in regressions})
+            for name, result in run_cases(cases).items():
+                if result["min_us"] < current["benchmarks"][name]["min_us"]:
+                    current["benchmarks"][name] = result
+            regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"❌ {len(regressions)} benchmark(s) regressed more than {args.threshold:.0%}")
+            return 1
+        print("✅ No regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,85 @@
+# benchmarks/bench_serialization.py
+"""
+Serialization benchmark: 10k-company batch response
+Compares the old path (float()/pd.isna() per field + starlette JSONResponse)
+with FastJSONResponse (orjson, NumPy-native, NaN -> null)
+
+Usage: python -m benchmarks.bench_serialization [n_companies]
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from fastapi.responses import JSONResponse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.responses import FastJSONResponse
+
+
+def make_batch_results(n: int, seed: int = 42) -> list:
+    """Raw per-company results as the routes produce them (NumPy scalars, some NaN)"""
+    rng = np.random.default_rng(seed)
+    ev_dcf = rng.lognormal(14, 1.5, n)
+    growth = rng.normal(0.1, 0.4, n)
+    growth[rng.random(n) < 0.05] = np.nan
+    wacc = rng.uniform(0.05, 0.12, n)
+    return [
+        {
+            "company": f"Company {i}",
+            "EV_DCF": ev_dcf[i],
+            "growth_expected": growth[i],
+            "classification": "Good Deal",
+            "params": {"re": wacc[i] + 0.02, "rd": np.nan, "wacc": wacc[i], "g": np.float64(0.02)},
+        }
+        for i in range(n)
+    ]
+
+
+def old_path(results: list) -> bytes:
+    """What the routes did before: convert every number by hand, then json.dumps"""
+    converted = [
+        {
+            "company": r["company"],
+            "EV_DCF": float(r["EV_DCF"]) if not pd.isna(r["EV_DCF"]) else None,
+            "growth_expected": float(r["growth_expected"]) if not pd.isna(r["growth_expected"]) else None,
+            "classification": r["classification"],
+            "params": {
+                k: float(v) if not pd.isna(v) else None for k, v in r["params"].items()
+            },
+        }
+        for r in results
+    ]
+    return JSONResponse({"status": "success", "count": len(converted), "data": converted}).body
+
+
+def new_path(results: list) -> bytes:
+    return FastJSONResponse({"status": "success", "count": len(results), "data": results}).body
+
+
+def bench(fn, payload, repeat: int = 5) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(payload)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    results = make_batch_results(n)
+
+    old_s = bench(old_path, results)
+    new_s = bench(new_path, results)
+    print(f"Batch response, {n:,} companies (best of 5)")
+    print(f"  old path  (float/isna + JSONResponse): {old_s * 1000:8.1f} ms  {len(old_path(results)):,} bytes")
+    print(f"  new path  (FastJSONResponse):          {new_s * 1000:8.1f} ms  {len(new_path(results)):,} bytes")
+    print(f"  speedup: {old_s / new_s:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/check_import_time.py
+"""
+Cold-start import budget for api.app (python -X importtime)
+Fails (exit 1) if importing the app pulls in a deferred heavy module or
+its median cumulative import time exceeds the budget
+
+Usage: python -m benchmarks.check_import_time [budget_ms] [runs]
+Enforced in the test suite by tests/test_import_time.py
+"""
+
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported on first use, never at cold start (see lib.lazy)
+DEFERRED_MODULES = ("numpy", "pandas", "supabase", "postgrest", "pyarrow")
+
+# Median ~540 ms on one core, ~400 ms of it fastapi; eager imports measured ~1,540 ms
+DEFAULT_BUDGET_MS = 800
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def measure_import(module: str = "api.app") -> dict:
+    """{module name: cumulative microseconds} for one fresh interpreter"""
+    env = {
+        "NEXT_PUBLIC_SUPABASE_URL": "http://localhost",
+        "NEXT_PUBLIC_SUPABASE_ANON_KEY": "import-time-check",
+        **os.environ,
+    }
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    timings = {}
+    for line in completed.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            timings[match.group(4)] = int(match.group(2))
+    return timings
+
+
+def main() -> int:
+    budget_ms = float(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_BUDGET_MS
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    measure_import()  # warm the bytecode cache so runs compare like with like
+    samples = [measure_import() for _ in range(runs)]
+    median_ms = statistics.median(s["api.app"] for s in samples) / 1000
+
+    top = sorted(samples[-1].items(), key=lambda item: item[1], reverse=True)
+    leaked = sorted(m for m in DEFERRED_MODULES if m in samples[-1])
+
+    print(f"api.app import: median {median_ms:.0f} ms over {runs} runs (budget {budget_ms:.0f} ms)")
+    print("slowest top-level imports:")
+    for name, micros in [item for item in top if "." not in item[0]][:8]:
+        print(f"  {name:<24} {micros / 1000:>8.1f} ms")
+
+    failed = False
+    if leaked:
+        print(f"❌ deferred modules imported at startup: {', '.join(leaked)}")
+        failed = True
+    if median_ms > budget_ms:
+        print(f"❌ import time over budget by {median_ms - budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("✅ import budget OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+# benchmarks/datagen.py
+"""
+Seeded synthetic companies_dataset / sector_wacc_map generator
+Shapes follow the real tables: skewed sector sizes, lognormal revenue,
+sector-level margins and leverage, a few missing values, and sector
+percentiles computed from the generated companies themselves
+
+Usage: python -m benchmarks.datagen <n_companies> <n_sectors> [out_dir]
+"""
+
+import os
+import sys
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+SIZES = (1_000, 10_000, 100_000)
+SECTOR_COUNTS = (50, 500)
+NULLABLE_COLUMNS = ("ebit", "d_and_a", "capex", "changes_in_wc", "lt_debt", "st_debt", "cash", "employees")
+
+
+def sector_codes(n_sectors: int) -> np.ndarray:
+    """NACE-like 4-digit category codes"""
+    return np.array([f"{1000 + 17 * i:04d}" for i in range(n_sectors)])
+
+
+def make_dataset(
+    n_companies: int,
+    n_sectors: int = 200,
+    seed: int = 42,
+    missing_rate: float = 0.02
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    (companies_dataset, sector_wacc_map) frames with the production column names.
+
+    Sector sizes are Zipf-like (a few large sectors, a long tail); each sector
+    has its own revenue scale, EBITDA margin and leverage around which
+    companies scatter.
+    """
+    rng = np.random.default_rng(seed)
+    codes = sector_codes(n_sectors)
+
+    weights = 1.0 / np.arange(1, n_sectors + 1) ** 0.8
+    sector = rng.choice(n_sectors, size=n_companies, p=weights / weights.sum())
+
+    # Sector-level parameters
+    revenue_mu = rng.normal(15.0, 1.0, n_sectors)           # median revenue ~3.3M EUR
+    margin_mu = np.clip(rng.normal(0.10, 0.05, n_sectors), -0.05, 0.35)
+    leverage_mu = rng.normal(-0.7, 0.5, n_sectors)          # log LT debt / equity
+
+    revenue = rng.lognormal(revenue_mu[sector], 1.3)
+    ebitda = revenue * (margin_mu[sector] + rng.normal(0, 0.08, n_companies))
+    d_and_a = revenue * rng.uniform(0.02, 0.06, n_companies)
+    ebit = ebitda - d_and_a
+    net_income = np.where(ebit > 0, ebit * rng.uniform(0.5, 0.8, n_companies), ebit * 1.1)
+    sh_equity = revenue * rng.lognormal(-1.0, 0.6, n_companies)
+    lt_debt = sh_equity * rng.lognormal(leverage_mu[sector], 0.8)
+
+    companies = pd.DataFrame({
+        "id": np.arange(1, n_companies + 1),
+        "company": [f"Company {i:07d} S.r.l." for i in range(n_companies)],
+        "nace": codes[sector],
+        "ebit": ebit,
+        "employees": np.maximum(1, revenue / rng.lognormal(12.0, 0.5, n_companies)).round(),
+        "revenue": revenue,
+        "net_income": net_income,
+        "capex": d_and_a * rng.lognormal(0.0, 0.3, n_companies),
+        "d_and_a": d_and_a,
+        "changes_in_wc": revenue * rng.normal(0, 0.02, n_companies),
+        "lt_debt": lt_debt,
+        "st_debt": lt_debt * rng.uniform(0.1, 0.5, n_companies),
+        "sh_equity": sh_equity,
+        "capital_equity": sh_equity * rng.uniform(0.05, 0.3, n_companies),
+        "cash": revenue * rng.uniform(0.02, 0.15, n_companies),
+        "category_code": codes[sector],
+        # portfolio-only fields used by the predictability tree
+        "nsellside": rng.integers(0, 12, n_companies).astype(float),
+        "ceo_age": rng.normal(55, 9, n_companies).round(),
+    })
+    for column in NULLABLE_COLUMNS:
+        companies.loc[rng.random(n_companies) < missing_rate, column] = np.nan
+
+    return companies, make_waccmap(companies, codes, rng)
+
+
+def make_waccmap(companies: pd.DataFrame, codes: np.ndarray, rng: np.random.Generator) -> pd.DataFrame:
+    """Sector rates plus p10-p90 of the sector's own LTDE / EDAMARGIN (FX is synthetic)"""
+    n_sectors = len(codes)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        metrics = pd.DataFrame({
+            "category_code": companies["category_code"],
+            "ltde": companies["lt_debt"] / companies["sh_equity"],
+            "edamarg": (companies["ebit"] + companies["d_and_a"]) / companies["revenue"],
+        })
+
+    re = rng.uniform(0.08, 0.14, n_sectors)
+    rd = rng.uniform(0.03, 0.06, n_sectors)
+    waccmap = pd.DataFrame({
+        "category_code": codes,
+        "re": re,
+        "rd": rd,
+        "wacc": 0.6 * re + 0.4 * rd * (1 - 0.24),  # 24% IRES tax shield
+        "g": rng.uniform(0.0, 0.03, n_sectors),
+    }).set_index("category_code")
+
+    quantiles = [0.10, 0.25, 0.50, 0.75, 0.90]
+    suffixes = ["10th", "25th", "50th", "75th", "90th"]
+    grouped = metrics.groupby("category_code")
+    for metric in ("ltde", "edamarg"):
+        table = grouped[metric].quantile(quantiles).unstack()
+        for q, suffix in zip(quantiles, suffixes):
+            waccmap[metric + suffix] = table[q].reindex(waccmap.index)
+
+    fx_base = rng.uniform(0.10, 0.30, n_sectors)
+    for step, suffix in enumerate(suffixes):
+        waccmap["fx" + suffix] = fx_base * (0.6 + 0.2 * step)
+
+    waccmap["nsellside"] = rng.integers(1, 12, n_sectors).astype(float)
+    waccmap["nsellside50th"] = rng.integers(2, 8, n_sectors).astype(float)
+    return waccmap.reset_index()
+
+
+def _records(frame: pd.DataFrame) -> List[Dict]:
+    """JSON-ready rows: NaN -> None, numpy scalars -> Python"""
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+
+def make_tables(n_companies: int, n_sectors: int = 200, seed: int = 42) -> Dict[str, List[Dict]]:
+    """
+    Rows for every Supabase table the API reads, keyed by table name
+    (companies, sector map, two portfolios, contacts with coordinates)
+    """
+    companies, waccmap = make_dataset(n_companies, n_sectors, seed=seed)
+    rng = np.random.default_rng(seed + 1)
+
+    portfolio = companies.sample(n=min(200, n_companies), random_state=seed).drop(columns=["revenue"])
+    portfolio["portfolio_id"] = rng.choice(["P1", "P2"], size=len(portfolio))
+    portfolio["id"] = np.arange(1, len(portfolio) + 1)
+
+    n_contacts = n_companies // 2
+    owners = companies.iloc[rng.choice(n_companies, size=n_contacts)]
+    nuts3 = rng.integers(0, 100, n_contacts)
+    contacts = pd.DataFrame({
+        "id": np.arange(1, n_contacts + 1),
+        "contact_id": [f"IT{i:09d}" for i in range(n_contacts)],  # BvD id, as imported from IT.csv
+        "company_id": owners["id"].astype(str).to_numpy(),
+        "company_name": owners["company"].to_numpy(),
+        "name": [f"Contact {i}" for i in range(n_contacts)],
+        "role": rng.choice(["CEO", "CFO", "Director", "Shareholder"], size=n_contacts),
+        "ceo": rng.random(n_contacts) < 0.25,
+        "age": rng.normal(55, 9, n_contacts).round(),
+        "nuts1": [f"IT{c // 25}" for c in nuts3],
+        "nuts2": [f"IT{c // 5:02d}" for c in nuts3],
+        "nuts3": [f"IT{c:03d}" for c in nuts3],
+        "latitude": rng.uniform(37.0, 46.5, n_contacts),
+        "longitude": rng.uniform(7.0, 18.0, n_contacts),
+    })
+
+    return {
+        "companies_dataset": _records(companies),
+        "sector_wacc_map": _records(waccmap),
+        "portfolio_companies": _records(portfolio),
+        "contacts": _records(contacts),
+        "financial_data": [],
+        "analysis_cache": [],
+    }
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_sectors = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    out_dir = sys.argv[3] if len(sys.argv) > 3 else "."
+    companies, waccmap = make_dataset(n, n_sectors)
+    companies.to_csv(os.path.join(out_dir, f"companies_{n}.csv"), index=False)
+    waccmap.to_csv(os.path.join(out_dir, f"wacc_{n_sectors}.csv"), index=False)
+    print(f"✅ {len(companies)} companies across {waccmap['category_code'].nunique()} sectors written to {out_dir}")
+
+
+if __name__ == "__main__":
+    main()
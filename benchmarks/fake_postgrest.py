@@ -0,0 +1,361 @@
+# benchmarks/fake_postgrest.py
+"""
+Local PostgREST stand-in for load tests
+Serves /rest/v1/<table> from in-memory rows with the subset of the
+PostgREST protocol api/database and api/import_csv use (select,
+eq/neq/gt/lt/like/ilike/in filters, order, limit/offset, single-object
+responses, exact counts, insert/upsert, delete), plus injected latency
+and errors so the API can be exercised without touching the Supabase
+project.
+
+Usage: python -m benchmarks.fake_postgrest [--port 54321] [--companies 10000] [--latency-ms 20]
+then start the API with NEXT_PUBLIC_SUPABASE_URL=http://127.0.0.1:54321
+"""
+
+import argparse
+import os
+import random
+import re
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional
+from urllib.parse import parse_qsl, urlsplit
+
+import orjson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import make_tables
+
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+SINGLE_OBJECT = "application/vnd.pgrst.object+json"
+
+
+# ============================================================================
+# QUERY EVALUATION
+# ============================================================================
+
+def _like(pattern: str, case_sensitive: bool) -> Callable[[object], bool]:
+    regex = "".join(".*" if c in "%*" else "." if c == "_" else re.escape(c) for c in pattern)
+    compiled = re.compile(f"^{regex}$", 0 if case_sensitive else re.IGNORECASE | re.DOTALL)
+    return lambda value: value is not None and compiled.match(str(value)) is not None
+
+
+def _compare(op: str, operand: str) -> Callable[[object], bool]:
+    def number(value):
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
+    target = number(operand)
+
+    def test(value):
+        if value is None:
+            return False
+        left = number(value)
+        a, b = (left, target) if left is not None and target is not None else (str(value), operand)
+        return {"gt": a > b, "gte": a >= b, "lt": a < b, "lte": a <= b}[op]
+    return test
+
+
+def _filter(expression: str) -> Callable[[object], bool]:
+    """Predicate for a PostgREST filter value such as "eq.42" or "ilike.%acme%" """
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    op, _, operand = expression.partition(".")
+    if op == "eq":
+        test = lambda value: value is not None and _text(value) == operand
+    elif op == "neq":
+        test = lambda value: value is not None and _text(value) != operand
+    elif op in ("gt", "gte", "lt", "lte"):
+        test = _compare(op, operand)
+    elif op in ("like", "ilike"):
+        test = _like(operand, case_sensitive=op == "like")
+    elif op == "is":
+        test = lambda value: (value is None) == (operand == "null")
+    elif op == "in":
+        members = {m.strip('"') for m in operand.strip("()").split(",")}
+        test = lambda value: value is not None and _text(value) in members
+    else:
+        raise ValueError(f"unsupported operator: {op}")
+    return (lambda value: not test(value)) if negate else test
+
+
+def _text(value) -> str:
+    """Values as PostgREST compares them to URL operands (42.0 == "42")"""
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def _sort(rows: List[Dict], order: str) -> List[Dict]:
+    for term in reversed(order.split(",")):
+        column, *modifiers = term.split(".")
+        descending = "desc" in modifiers
+        present = [r for r in rows if r.get(column) is not None]
+        missing = [r for r in rows if r.get(column) is None]
+        present.sort(key=lambda r: r[column], reverse=descending)
+        rows = missing + present if descending else present + missing  # nulls last asc, first desc
+    return rows
+
+
+def _project(rows: List[Dict], select: str) -> List[Dict]:
+    if select in ("", "*"):
+        return rows
+    columns = [c.strip() for c in select.split(",")]
+    return [{c: row.get(c) for c in columns} for row in rows]
+
+
+# ============================================================================
+# HTTP SERVER
+# ============================================================================
+
+class FakePostgREST:
+    """
+    In-memory tables served over HTTP on a background thread.
+
+    latency_ms is added to every request (uniformly +/- jitter of it), plus
+    per_row_us for each row returned; error_rate answers that fraction of
+    requests with a 503 PostgREST error.
+    """
+
+    def __init__(
+        self,
+        tables: Dict[str, List[Dict]],
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter: float = 0.5,
+        per_row_us: float = 0.0,
+        error_rate: float = 0.0,
+    ):
+        self.tables = tables
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.per_row_us = per_row_us
+        self.error_rate = error_rate
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._connections = set()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakePostgREST":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-postgrest", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop listening and drop open keep-alive connections (an outage, as far as clients can tell)"""
+        self._server.shutdown()
+        self._server.server_close()
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def delay(self, n_rows: int) -> float:
+        base = self.latency_ms * (1 + self.jitter * (2 * random.random() - 1)) if self.latency_ms else 0.0
+        return max(0.0, base / 1000 + n_rows * self.per_row_us / 1e6)
+
+    # ------------------------------------------------------------------------
+
+    def select(self, table: str, params: List, single: bool, count: bool):
+        rows = self.tables[table]
+        query = dict(params)  # repeated limit/offset: last one wins
+        for column, expression in params:
+            if column not in RESERVED_PARAMS:
+                test = _filter(expression)
+                rows = [r for r in rows if test(r.get(column))]
+        total = len(rows)
+        if "order" in query:
+            rows = _sort(rows, query["order"])
+        offset = int(query.get("offset", 0))
+        limit = int(query["limit"]) if "limit" in query else None
+        rows = rows[offset:offset + limit if limit is not None else None]
+        select = query.get("select", "*")
+        if select == "count":
+            rows = [{"count": total}]
+        else:
+            rows = _project(rows, select)
+
+        headers = {}
+        if count:
+            end = offset + len(rows) - 1
+            headers["Content-Range"] = f"{offset}-{end}/{total}" if rows else f"*/{total}"
+        if single:
+            if len(rows) != 1:
+                return 406, {
+                    "code": "PGRST116",
+                    "message": "JSON object requested, multiple (or no) rows returned",
+                    "details": f"The result contains {len(rows)} rows",
+                    "hint": None,
+                }, headers
+            return 200, rows[0], headers
+        return 200, rows, headers
+
+    def insert(self, table: str, payload, params: List):
+        rows = payload if isinstance(payload, list) else [payload]
+        key_columns = [c for c in dict(params).get("on_conflict", "").split(",") if c]
+
+        def key(row):
+            return tuple(row.get(c) for c in key_columns)
+
+        with self._lock:
+            existing = self.tables.setdefault(table, [])
+            by_key = {key(r): r for r in existing} if key_columns else {}
+            next_id = max((r.get("id") or 0 for r in existing), default=0) + 1
+            stored = []
+            for row in rows:
+                match = by_key.get(key(row)) if key_columns else None
+                if match is not None:
+                    match.update(row)
+                    stored.append(match)
+                    continue
+                row = {"id": next_id, **row}
+                next_id += 1
+                existing.append(row)
+                if key_columns:
+                    by_key[key(row)] = row
+                stored.append(row)
+        return 201, stored, {}
+
+    def delete(self, table: str, params: List):
+        tests = [(column, _filter(expression)) for column, expression in params if column not in RESERVED_PARAMS]
+        with self._lock:
+            rows = self.tables.get(table, [])
+            kept = [r for r in rows if not all(test(r.get(column)) for column, test in tests)]
+            deleted = [r for r in rows if all(test(r.get(column)) for column, test in tests)]
+            self.tables[table] = kept
+        return 200, deleted, {}
+
+    def _handler_class(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real endpoint
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                super().setup()
+                with fake._lock:
+                    fake._connections.add(self.connection)
+
+            def finish(self):
+                with fake._lock:
+                    fake._connections.discard(self.connection)
+                try:
+                    super().finish()
+                except OSError:
+                    pass
+
+            def _send(self, status: int, body, headers: Dict):
+                payload = orjson.dumps(body)
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                try:
+                    self.wfile.write(payload)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True  # client timed out and hung up
+
+            def _route(self):
+                parts = urlsplit(self.path)
+                if not parts.path.startswith("/rest/v1/"):
+                    return None, []
+                return parts.path[len("/rest/v1/"):], parse_qsl(parts.query, keep_blank_values=True)
+
+            def _handle(self, method: str):
+                with fake._lock:
+                    fake.requests += 1
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                table, params = self._route()
+                if table is None or (method == "GET" and table not in fake.tables):
+                    time.sleep(fake.delay(0))
+                    self._send(404, {"code": "42P01", "message": f"relation \"{table}\" does not exist",
+                                     "details": None, "hint": None}, {})
+                    return
+                if fake.error_rate and random.random() < fake.error_rate:
+                    time.sleep(fake.delay(0))
+                    self._send(503, {"code": "PGRST000", "message": "injected failure",
+                                     "details": None, "hint": None}, {})
+                    return
+                try:
+                    if method == "GET":
+                        prefer = self.headers.get("Prefer", "")
+                        status, data, headers = fake.select(
+                            table, params, SINGLE_OBJECT in self.headers.get("Accept", ""), "count=" in prefer
+                        )
+                    elif method == "DELETE":
+                        status, data, headers = fake.delete(table, params)
+                        if "return=representation" not in self.headers.get("Prefer", ""):
+                            data = []
+                    else:
+                        status, data, headers = fake.insert(table, orjson.loads(body or b"[]"), params)
+                        if status < 300 and "return=representation" not in self.headers.get("Prefer", ""):
+                            data = []
+                except (ValueError, KeyError) as e:
+                    status, data, headers = 400, {"code": "PGRST100", "message": str(e),
+                                                  "details": None, "hint": None}, {}
+                time.sleep(fake.delay(len(data) if isinstance(data, list) else 1))
+                self._send(status, data, headers)
+
+            def do_GET(self):
+                self._handle("GET")
+
+            def do_POST(self):
+                self._handle("POST")
+
+            def do_DELETE(self):
+                self._handle("DELETE")
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local PostgREST stand-in serving generated tables")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--companies", type=int, default=10_000)
+    parser.add_argument("--sectors", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--per-row-us", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    fake = FakePostgREST(
+        make_tables(args.companies, args.sectors), port=args.port, latency_ms=args.latency_ms,
+        jitter=args.jitter, per_row_us=args.per_row_us, error_rate=args.error_rate
+    ).start()
+    print(f"✅ Fake PostgREST on {fake.url} ({args.companies} companies, {args.latency_ms} ms latency)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        fake.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+# benchmarks/load_test.py
+"""
+End-to-end load test against a local PostgREST stand-in
+Starts benchmarks.fake_postgrest (generated tables, injected latency), runs
+the API under uvicorn in a subprocess pointed at it, then drives a weighted
+mix of /analysis/frame1-3, /analysis/batch, /search/companies and /data/all
+and reports throughput and latency percentiles per scenario.
+
+Usage:
+    python -m benchmarks.load_test                               closed loop, 16 clients, 20 s
+    python -m benchmarks.load_test --rate 50                     open loop, 50 req/s Poisson arrivals
+    python -m benchmarks.load_test --latency-ms 80 --mix search=1,data_all=1
+    python -m benchmarks.load_test --target http://127.0.0.1:8000   existing server (no fake, no subprocess)
+
+Open-loop latencies are measured from the scheduled send time, so queueing
+behind a saturated server is counted (no coordinated omission).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+import orjson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.datagen import make_tables
+from benchmarks.fake_postgrest import FakePostgREST
+from lib.valuation import DCF_REQUIRED_COLUMNS
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_MIX = "frame1=3,frame2=3,frame3=3,batch=1,search=4,data_all=1"
+PERCENTILES = (50, 90, 95, 99)
+
+
+# ============================================================================
+# SCENARIOS
+# ============================================================================
+
+class Scenarios:
+    """Request builders; each returns (method, path, json body or None)"""
+
+    def __init__(self, tables: Dict[str, List[Dict]], batch_size: int, seed: int = 7):
+        self.companies = tables["companies_dataset"]
+        # frame2 rejects null DCF inputs with 422; datagen leaves some missing
+        self.valuable = [
+            company for company in self.companies
+            if all(company.get(column) is not None for column in DCF_REQUIRED_COLUMNS)
+        ] or self.companies
+        self.batch_size = batch_size
+        self.rng = random.Random(seed)
+
+    def _company(self) -> Dict:
+        return self.rng.choice(self.companies)
+
+    def frame1(self):
+        return "POST", "/api/v1/analysis/frame1", self._company()
+
+    def frame2(self):
+        return "POST", "/api/v1/analysis/frame2", self.rng.choice(self.valuable)
+
+    def frame3(self):
+        company = self._company()
+        return "POST", "/api/v1/analysis/frame3", {
+            "company_name": company["company"],
+            "ev_growth": self.rng.gauss(0.2, 0.3),
+            "nsellside": company["nsellside"],
+            "nsellside_p50": 5.0,
+            "ceo_age": company["ceo_age"],
+            "revenue": company["revenue"],
+            "edamargin": self.rng.gauss(0.1, 0.05),
+            "edamargin_p75": 0.15,
+        }
+
+    def batch(self):
+        return "POST", "/api/v1/analysis/batch", self.rng.sample(self.companies, min(self.batch_size, len(self.companies)))
+
+    def search(self):
+        fragment = f"{self.rng.randrange(len(self.companies)):07d}"[:5]  # matches ~1-100 names
+        return "GET", f"/api/v1/search/companies?query=Company%20{fragment}&limit=10", None
+
+    def data_all(self):
+        return "GET", "/api/v1/data/all", None
+
+
+def parse_mix(mix: str) -> List[Tuple[str, float]]:
+    weights = []
+    for item in mix.split(","):
+        name, _, weight = item.partition("=")
+        if not hasattr(Scenarios, name.strip()) or name.startswith("_"):
+            raise ValueError(f"unknown scenario: {name}")
+        weights.append((name.strip(), float(weight or 1)))
+    return weights
+
+
+# ============================================================================
+# SERVER LIFECYCLE
+# ============================================================================
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_api(supabase_url: str, workers: int, log_path: str = os.devnull) -> Tuple[subprocess.Popen, str]:
+    port = _free_port()
+    env = {
+        **os.environ,
+        "NEXT_PUBLIC_SUPABASE_URL": supabase_url,
+        "NEXT_PUBLIC_SUPABASE_ANON_KEY": "load-test",
+        "PYTHONPATH": PROJECT_ROOT,
+    }
+    with open(log_path, "ab") as log:  # the child keeps its own descriptor
+        process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "api.app:app", "--host", "127.0.0.1", "--port", str(port),
+             "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+            cwd=PROJECT_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT,
+        )
+    return process, f"http://127.0.0.1:{port}"
+
+
+def wait_ready(base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/api/v1/health", timeout=2).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"API at {base_url} not ready after {timeout:.0f}s")
+
+
+# ============================================================================
+# LOAD GENERATION
+# ============================================================================
+
+async def _send(client: httpx.AsyncClient, request) -> int:
+    method, path, body = request
+    try:
+        response = await client.request(
+            method, path, content=orjson.dumps(body) if body is not None else None,
+            headers={"Content-Type": "application/json"} if body is not None else None,
+        )
+        return response.status_code
+    except httpx.HTTPError:
+        return 0  # connection error / timeout
+
+
+async def run_load(
+    base_url: str,
+    scenarios: Scenarios,
+    mix: List[Tuple[str, float]],
+    duration: float,
+    concurrency: int,
+    rate: Optional[float] = None,
+    timeout: float = 30.0,
+) -> Dict[str, List[Tuple[float, int]]]:
+    """(latency_seconds, status) per scenario name"""
+    names = [name for name, _ in mix]
+    weights = [weight for _, weight in mix]
+    samples: Dict[str, List[Tuple[float, int]]] = {name: [] for name in names}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        deadline = time.perf_counter() + duration
+
+        async def one(name: str, scheduled: float):
+            status = await _send(client, getattr(scenarios, name)())
+            samples[name].append((time.perf_counter() - scheduled, status))
+
+        if rate is None:
+            async def worker():
+                while time.perf_counter() < deadline:
+                    name = scenarios.rng.choices(names, weights)[0]
+                    await one(name, time.perf_counter())
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        else:
+            tasks = []
+            next_at = time.perf_counter()
+            while next_at < deadline:
+                delay = next_at - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                name = scenarios.rng.choices(names, weights)[0]
+                tasks.append(asyncio.create_task(one(name, next_at)))
+                next_at += scenarios.rng.expovariate(rate)
+            await asyncio.gather(*tasks)
+    return samples
+
+
+def summarize(samples: Dict[str, List[Tuple[float, int]]], elapsed: float) -> Dict[str, Dict]:
+    report = {}
+    everything = [s for rows in samples.values() for s in rows]
+    for name, rows in list(samples.items()) + [("ALL", everything)]:
+        if not rows:
+            continue
+        latencies = np.array([latency for latency, _ in rows]) * 1000
+        errors = sum(1 for _, status in rows if not 200 <= status < 400)
+        report[name] = {
+            "requests": len(rows),
+            "errors": errors,
+            "rps": len(rows) / elapsed,
+            **{f"p{p}_ms": float(np.percentile(latencies, p)) for p in PERCENTILES},
+            "max_ms": float(latencies.max()),
+        }
+    return report
+
+
+def print_report(report: Dict[str, Dict]):
+    header = f"  {'scenario':<10} {'reqs':>7} {'errors':>7} {'req/s':>8}" + "".join(
+        f" {f'p{p} ms':>9}" for p in PERCENTILES
+    ) + f" {'max ms':>9}"
+    print(header)
+    for name, row in report.items():
+        print(
+            f"  {name:<10} {row['requests']:>7} {row['errors']:>7} {row['rps']:>8.1f}"
+            + "".join(f" {row[f'p{p}_ms']:>9.1f}" for p in PERCENTILES)
+            + f" {row['max_ms']:>9.1f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="End-to-end API load test against a fake PostgREST")
+    parser.add_argument("--target", help="base URL of an already running API (skips fake + uvicorn)")
+    parser.add_argument("--companies", type=int, default=10_000)
+    parser.add_argument("--sectors", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="injected PostgREST latency per call")
+    parser.add_argument("--jitter", type=float, default=0.5, help="+/- fraction of --latency-ms")
+    parser.add_argument("--per-row-us", type=float, default=2.0, help="extra PostgREST latency per returned row")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of PostgREST calls failing with 503")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--api-log", default=os.devnull, help="file for the API subprocess output")
+    parser.add_argument("--concurrency", type=int, default=16, help="clients (closed loop) / max connections")
+    parser.add_argument("--rate", type=float, help="open loop: Poisson arrivals per second")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds of measured load")
+    parser.add_argument("--warmup", type=float, default=3.0, help="seconds of unmeasured load first")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,... (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=100, help="companies per /analysis/batch request")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    tables = make_tables(args.companies, args.sectors)
+    scenarios = Scenarios(tables, args.batch_size)
+
+    fake, process = None, None
+    base_url = args.target
+    try:
+        if base_url is None:
+            fake = FakePostgREST(
+                tables, latency_ms=args.latency_ms, jitter=args.jitter,
+                per_row_us=args.per_row_us, error_rate=args.error_rate
+            ).start()
+            process, base_url = start_api(fake.url, args.workers, args.api_log)
+        wait_ready(base_url)
+        print(f"✅ API ready at {base_url} ({args.companies} companies, {args.latency_ms:g} ms PostgREST latency)")
+
+        if args.warmup > 0:
+            asyncio.run(run_load(base_url, scenarios, mix, args.warmup, args.concurrency, args.rate))
+        started = time.perf_counter()
+        samples = asyncio.run(run_load(base_url, scenarios, mix, args.duration, args.concurrency, args.rate))
+        report = summarize(samples, time.perf_counter() - started)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        if fake is not None:
+            fake.stop()
+
+    mode = f"open loop {args.rate:g} req/s" if args.rate else f"closed loop, {args.concurrency} clients"
+    print(f"\n  {mode}, {args.duration:g}s" + (f", {fake.requests} PostgREST calls" if fake else ""))
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            f.write(orjson.dumps({"args": vars(args), "report": report}, option=orjson.OPT_INDENT_2).decode())
+        print(f"✅ Report written to {args.json}")
+    return 1 if report.get("ALL", {}).get("errors") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
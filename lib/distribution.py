@@ -0,0 +1,133 @@
+# lib/distribution.py
+"""
+Sector distribution reports - histograms and summary statistics
+Result columns are grouped by sector once into contiguous float arrays;
+a report is a handful of searchsorted/bincount calls on one slice
+"""
+
+from __future__ import annotations
+
+from lib.lazy import lazy_import
+from typing import Dict, Optional
+
+from lib.metrics import PERCENTILE_COLUMNS, POSITION_LABELS, sector_percentile_table
+from lib.predictability import PREDICTABILITY_CATEGORIES
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+DISTRIBUTION_FIELDS = ("ltde", "edamargin", "fx", "growth_expected")
+SUMMARY_PERCENTILES = (10, 25, 50, 75, 90)
+
+
+def summary_stats(values: np.ndarray) -> Dict:
+    """count, missing, mean, std, min, p10-p90, max (NaN-aware)"""
+    present = values[~np.isnan(values)]
+    stats = {"count": int(len(present)), "missing": int(len(values) - len(present))}
+    if not len(present):
+        return {**stats, "mean": None, "std": None, "min": None, "max": None,
+                **{f"p{p}": None for p in SUMMARY_PERCENTILES}}
+    quantiles = np.percentile(present, SUMMARY_PERCENTILES)
+    return {
+        **stats,
+        "mean": float(present.mean()),
+        "std": float(present.std(ddof=1)) if len(present) > 1 else 0.0,
+        "min": float(present.min()),
+        **{f"p{p}": float(q) for p, q in zip(SUMMARY_PERCENTILES, quantiles)},
+        "max": float(present.max()),
+    }
+
+
+def histogram(values: np.ndarray, edges: np.ndarray, labels=None) -> Dict:
+    """
+    Counts below edges[0], in each [edges[i], edges[i+1]) and from edges[-1] up.
+    Bucket boundaries follow get_percentile_position: a value equal to an edge
+    falls in the bucket above it.
+    """
+    present = values[~np.isnan(values)]
+    buckets = np.searchsorted(edges, present, side="right")
+    counts = np.bincount(buckets, minlength=len(edges) + 1)
+    return {
+        "edges": [float(e) for e in edges],
+        "labels": labels,
+        "counts": counts.tolist(),
+    }
+
+
+def _bin_edges(p10_p90: np.ndarray, bins: Optional[int]) -> np.ndarray:
+    """The p10..p90 cut points themselves, or `bins` equal-width bins spanning p10-p90"""
+    if bins is None:
+        return p10_p90
+    return np.linspace(p10_p90[0], p10_p90[-1], bins + 1)
+
+
+class SectorDistributions:
+    """
+    Result columns reordered by category_code so each sector is one
+    contiguous [start, end) slice, plus the sector percentile table.
+    """
+
+    def __init__(self, results: pd.DataFrame, waccmap: pd.DataFrame):
+        sectors = results["category_code"].astype(str).to_numpy()
+        order = np.argsort(sectors, kind="stable")
+        sorted_sectors = sectors[order]
+        names, starts = np.unique(sorted_sectors, return_index=True)
+        ends = np.append(starts[1:], len(sorted_sectors))
+        self._bounds = {name: (start, end) for name, start, end in zip(names, starts, ends)}
+
+        self._columns = {
+            field: pd.to_numeric(results[field], errors="coerce").to_numpy(dtype=float)[order]
+            for field in DISTRIBUTION_FIELDS if field in results.columns
+        }
+        self._leaves = results["predictability_leaf"].to_numpy()[order] \
+            if "predictability_leaf" in results.columns else None
+        self._percentiles = sector_percentile_table(waccmap)
+
+    def sectors(self):
+        return list(self._bounds)
+
+    def report(self, category_code: str, bins: Optional[int] = None) -> Optional[Dict]:
+        """
+        Histograms and summary stats for one sector, None if it has no companies.
+
+        Metric histograms use the sector's p10-p90 from sector_wacc_map; growth_expected
+        has no reference percentiles, so it uses the sector's own p10-p90.
+        """
+        bounds = self._bounds.get(str(category_code))
+        if bounds is None:
+            return None
+        start, end = bounds
+
+        reference = self._percentiles.loc[str(category_code)] if str(category_code) in self._percentiles.index else None
+        fields = {}
+        for field, column in self._columns.items():
+            values = column[start:end]
+            stats = summary_stats(values)
+            if field in PERCENTILE_COLUMNS and reference is not None:
+                cuts, source = reference[PERCENTILE_COLUMNS[field]].to_numpy(dtype=float), "sector_wacc_map"
+            elif stats["count"]:
+                cuts, source = np.array([stats[f"p{p}"] for p in SUMMARY_PERCENTILES]), "sector_data"
+            else:
+                cuts, source = None, None
+
+            if cuts is None or np.isnan(cuts).any():
+                hist = None
+            else:
+                labels = POSITION_LABELS + ["Above P90"] if bins is None else None
+                hist = {"source": source, **histogram(values, _bin_edges(cuts, bins), labels)}
+            fields[field] = {"summary": stats, "histogram": hist}
+
+        leaves = None
+        if self._leaves is not None:
+            counts = pd.Series(self._leaves[start:end]).value_counts()
+            leaves = [
+                {"leaf": leaf, "category": description, "count": int(counts.get(leaf, 0))}
+                for leaf, description in PREDICTABILITY_CATEGORIES.items()
+            ]
+
+        return {
+            "category_code": str(category_code),
+            "companies": int(end - start),
+            "fields": fields,
+            "predictability": leaves,
+        }
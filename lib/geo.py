@@ -0,0 +1,98 @@
+# lib/geo.py
+"""
+Geospatial index over latitude/longitude points
+Uniform grid: points sorted by cell id, so every grid row of a query
+rectangle is one contiguous slice found with two binary searches
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Tuple
+
+from lib.lazy import lazy_import
+
+np = lazy_import("numpy")
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distance from one point to many, in km"""
+    lat1, lon1 = np.radians(lat), np.radians(lon)
+    lat2, lon2 = np.radians(lats), np.radians(lons)
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class GeoGridIndex:
+    """
+    Grid index for radius and bounding-box queries.
+
+    Positions returned by queries refer to the lat/lon arrays passed in;
+    points with missing or out-of-range coordinates are never returned.
+    Queries are clamped at the antimeridian rather than wrapping around it.
+    """
+
+    def __init__(self, lats: np.ndarray, lons: np.ndarray, cell_deg: float = 0.05):
+        lats = np.asarray(lats, dtype=float)
+        lons = np.asarray(lons, dtype=float)
+        valid = np.isfinite(lats) & np.isfinite(lons) & (np.abs(lats) <= 90) & (np.abs(lons) <= 180)
+
+        self.cell_deg = cell_deg
+        self.n_cols = int(np.ceil(360 / cell_deg)) + 1
+        positions = np.flatnonzero(valid)
+        cells = self._cell_ids(lats[positions], lons[positions])
+
+        order = np.argsort(cells, kind="stable")
+        self.positions = positions[order]
+        self.cells = cells[order]
+        self.lats = lats[self.positions]
+        self.lons = lons[self.positions]
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def _rows_cols(self, lats, lons):
+        rows = np.floor((np.asarray(lats) + 90) / self.cell_deg).astype(np.int64)
+        cols = np.floor((np.asarray(lons) + 180) / self.cell_deg).astype(np.int64)
+        return rows, cols
+
+    def _cell_ids(self, lats, lons):
+        rows, cols = self._rows_cols(lats, lons)
+        return rows * self.n_cols + cols
+
+    def _candidates(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> np.ndarray:
+        """Sorted-array slots of every point in the grid cells covering the rectangle"""
+        min_lat, max_lat = max(min_lat, -90.0), min(max_lat, 90.0)
+        min_lon, max_lon = max(min_lon, -180.0), min(max_lon, 180.0)
+        if min_lat > max_lat or min_lon > max_lon:
+            return np.empty(0, dtype=np.int64)
+
+        (row0, row1), (col0, col1) = self._rows_cols([min_lat, max_lat], [min_lon, max_lon])
+        row_ids = np.arange(row0, row1 + 1) * self.n_cols
+        starts = np.searchsorted(self.cells, row_ids + col0, side="left")
+        ends = np.searchsorted(self.cells, row_ids + col1, side="right")
+        slices = [np.arange(s, e) for s, e in zip(starts, ends) if e > s]
+        return np.concatenate(slices) if slices else np.empty(0, dtype=np.int64)
+
+    def bbox(self, min_lat: float, max_lat: float, min_lon: float, max_lon: float) -> np.ndarray:
+        """Positions of points inside the bounding box"""
+        slots = self._candidates(min_lat, max_lat, min_lon, max_lon)
+        lats, lons = self.lats[slots], self.lons[slots]
+        inside = (lats >= min_lat) & (lats <= max_lat) & (lons >= min_lon) & (lons <= max_lon)
+        return self.positions[slots[inside]]
+
+    def radius(self, lat: float, lon: float, radius_km: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, distances_km) of points within radius_km, nearest first"""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        cos_lat = np.cos(np.radians(min(abs(lat) + dlat, 90.0)))
+        dlon = 180.0 if cos_lat < 1e-6 else min(radius_km / (KM_PER_DEGREE_LAT * cos_lat), 180.0)
+
+        slots = self._candidates(lat - dlat, lat + dlat, lon - dlon, lon + dlon)
+        distances = haversine_km(lat, lon, self.lats[slots], self.lons[slots])
+        inside = distances <= radius_km
+        slots, distances = slots[inside], distances[inside]
+        order = np.argsort(distances, kind="stable")
+        return self.positions[slots[order]], distances[order]
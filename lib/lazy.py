@@ -0,0 +1,27 @@
+# lib/lazy.py
+"""
+Deferred imports for serverless cold starts
+np = lazy_import("numpy") binds a placeholder module; numpy itself is
+imported on the first attribute access, not when the importing module loads
+"""
+
+import importlib
+from types import ModuleType
+
+
+class LazyModule(ModuleType):
+    """Module placeholder that imports the real module on first attribute access"""
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.__name__)
+        # copy the namespace so later lookups are plain dict hits, not __getattr__ calls
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attr)
+
+    def __dir__(self):
+        return dir(importlib.import_module(self.__name__))
+
+
+def lazy_import(name: str) -> ModuleType:
+    """Placeholder for module `name` (dotted names allowed; parents aren't imported either)"""
+    return LazyModule(name)
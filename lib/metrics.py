@@ -4,10 +4,14 @@ Financial metrics calculations - UNCHANGED from original
 All formulas preserved exactly
 """
 
-import numpy as np
-import pandas as pd
+from __future__ import annotations
+
+from lib.lazy import lazy_import
 from typing import Dict
 
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
 
 def calculate_metrics_from_dataset(company_row: pd.Series) -> Dict:
     """
@@ -138,3 +142,78 @@ def get_sector_percentiles(category_code: str, waccmap: pd.DataFrame) -> Dict:
         percentiles['nsellside'] = row.get('nsellside', np.nan)
     
     return percentiles
+
+
+# ============================================================================
+# VECTORIZED VERSIONS (batch analysis) - same formulas, one pass per column
+# ============================================================================
+
+PERCENTILE_COLUMNS = {
+    'ltde': ['ltde10th', 'ltde25th', 'ltde50th', 'ltde75th', 'ltde90th'],
+    'edamargin': ['edamarg10th', 'edamarg25th', 'edamarg50th', 'edamarg75th', 'edamarg90th'],
+    'fx': ['fx10th', 'fx25th', 'fx50th', 'fx75th', 'fx90th'],
+}
+
+POSITION_LABELS = ["Below P10", "P10-P25", "P25-P50", "P50-P75", "P75-P90"]
+RANK_LABELS = [
+    "Exceptional (Bottom)", "Q1 (Very Low)", "Q2 (Below Median)",
+    "Q3 (Above Median)", "Q4 (High)"
+]
+
+
+def _numeric_column(df: pd.DataFrame, name: str) -> np.ndarray:
+    if name not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
+
+
+def calculate_metrics_vectorized(companies: pd.DataFrame) -> pd.DataFrame:
+    """calculate_metrics_from_dataset for many companies at once (ltde, edamargin, fx)"""
+    lt_debt = _numeric_column(companies, 'lt_debt')
+    sh_equity = _numeric_column(companies, 'sh_equity')
+    ebit = _numeric_column(companies, 'ebit')
+    d_and_a = _numeric_column(companies, 'd_and_a')
+    revenue = _numeric_column(companies, 'revenue')
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ltde = np.where(sh_equity != 0, lt_debt / sh_equity, np.nan)
+        edamargin = np.where(revenue != 0, (ebit + d_and_a) / revenue, np.nan)
+
+    return pd.DataFrame({
+        'ltde': ltde,
+        'edamargin': edamargin,
+        'fx': np.full(len(companies), np.nan),  # Loaded from financial statements
+    }, index=companies.index)
+
+
+def sector_percentile_table(waccmap: pd.DataFrame) -> pd.DataFrame:
+    """
+    Sector percentile columns indexed by str(category_code).
+    First row wins on duplicates, like category_data.iloc[0] in get_sector_percentiles.
+    """
+    columns = [c for cols in PERCENTILE_COLUMNS.values() for c in cols] + ['nsellside', 'nsellside50th']
+    table = waccmap.assign(category_code=waccmap['category_code'].astype(str))
+    table = table.drop_duplicates('category_code', keep='first').set_index('category_code')
+    return table.reindex(columns=columns).apply(pd.to_numeric, errors='coerce')
+
+
+def get_percentile_positions_vectorized(values: np.ndarray, percentiles: np.ndarray) -> tuple:
+    """
+    get_percentile_position over arrays.
+
+    Args:
+        values: (n,) metric values
+        percentiles: (n, 5) p10, p25, p50, p75, p90 per value
+
+    Returns:
+        (positions, ranks) object arrays, None where value is NaN
+    """
+    values = np.asarray(values, dtype=float)
+    conditions = [values < percentiles[:, i] for i in range(5)]
+    positions = np.select(conditions, POSITION_LABELS, default="Above P90").astype(object)
+    ranks = np.select(conditions, RANK_LABELS, default="Exceptional (Top)").astype(object)
+
+    missing = np.isnan(values)
+    positions[missing] = None
+    ranks[missing] = None
+    return positions, ranks
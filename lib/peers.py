@@ -0,0 +1,131 @@
+# lib/peers.py
+"""
+Sector peer search - k nearest neighbours on normalized metric vectors
+One float32 feature matrix per category_code, rebuilt only for sectors
+whose data changed
+"""
+
+from __future__ import annotations
+
+from lib.lazy import lazy_import
+from typing import Dict, Optional, Tuple
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+PEER_FEATURES = ("ltde", "edamargin", "fx", "revenue", "employees")
+LOG_FEATURES = ("revenue", "employees")  # heavy-tailed: compared on a log scale
+BLOCK_ROWS = 65536  # rows per distance block, bounds temporary memory
+
+
+def normalize_features(raw: pd.DataFrame) -> np.ndarray:
+    """
+    Robust per-sector scaling: signed log for size features, then
+    (x - median) / IQR per column. Missing values sit at the median (0);
+    columns with no data at all drop out (all zeros).
+    """
+    matrix = np.empty((len(raw), len(PEER_FEATURES)), dtype=np.float64)
+    for j, feature in enumerate(PEER_FEATURES):
+        values = pd.to_numeric(raw[feature], errors="coerce").to_numpy(dtype=float) if feature in raw.columns \
+            else np.full(len(raw), np.nan)
+        if feature in LOG_FEATURES:
+            values = np.sign(values) * np.log1p(np.abs(values))
+        if np.isnan(values).all():
+            matrix[:, j] = 0.0
+            continue
+        median = np.nanmedian(values)
+        q75, q25 = np.nanpercentile(values, [75, 25])
+        scale = q75 - q25
+        if not scale > 0:
+            scale = np.nanstd(values)
+        if not scale > 0:
+            scale = 1.0
+        column = (values - median) / scale
+        column[np.isnan(column)] = 0.0
+        matrix[:, j] = column
+    return matrix.astype(np.float32)
+
+
+class SectorPeers:
+    """Normalized feature matrix for one sector"""
+
+    def __init__(self, ids: np.ndarray, raw: pd.DataFrame):
+        self.ids = ids
+        self.raw = raw.reset_index(drop=True)
+        self.matrix = normalize_features(self.raw)
+        self.position = {company_id: i for i, company_id in enumerate(ids)}
+
+    def nearest(self, position: int, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """(positions, distances) of the k closest companies, excluding the company itself"""
+        target = self.matrix[position]
+        n = len(self.matrix)
+        distances = np.empty(n, dtype=np.float32)
+        for start in range(0, n, BLOCK_ROWS):
+            block = self.matrix[start:start + BLOCK_ROWS] - target
+            distances[start:start + BLOCK_ROWS] = np.einsum("ij,ij->i", block, block)
+        distances[position] = np.inf
+
+        k = min(k, n - 1)
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        candidates = np.argpartition(distances, k - 1)[:k]
+        order = candidates[np.argsort(distances[candidates], kind="stable")]
+        return order, np.sqrt(distances[order])
+
+
+class PeerIndex:
+    """
+    Per-sector peer matrices keyed by category_code.
+    An index is never modified once built: refreshed() returns a new one that
+    reuses the matrices of sectors whose content hash did not change, so
+    queries can keep reading the old index while the new one is built.
+    """
+
+    def __init__(self):
+        self._sectors: Dict[str, SectorPeers] = {}
+        self._hashes: Dict[str, int] = {}
+        self._company_sector: Dict = {}
+
+    def refreshed(self, frame: pd.DataFrame) -> Tuple["PeerIndex", Dict[str, int]]:
+        """
+        Index for a frame with id, company, category_code and PEER_FEATURES.
+
+        Returns:
+            (new index, counts of rebuilt, unchanged and removed sectors)
+        """
+        columns = ["id", "company"] + [f for f in PEER_FEATURES if f in frame.columns]
+        frame = frame.assign(category_code=frame["category_code"].astype(str))
+        index = PeerIndex()
+        stats = {"rebuilt": 0, "unchanged": 0, "removed": 0}
+
+        for sector, group in frame.groupby("category_code", sort=False):
+            content = int(pd.util.hash_pandas_object(group[columns], index=False).sum())
+            if self._hashes.get(sector) == content:
+                index._sectors[sector] = self._sectors[sector]
+                stats["unchanged"] += 1
+            else:
+                index._sectors[sector] = SectorPeers(group["id"].to_numpy(), group[columns])
+                stats["rebuilt"] += 1
+            index._hashes[sector] = content
+
+        stats["removed"] = len(set(self._sectors) - set(index._sectors))
+        index._company_sector = {
+            company_id: sector
+            for sector, peers in index._sectors.items()
+            for company_id in peers.ids
+        }
+        return index, stats
+
+    def sector_of(self, company_id) -> Optional[str]:
+        return self._company_sector.get(company_id)
+
+    def query(self, company_id, k: int = 20) -> Optional[Tuple[pd.Series, pd.DataFrame]]:
+        """(target row, k nearest peers with a "distance" column), None if unknown"""
+        sector = self._company_sector.get(company_id)
+        if sector is None:
+            return None
+        peers = self._sectors[sector]
+        position = peers.position[company_id]
+        positions, distances = peers.nearest(position, k)
+        result = peers.raw.iloc[positions].assign(category_code=sector, distance=distances)
+        return peers.raw.iloc[position], result
@@ -0,0 +1,69 @@
+# lib/portfolio.py
+"""
+Portfolio aggregation over batch valuation results
+Totals, classification mix, sector exposure and percentile distribution
+"""
+
+from __future__ import annotations
+
+from lib.lazy import lazy_import
+from typing import Dict
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+POSITION_ORDER = ["Below P10", "P10-P25", "P25-P50", "P50-P75", "P75-P90", "Above P90"]
+
+
+def _nan_sum(series: pd.Series) -> float:
+    values = pd.to_numeric(series, errors="coerce")
+    return float(values.sum()) if values.notna().any() else np.nan
+
+
+def aggregate_portfolio(results: pd.DataFrame) -> Dict:
+    """
+    Aggregate per-holding results (lib.batch RESULT_COLUMNS) into portfolio totals.
+
+    Returns:
+        Dict with totals, classification_mix, sector_exposure and
+        percentile_distribution
+    """
+    total_current = _nan_sum(results["EV_current"])
+    total_dcf = _nan_sum(results["EV_DCF"])
+    growth = (total_dcf / total_current - 1) if total_current else np.nan
+
+    # Classification mix: holdings and EV_current share per class
+    by_class = results.groupby("classification", sort=False).agg(
+        holdings=("classification", "size"),
+        EV_current=("EV_current", "sum"),
+        EV_DCF=("EV_DCF", "sum"),
+    )
+    by_class["EV_share"] = by_class["EV_current"] / total_current if total_current else np.nan
+
+    # Sector exposure, largest first
+    by_sector = results.groupby("category_code", sort=False).agg(
+        holdings=("category_code", "size"),
+        EV_current=("EV_current", "sum"),
+        EV_DCF=("EV_DCF", "sum"),
+        median_growth=("growth_expected", "median"),
+    ).sort_values("EV_current", ascending=False)
+    by_sector["EV_share"] = by_sector["EV_current"] / total_current if total_current else np.nan
+
+    # Percentile distribution: holdings per position bucket, per metric
+    distribution = {}
+    for metric in ("ltde", "edamargin", "fx"):
+        counts = results[f"{metric}_position"].value_counts()
+        distribution[metric] = {position: int(counts.get(position, 0)) for position in POSITION_ORDER}
+        distribution[metric]["N/A"] = int(results[f"{metric}_position"].isna().sum())
+
+    return {
+        "totals": {
+            "holdings": len(results),
+            "EV_current": total_current,
+            "EV_DCF": total_dcf,
+            "growth_expected": growth,
+        },
+        "classification_mix": by_class.reset_index().to_dict(orient="records"),
+        "sector_exposure": by_sector.reset_index().to_dict(orient="records"),
+        "percentile_distribution": distribution,
+    }
@@ -4,10 +4,14 @@ Predictability decision tree and classification - UNCHANGED from original
 Frame 3 logic preserved exactly
 """
 
-import numpy as np
-import pandas as pd
+from __future__ import annotations
+
+from lib.lazy import lazy_import
 from typing import Tuple, List, Dict
 
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
 
 PREDICTABILITY_CATEGORIES = {
     "0": "low growth",
@@ -65,3 +69,39 @@ def predictability_decision_tree(
     
     # All conditions met
     return "0,8", PREDICTABILITY_CATEGORIES["0,8"], path
+
+
+# ============================================================================
+# VECTORIZED VERSION (batch analysis) - same tree, evaluated with np.select
+# ============================================================================
+
+def predictability_vectorized(
+    ev_growth: np.ndarray,
+    nsellside: np.ndarray,
+    nsellside_p50: np.ndarray,
+    ceo_age: np.ndarray,
+    revenue: np.ndarray,
+    edamargin: np.ndarray,
+    edamargin_p75: np.ndarray
+) -> np.ndarray:
+    """
+    predictability_decision_tree over arrays (missing values as NaN).
+
+    Returns:
+        leaf_value per row; map through PREDICTABILITY_CATEGORIES for descriptions
+    """
+    ev_growth, nsellside, nsellside_p50, ceo_age, revenue, edamargin, edamargin_p75 = (
+        np.asarray(a, dtype=float)
+        for a in (ev_growth, nsellside, nsellside_p50, ceo_age, revenue, edamargin, edamargin_p75)
+    )
+
+    # NaN comparisons are False, which skips a step exactly like the explicit
+    # np.isnan guards in predictability_decision_tree
+    conditions = [
+        ev_growth < 0.15,
+        nsellside < nsellside_p50,
+        ceo_age < 60,
+        revenue < 90000000,
+        edamargin < edamargin_p75,
+    ]
+    return np.select(conditions, ["0", "0,23", "0,43", "0,54", "0,65"], default="0,8").astype(object)
@@ -0,0 +1,111 @@
+# lib/regions.py
+"""
+Regional roll-ups of valuation results by NUTS level
+One aggregate row per region and level; refreshed() re-aggregates only the
+regions whose member rows changed
+"""
+
+from __future__ import annotations
+
+from lib.lazy import lazy_import
+from typing import Dict, Optional, Tuple
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+REGION_LEVELS = ("nuts1", "nuts2", "nuts3", "region_in_country")
+NUTS_PARENT = {"nuts2": "nuts1", "nuts3": "nuts2"}  # NUTS codes extend their parent's code
+CLASSIFICATIONS = ("Top Pick", "Good Deal", "Bit Overvalued")  # lib.valuation.classify_by_growth
+ROLLUP_COLUMNS = ["company_id", "EV_current", "EV_DCF", "growth_expected", "classification"]
+
+
+def aggregate_regions(frame: pd.DataFrame, level: str) -> pd.DataFrame:
+    """Counts, EV sums, median growth and classification counts per region"""
+    ev_current = pd.to_numeric(frame["EV_current"], errors="coerce")
+    ev_dcf = pd.to_numeric(frame["EV_DCF"], errors="coerce")
+    values = pd.DataFrame({
+        level: frame[level],
+        "matched": frame["company_id"].notna(),
+        "EV_current": ev_current,
+        "EV_DCF": ev_dcf,
+        "growth_expected": pd.to_numeric(frame["growth_expected"], errors="coerce"),
+    })
+    grouped = values.groupby(level, sort=True)
+    cube = grouped.agg(
+        companies=(level, "size"),
+        valued=("matched", "sum"),
+        EV_current=("EV_current", "sum"),
+        EV_DCF=("EV_DCF", "sum"),
+        median_growth=("growth_expected", "median"),
+    )
+    cube["growth_expected"] = np.where(cube["EV_current"] != 0, cube["EV_DCF"] / cube["EV_current"] - 1, np.nan)
+
+    counts = pd.crosstab(frame[level], frame["classification"]) if frame["classification"].notna().any() \
+        else pd.DataFrame(index=cube.index)
+    for label in CLASSIFICATIONS:
+        cube[label] = counts[label].reindex(cube.index, fill_value=0).astype(int) if label in counts.columns else 0
+    return cube
+
+
+class RegionCube:
+    """
+    Aggregates for every REGION_LEVELS column. Each region carries a
+    content hash of its member rows; refreshed() builds the next cube,
+    re-aggregating changed regions only and dropping vanished ones.
+    """
+
+    def __init__(self, levels=REGION_LEVELS):
+        self.levels = levels
+        self._cubes: Dict[str, pd.DataFrame] = {}
+        self._hashes: Dict[str, pd.Series] = {}
+
+    def refreshed(self, joined: pd.DataFrame) -> Tuple["RegionCube", Dict[str, Dict[str, int]]]:
+        """
+        Cube for contacts joined to valuations (join_contacts_to_valuations),
+        reusing this one's unchanged regions; this cube is left as it is.
+
+        Returns:
+            (new cube, per level counts of rebuilt, unchanged and removed regions)
+        """
+        columns = [c for c in ROLLUP_COLUMNS if c in joined.columns]
+        row_hashes = pd.util.hash_pandas_object(joined[columns].astype(object), index=False).to_numpy()
+        result = RegionCube(self.levels)
+        stats = {}
+
+        for level in self.levels:
+            if level not in joined.columns:
+                continue
+            regions = joined[level].where(joined[level].notna()).astype(object)
+            present = regions.notna().to_numpy()
+            frame = joined.loc[present, columns].assign(**{level: regions[present].astype(str)})
+            # order-independent content hash per region (wrapping uint64 sum)
+            hashes = pd.Series(row_hashes[present], index=frame.index).groupby(frame[level]).sum()
+
+            previous = self._hashes.get(level, pd.Series(dtype="uint64"))
+            common = hashes.index.intersection(previous.index)
+            unchanged = common[hashes[common].to_numpy() == previous[common].to_numpy()]
+            changed = hashes.index.difference(unchanged)
+            removed = previous.index.difference(hashes.index)
+
+            cube = self._cubes.get(level)
+            kept = cube.loc[cube.index.intersection(unchanged)] if cube is not None else None
+            fresh = aggregate_regions(frame[frame[level].isin(changed)], level) if len(changed) else None
+            parts = [p for p in (kept, fresh) if p is not None and len(p)]
+            result._cubes[level] = pd.concat(parts).sort_index() if parts else aggregate_regions(frame, level)
+            result._hashes[level] = hashes
+            stats[level] = {"rebuilt": len(changed), "unchanged": len(unchanged), "removed": len(removed)}
+        return result, stats
+
+    def rollup(self, level: str, parent: Optional[str] = None) -> Optional[pd.DataFrame]:
+        """
+        Aggregates for one level, None if the level was never built.
+        parent drills down: NUTS regions whose code extends parent.
+        """
+        cube = self._cubes.get(level)
+        if cube is None:
+            return None
+        if parent is not None:
+            if level not in NUTS_PARENT:
+                raise ValueError(f"Drill-down requires one of: {list(NUTS_PARENT)}")
+            cube = cube[cube.index.str.startswith(parent)]
+        return cube.rename_axis("region").reset_index()
@@ -0,0 +1,99 @@
+# lib/screening.py
+"""
+Top-k deal screening over precomputed valuation results
+Presorted index arrays per (sector, classification) block answer a
+top-k query with a slice instead of a scan of the whole universe
+"""
+
+from __future__ import annotations
+
+from lib.lazy import lazy_import
+from typing import Dict, Optional, Tuple
+
+np = lazy_import("numpy")
+pd = lazy_import("pandas")
+
+# fx is not rankable: it comes from financial statements, so batch results leave it NaN
+RANK_FIELDS = ("growth_expected", "EV_DCF", "EV_current", "ltde", "edamargin")
+
+
+class RankingIndex:
+    """
+    For every rank field, row positions sorted descending (NaN excluded) within
+    four groupings: everything, by sector, by classification, by both.
+    Each grouping is one array; a group is a contiguous [start, end) block.
+    """
+
+    def __init__(self, results: pd.DataFrame, fields: Tuple[str, ...] = RANK_FIELDS):
+        self.results = results.reset_index(drop=True)
+        self.fields = tuple(f for f in fields if f in self.results.columns)
+
+        sector_codes, self.sectors = pd.factorize(self.results["category_code"].astype(str))
+        class_codes, self.classifications = pd.factorize(self.results["classification"])
+        self._sector_lookup = {s: i for i, s in enumerate(self.sectors)}
+        self._class_lookup = {c: i for i, c in enumerate(self.classifications)}
+        n_classes = max(len(self.classifications), 1)
+
+        groupings = {
+            "all": np.zeros(len(self.results), dtype=np.int64),
+            "sector": sector_codes.astype(np.int64),
+            "classification": class_codes.astype(np.int64),
+            "sector_classification": sector_codes.astype(np.int64) * n_classes + class_codes,
+        }
+        self._n_classes = n_classes
+        self._blocks: Dict[Tuple[str, str], Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        for field in self.fields:
+            values = pd.to_numeric(self.results[field], errors="coerce").to_numpy(dtype=float)
+            present = np.flatnonzero(~np.isnan(values))
+            for grouping, codes in groupings.items():
+                # sort by group, then value descending; ties keep input order
+                order = present[np.lexsort((-values[present], codes[present]))]
+                sorted_codes = codes[order]
+                group_ids = np.unique(sorted_codes)
+                starts = np.searchsorted(sorted_codes, group_ids, side="left")
+                ends = np.searchsorted(sorted_codes, group_ids, side="right")
+                self._blocks[(field, grouping)] = (order, group_ids, np.stack([starts, ends], axis=1))
+
+    def _group(self, category_code: Optional[str], classification: Optional[str]) -> Optional[Tuple[str, int]]:
+        """(grouping, group code) for the filters, None if a filter matches nothing"""
+        sector = self._sector_lookup.get(str(category_code)) if category_code is not None else None
+        cls = self._class_lookup.get(classification) if classification is not None else None
+        if (category_code is not None and sector is None) or (classification is not None and cls is None):
+            return None
+        if sector is not None and cls is not None:
+            return "sector_classification", sector * self._n_classes + cls
+        if sector is not None:
+            return "sector", sector
+        if cls is not None:
+            return "classification", cls
+        return "all", 0
+
+    def top_k(
+        self,
+        field: str,
+        k: int = 10,
+        category_code: Optional[str] = None,
+        classification: Optional[str] = None,
+        ascending: bool = False
+    ) -> np.ndarray:
+        """Row positions of the k best companies by field (descending unless ascending)"""
+        if field not in self.fields:
+            raise ValueError(f"Invalid rank field: {field}. Must be one of: {list(self.fields)}")
+
+        group = self._group(category_code, classification)
+        if group is None:
+            return np.empty(0, dtype=np.int64)
+
+        order, group_ids, bounds = self._blocks[(field, group[0])]
+        slot = np.searchsorted(group_ids, group[1])
+        if slot >= len(group_ids) or group_ids[slot] != group[1]:
+            return np.empty(0, dtype=np.int64)
+
+        start, end = bounds[slot]
+        if ascending:
+            return order[max(start, end - k):end][::-1]
+        return order[start:min(end, start + k)]
+
+    def top_k_frame(self, field: str, k: int = 10, **filters) -> pd.DataFrame:
+        positions = self.top_k(field, k, **filters)
+        return self.results.iloc[positions]
@@ -0,0 +1,43 @@
+-- sql/02_import_keys.sql
+-- Natural keys for CSV imports (python -m api.import_csv upserts on these)
+-- Run in Supabase SQL Editor after 01_init_schema.sql
+
+-- ============================================================================
+-- CONTACTS: columns of the IT.csv import (bvd_id_number goes into contact_id)
+-- ============================================================================
+ALTER TABLE contacts
+    ADD COLUMN IF NOT EXISTS name_native TEXT,
+    ADD COLUMN IF NOT EXISTS street_no_building_etc_line_1_native_ TEXT,
+    ADD COLUMN IF NOT EXISTS postcode TEXT,
+    ADD COLUMN IF NOT EXISTS city_native_ TEXT,
+    ADD COLUMN IF NOT EXISTS country_iso_code TEXT,
+    ADD COLUMN IF NOT EXISTS telephone_number TEXT,
+    ADD COLUMN IF NOT EXISTS fax_number TEXT,
+    ADD COLUMN IF NOT EXISTS website_address TEXT,
+    ADD COLUMN IF NOT EXISTS e_mail_address TEXT,
+    ADD COLUMN IF NOT EXISTS region_in_country TEXT,
+    ADD COLUMN IF NOT EXISTS type_of_region_in_country TEXT,
+    ADD COLUMN IF NOT EXISTS nuts1 TEXT,
+    ADD COLUMN IF NOT EXISTS nuts2 TEXT,
+    ADD COLUMN IF NOT EXISTS nuts3 TEXT,
+    ADD COLUMN IF NOT EXISTS latitude NUMERIC,
+    ADD COLUMN IF NOT EXISTS longitude NUMERIC,
+    ADD COLUMN IF NOT EXISTS short_bvf_id_number TEXT;
+
+-- ============================================================================
+-- REMOVE DUPLICATES left by earlier re-imports (keeps the newest row per key)
+-- ============================================================================
+DELETE FROM financial_data a
+USING financial_data b
+WHERE a.company_id = b.company_id
+  AND a.fiscal_year = b.fiscal_year
+  AND a.id < b.id;
+
+-- ============================================================================
+-- UNIQUE KEYS (ON CONFLICT targets)
+-- ============================================================================
+-- companies_dataset: company is already UNIQUE (01_init_schema.sql)
+-- contacts: contact_id is already UNIQUE (01_init_schema.sql)
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_financial_company_year
+    ON financial_data(company_id, fiscal_year);
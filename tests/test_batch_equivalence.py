@@ -0,0 +1,134 @@
+# tests/test_batch_equivalence.py
+"""
+lib.batch.analyze_companies against the scalar Frame 1-3 functions
+(DCF_automated, calculate_metrics_from_dataset, get_percentile_position,
+predictability_decision_tree) on the same seeded companies, including
+rows with NaN inputs and zero denominators
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.datagen import make_dataset
+from lib.batch import analyze_companies
+from lib.metrics import calculate_metrics_from_dataset, get_percentile_position, get_sector_percentiles
+from lib.predictability import predictability_decision_tree
+from lib.valuation import DCF_automated, DCF_REQUIRED_COLUMNS, classify_by_growth
+
+NUMERIC_RESULTS = (
+    "EV_current", "EV_DCF", "growth_expected", "re", "rd", "wacc", "g",
+    "FCF0", "Terminal_Value", "ltde", "edamargin",
+)
+
+
+@pytest.fixture(scope="module")
+def dataset():
+    companies, waccmap = make_dataset(2_000, n_sectors=40, seed=7, missing_rate=0.05)
+
+    # A sector where wacc == g (no terminal value) and one missing from the map
+    waccmap.loc[0, "g"] = waccmap.loc[0, "wacc"]
+    flat_sector = waccmap.loc[0, "category_code"]
+
+    edge_rows = [
+        {"sh_equity": 0.0},                                     # LTDE denominator
+        {"revenue": 0.0},                                       # EDAMARGIN denominator
+        {"revenue": np.nan, "ebit": np.nan},                    # optional inputs missing
+        {"sh_equity": 1.0, "lt_debt": 1.0, "st_debt": 0.0, "cash": 2.0},  # EV_current == 0
+        {"category_code": flat_sector},                         # wacc - g == 0
+        {"category_code": "9999"},                              # no WACC parameters
+        {"ceo_age": np.nan, "nsellside": np.nan},
+        {"net_income": 1e9, "category_code": flat_sector},      # growth >= 0.15 path
+    ]
+    complete = companies.dropna(subset=DCF_REQUIRED_COLUMNS + ["ebit", "revenue"])
+    base = complete.iloc[:len(edge_rows)].copy()
+    for i, overrides in enumerate(edge_rows):
+        for column, value in overrides.items():
+            base.iloc[i, base.columns.get_loc(column)] = value
+    companies = pd.concat([companies, base], ignore_index=True)
+    return companies, waccmap
+
+
+def _scalar(row: pd.Series, waccmap: pd.DataFrame) -> dict:
+    """What the frame 1-3 routes compute for one company"""
+    dcf = DCF_automated(row, waccmap)
+    metrics = calculate_metrics_from_dataset(row)
+    percentiles = get_sector_percentiles(row["category_code"], waccmap)
+    no_range = dict.fromkeys(("p10", "p25", "p50", "p75", "p90"), np.nan)
+
+    result = {
+        "EV_current": dcf["EV_current"],
+        "EV_DCF": dcf["EV_DCF"],
+        "growth_expected": dcf["growth_expected"],
+        "classification": classify_by_growth(dcf["growth_expected"]),
+        "FCF0": dcf["FCF0"],
+        "Terminal_Value": dcf["TV"],
+        **dcf["params"],
+        "ltde": metrics["ltde"],
+        "edamargin": metrics["edamargin"],
+    }
+    for metric in ("ltde", "edamargin", "fx"):
+        position, _, _ = get_percentile_position(metrics[metric], percentiles.get(metric, no_range))
+        result[f"{metric}_position"] = position
+
+    leaf, category, _ = predictability_decision_tree(
+        ev_growth=dcf["growth_expected"],
+        nsellside=row["nsellside"],
+        nsellside_p50=percentiles.get("nsellside_p50", np.nan),
+        ceo_age=row["ceo_age"],
+        revenue=row["revenue"],
+        edamargin=metrics["edamargin"],
+        edamargin_p75=percentiles.get("edamargin", no_range)["p75"],
+    )
+    result["predictability_leaf"] = leaf
+    result["predictability_category"] = category
+    return result
+
+
+def _labels(column: pd.Series) -> list:
+    return [None if pd.isna(value) else value for value in column]
+
+
+def test_vectorized_matches_scalar(dataset):
+    companies, waccmap = dataset
+    results, errors = analyze_companies(companies, waccmap)
+
+    assert len(results) + len(errors) == len(companies)
+    assert len(results) > len(companies) // 2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        expected = pd.DataFrame([_scalar(companies.loc[i], waccmap) for i in results["index"]])
+
+    for column in NUMERIC_RESULTS:
+        np.testing.assert_allclose(
+            results[column].to_numpy(dtype=float), expected[column].to_numpy(dtype=float),
+            rtol=1e-9, equal_nan=True, err_msg=column
+        )
+    for column in ("classification", "ltde_position", "edamargin_position", "fx_position",
+                   "predictability_leaf", "predictability_category"):
+        assert _labels(results[column]) == _labels(expected[column]), column
+
+
+def test_edge_rows_are_valued(dataset):
+    companies, waccmap = dataset
+    results, _ = analyze_companies(companies, waccmap)
+    edge = results[results["index"] >= len(companies) - 8].set_index("index")
+
+    assert len(edge) == 8
+    assert edge["ltde"].isna().iloc[0]
+    assert edge["edamargin"].isna().iloc[1]
+    assert edge["growth_expected"].isna().iloc[3]
+    assert edge["Terminal_Value"].iloc[4] == 0
+    assert edge["EV_DCF"].isna().iloc[5]
+
+
+def test_rows_with_missing_dcf_inputs_are_errors(dataset):
+    companies, waccmap = dataset
+    _, errors = analyze_companies(companies, waccmap)
+
+    assert errors
+    for error in errors:
+        row = companies.loc[error["index"], DCF_REQUIRED_COLUMNS]
+        missing = [column for column in DCF_REQUIRED_COLUMNS if pd.isna(row[column])]
+        assert missing
+        assert error["error"] == "; ".join(f"missing field: {column}" for column in missing)
@@ -0,0 +1,20 @@
+# tests/test_import_time.py
+"""
+Cold-start import budget for api.app (see benchmarks/check_import_time.py)
+"""
+
+import statistics
+
+from benchmarks.check_import_time import DEFAULT_BUDGET_MS, DEFERRED_MODULES, measure_import
+
+
+def test_deferred_modules_not_imported_at_startup():
+    timings = measure_import()
+    assert "api.app" in timings
+    assert sorted(m for m in DEFERRED_MODULES if m in timings) == []
+
+
+def test_import_time_within_budget():
+    measure_import()  # warm the bytecode cache
+    median_ms = statistics.median(measure_import()["api.app"] for _ in range(3)) / 1000
+    assert median_ms <= DEFAULT_BUDGET_MS, f"api.app import took {median_ms:.0f} ms (budget {DEFAULT_BUDGET_MS} ms)"